@@ -0,0 +1,220 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+asyncio flavour of the EClient. The socket is driven by an asyncio protocol
+running in the caller's event loop: received bytes go straight into a
+comm.FrameBuffer and every complete message is decoded and dispatched to the
+EWrapper from the protocol callback. There is no EReader thread and no
+EClient.run() thread, so any number of connections can share one event loop.
+
+    client = AsyncEClient(wrapper)
+    await client.connect("127.0.0.1", 7497, clientId=1)
+    client.reqMktData(1, contract, "", False, False, [])
+    await client.run()  # returns once disconnected
+
+The request methods are the ones of the EClient: writing to an asyncio
+transport never blocks, await drain() to respect the transport's flow control
+when sending a lot of requests at once.
+"""
+
+import asyncio
+import logging
+import socket
+
+from ibapi import comm, utils
+from ibapi.client import EClient
+from ibapi.connection import DEFAULT_RECV_BUF_SIZE
+from ibapi.const import NO_VALID_ID, MAX_MSG_LEN
+from ibapi.errors import CONNECT_FAIL, BAD_LENGTH
+from ibapi.utils import ClientException, BadMessage, currentTimeMillis
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncConnection(asyncio.BufferedProtocol):
+    """Stands in for the Connection of an AsyncEClient."""
+
+    def __init__(self, client, host, port, recvBufSize=DEFAULT_RECV_BUF_SIZE, sockRcvBuf=None):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.sockRcvBuf = sockRcvBuf
+        self.wrapper = None
+        self.transport = None
+        self.frameBuffer = comm.FrameBuffer(recvBufSize)
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        if self.sockRcvBuf:
+            sock = transport.get_extra_info("socket")
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.sockRcvBuf)
+            except OSError:
+                logger.warning("could not set SO_RCVBUF")
+
+    def get_buffer(self, sizehint):
+        return self.frameBuffer.writable()
+
+    def buffer_updated(self, nbytes):
+        self.frameBuffer.written(nbytes)
+        if utils.TRACE:
+            logger.debug("recvd size %d", nbytes)
+        for msg in self.frameBuffer.frames():
+            self.client.processFrame(bytes(msg))
+
+    def connection_lost(self, exc):
+        logger.debug("connection lost %s", exc)
+        self.transport = None
+        self.writable.set()
+        self.client.connectionLost(self)
+
+    def pause_writing(self):
+        self.writable.clear()
+
+    def resume_writing(self):
+        self.writable.set()
+
+    def isConnected(self):
+        return self.transport is not None and not self.transport.is_closing()
+
+    def sendMsg(self, msg, urgent=False):
+        if not self.isConnected():
+            logger.debug("sendMsg attempted while not connected")
+            return 0
+        self.transport.write(msg)
+        return len(msg)
+
+    def flush(self):
+        """The transport does its own buffering"""
+        return 0
+
+    def disconnect(self):
+        if self.transport is not None:
+            logger.debug("disconnecting")
+            self.transport.close()
+
+
+class AsyncEClient(EClient):
+    def __init__(self, wrapper):
+        EClient.__init__(self, wrapper)
+        self.handshake = None
+        self.disconnected = None
+
+    async def connect(self, host, port, clientId):
+        """Same as EClient.connect() but returns, in the running event loop,
+        once the connection is established and the API started."""
+
+        try:
+            self.validateInvalidSymbols(host)
+        except ClientException as ex:
+            self.wrapper.error(NO_VALID_ID, currentTimeMillis(), ex.code, ex.msg + ex.text)
+            return
+
+        try:
+            self.checkConnected()
+        except ClientException as ex:
+            self.wrapper.error(NO_VALID_ID, currentTimeMillis(), ex.code, ex.msg)
+            return
+
+        loop = asyncio.get_running_loop()
+        self.host = host
+        self.port = port
+        self.clientId = clientId
+        self.handshake = loop.create_future()
+        self.disconnected = asyncio.Event()
+        logger.debug("Connecting to %s:%d w/ id:%d", self.host, self.port, self.clientId)
+
+        recvBufSize = self.socketOptions.get("recvBufSize", DEFAULT_RECV_BUF_SIZE)
+        sockRcvBuf = self.socketOptions.get("sockRcvBuf")
+        try:
+            self.setConnState(EClient.CONNECTING)
+            _, self.conn = await loop.create_connection(
+                lambda: AsyncConnection(self, host, port, recvBufSize, sockRcvBuf),
+                host,
+                port,
+            )
+        except OSError:
+            self.wrapper.error(NO_VALID_ID, currentTimeMillis(), CONNECT_FAIL.code(), CONNECT_FAIL.msg())
+            logger.info("could not connect")
+            self.disconnect()
+            return
+
+        self.decoder = self.createDecoder()
+        self.conn.sendMsg(self.makeInitialMsg())
+
+        await self.handshake
+        if not self.isConnected():
+            logger.warning("Disconnected during the handshake")
+            return
+
+        logger.info("sent startApi")
+        self.startApi()
+        self.wrapper.connectAck()
+        if self.conflator is not None:
+            loop.call_later(self.conflator.interval, self.flushConflatedPeriodically)
+
+    def processFrame(self, msg: bytes):
+        """Called by the AsyncConnection for every received msg."""
+
+        if self.connState == EClient.CONNECTING:
+            # sometimes I get news before the server version, those are dropped
+            fields = comm.read_fields(msg)
+            if len(fields) == 2:
+                (server_version, conn_time) = fields
+                logger.debug("ANSWER Version:%s time:%s", server_version, conn_time)
+                self.connTime = conn_time
+                self.serverVersion_ = int(server_version)
+                self.decoder.serverVersion = self.serverVersion()
+                self.setConnState(EClient.CONNECTED)
+                self.handshake.set_result(None)
+            return
+
+        if len(msg) > MAX_MSG_LEN:
+            self.wrapper.error(
+                NO_VALID_ID,
+                currentTimeMillis(),
+                BAD_LENGTH.code(),
+                f"{BAD_LENGTH.msg()}:{len(msg)}:{msg}",
+            )
+            self.disconnect()
+            return
+
+        try:
+            self.dispatchMsg(msg)
+            self.msgLoopRec()
+        except BadMessage:
+            logger.info("BadMessage")
+
+    def flushConflatedPeriodically(self):
+        if self.conflator is not None and self.isConnected():
+            self.conflator.flush()
+            asyncio.get_running_loop().call_later(
+                self.conflator.interval, self.flushConflatedPeriodically
+            )
+
+    def connectionLost(self, conn):
+        if self.handshake is not None and not self.handshake.done():
+            self.handshake.set_result(None)
+        if self.conn is conn:
+            self.disconnect()
+
+    def disconnect(self):
+        EClient.disconnect(self)
+        if self.disconnected is not None:
+            self.disconnected.set()
+
+    async def run(self):
+        """Returns once the connection is closed, from either side."""
+
+        if self.disconnected is not None:
+            await self.disconnected.wait()
+
+    async def drain(self):
+        """Waits until the transport's write buffer is below its high water
+        mark."""
+
+        if self.conn is not None:
+            await self.conn.writable.wait()
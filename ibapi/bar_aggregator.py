@@ -0,0 +1,262 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+The BarAggregator builds bars incrementally out of the reqTickByTickData
+trades (Last/AllLast, or MidPoint) and of the reqRealTimeBars 5 seconds bars,
+as the Decoder gets them. Any number of BarSpecs can be subscribed per reqId:
+time bars of N seconds, volume bars and dollar (notional) bars. A bar carries
+OHLC, volume, VWAP and count and is handed, once complete, to the onBar
+callback and/or to a BarRing, a fixed capacity array backed ring buffer.
+
+    aggregator = BarAggregator(onBar=onBar)
+    ring = aggregator.subscribe(1, BarSpec.time(60), ring=BarRing(390))
+    aggregator.subscribe(1, BarSpec.volume(10000))
+    app.setBarAggregator(aggregator)
+    app.reqTickByTickData(1, contract, "AllLast", 0, False)
+
+The time bars are aligned on the epoch, or on the session start once the
+trading sessions are set from a historicalSchedule answer with setSessions().
+The last bar of a session then ends with the session and the ticks out of the
+sessions are ignored. A bar is complete when the first tick past its end
+comes in, flush() completes the pending bars on demand.
+"""
+
+import bisect
+import datetime
+import math
+from array import array
+
+from ibapi.const import UNSET_DECIMAL
+
+(BAR_TIME, BAR_VOLUME, BAR_DOLLAR) = range(3)
+
+
+class BarSpec:
+    def __init__(self, kind, size):
+        self.kind = kind
+        self.size = size
+
+    @staticmethod
+    def time(seconds):
+        return BarSpec(BAR_TIME, seconds)
+
+    @staticmethod
+    def volume(volume):
+        return BarSpec(BAR_VOLUME, volume)
+
+    @staticmethod
+    def dollar(notional):
+        return BarSpec(BAR_DOLLAR, notional)
+
+    def __eq__(self, other):
+        return isinstance(other, BarSpec) and (self.kind, self.size) == (other.kind, other.size)
+
+    def __hash__(self):
+        return hash((self.kind, self.size))
+
+    def __str__(self):
+        return "%s %s" % (("time", "volume", "dollar")[self.kind], self.size)
+
+
+class Bar:
+    __slots__ = ("time", "endTime", "open", "high", "low", "close", "volume", "notional", "count")
+
+    def __init__(self, time, endTime=None):
+        self.time = time
+        self.endTime = endTime
+        self.open = None
+        self.high = None
+        self.low = None
+        self.close = None
+        self.volume = 0.0
+        self.notional = 0.0
+        self.count = 0
+
+    @property
+    def vwap(self) -> float:
+        return self.notional / self.volume if self.volume else self.close
+
+    def __str__(self):
+        return "Time: %s, Open: %s, High: %s, Low: %s, Close: %s, Volume: %s, VWAP: %s, Count: %s" % (
+            self.time, self.open, self.high, self.low, self.close, self.volume, self.vwap, self.count,
+        )
+
+
+class BarRing:
+    """The last capacity bars, in array columns."""
+
+    COLUMNS = ("time", "open", "high", "low", "close", "volume", "vwap", "count")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.columns = {
+            name: array("q" if name in ("time", "count") else "d", [0]) * capacity
+            for name in self.COLUMNS
+        }
+        self.next = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, bar: Bar):
+        idx = self.next
+        columns = self.columns
+        columns["time"][idx] = bar.time
+        columns["open"][idx] = bar.open
+        columns["high"][idx] = bar.high
+        columns["low"][idx] = bar.low
+        columns["close"][idx] = bar.close
+        columns["volume"][idx] = bar.volume
+        columns["vwap"][idx] = bar.vwap
+        columns["count"][idx] = bar.count
+        self.next = (idx + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def last(self, n=None) -> dict:
+        """{column name: array} of the last n bars (all by default), oldest
+        first"""
+        n = self.size if n is None else min(n, self.size)
+        start = (self.next - n) % self.capacity
+        if start + n <= self.capacity:
+            return {name: column[start : start + n] for name, column in self.columns.items()}
+        wrap = start + n - self.capacity
+        return {name: column[start:] + column[:wrap] for name, column in self.columns.items()}
+
+
+class BarSubscription:
+    def __init__(self, spec, ring=None):
+        self.spec = spec
+        self.ring = ring
+        self.bar = None
+
+
+def parseSessionTime(text, tz) -> int:
+    for fmt in ("%Y%m%d-%H:%M:%S", "%Y%m%d %H:%M:%S", "%Y%m%d-%H:%M", "%Y%m%d %H:%M"):
+        try:
+            value = datetime.datetime.strptime(text, fmt)
+            break
+        except ValueError:
+            pass
+    else:
+        raise ValueError("unsupported session time: %s" % text)
+    return int(value.replace(tzinfo=tz).timestamp())
+
+
+def sessionsFromSchedule(sessions, timeZone) -> list:
+    """[(start, end), ...] in epoch seconds of the HistoricalSessions of a
+    historicalSchedule answer"""
+    from zoneinfo import ZoneInfo
+
+    tz = ZoneInfo(timeZone) if timeZone else datetime.timezone.utc
+    return sorted(
+        (parseSessionTime(session.startDateTime, tz), parseSessionTime(session.endDateTime, tz))
+        for session in sessions
+    )
+
+
+class BarAggregator:
+    def __init__(self, onBar=None):
+        """onBar(reqId, spec, bar) is called for every complete bar"""
+        self.onBar = onBar
+        self.subscriptions = {}  # reqId -> [BarSubscription]
+        self.sessions = {}  # reqId -> [(start, end)]
+
+    def subscribe(self, reqId, spec: BarSpec, ring: BarRing = None) -> BarRing:
+        self.subscriptions.setdefault(reqId, []).append(BarSubscription(spec, ring))
+        return ring
+
+    def unsubscribe(self, reqId):
+        self.subscriptions.pop(reqId, None)
+        self.sessions.pop(reqId, None)
+
+    def setSessions(self, reqId, sessions, timeZone=""):
+        """sessions are the HistoricalSessions of a historicalSchedule answer,
+        or (start, end) epoch seconds"""
+        if sessions and not isinstance(sessions[0], tuple):
+            sessions = sessionsFromSchedule(sessions, timeZone)
+        self.sessions[reqId] = sorted(sessions)
+
+    def sessionOf(self, reqId, time):
+        """(start, end) of the session of time, None if out of the sessions,
+        (0, None) if there are no sessions"""
+        sessions = self.sessions.get(reqId)
+        if not sessions:
+            return (0, None)
+        idx = bisect.bisect_right(sessions, (time, math.inf)) - 1
+        if idx >= 0 and time < sessions[idx][1]:
+            return sessions[idx]
+        return None
+
+    def addTrade(self, reqId, time, price, size):
+        subscriptions = self.subscriptions.get(reqId)
+        if subscriptions is None:
+            return
+        volume = 0.0 if size == UNSET_DECIMAL else float(size)
+        self.add(reqId, subscriptions, time, price, price, price, price, volume, price * volume, 1)
+
+    def addRealTimeBar(self, reqId, time, open_, high, low, close, volume, wap, count):
+        """a 5 seconds bar starting at time"""
+        subscriptions = self.subscriptions.get(reqId)
+        if subscriptions is None:
+            return
+        volume = 0.0 if volume == UNSET_DECIMAL else float(volume)
+        wap = close if wap == UNSET_DECIMAL else float(wap)
+        self.add(reqId, subscriptions, time, open_, high, low, close, volume, wap * volume, count)
+
+    def add(self, reqId, subscriptions, time, open_, high, low, close, volume, notional, count):
+        session = self.sessionOf(reqId, time)
+        if session is None:
+            return
+        sessionStart, sessionEnd = session
+
+        for sub in subscriptions:
+            spec = sub.spec
+            bar = sub.bar
+            if bar is not None and bar.endTime is not None and time >= bar.endTime:
+                self.complete(reqId, sub)
+                bar = None
+
+            if bar is None:
+                if spec.kind == BAR_TIME:
+                    start = sessionStart + (time - sessionStart) // spec.size * spec.size
+                    end = start + spec.size
+                    if sessionEnd is not None and end > sessionEnd:
+                        end = sessionEnd
+                    bar = sub.bar = Bar(start, end)
+                else:
+                    bar = sub.bar = Bar(time, sessionEnd)
+                bar.open = open_
+                bar.high = high
+                bar.low = low
+            else:
+                if high > bar.high:
+                    bar.high = high
+                if low < bar.low:
+                    bar.low = low
+            bar.close = close
+            bar.volume += volume
+            bar.notional += notional
+            bar.count += count
+
+            if spec.kind == BAR_VOLUME and bar.volume >= spec.size:
+                self.complete(reqId, sub)
+            elif spec.kind == BAR_DOLLAR and bar.notional >= spec.size:
+                self.complete(reqId, sub)
+
+    def complete(self, reqId, sub):
+        bar = sub.bar
+        sub.bar = None
+        if sub.ring is not None:
+            sub.ring.append(bar)
+        if self.onBar is not None:
+            self.onBar(reqId, sub.spec, bar)
+
+    def flush(self, reqId=None):
+        """Completes the pending bars, of reqId or of all"""
+        reqIds = list(self.subscriptions) if reqId is None else [reqId]
+        for reqId in reqIds:
+            for sub in self.subscriptions.get(reqId, ()):
+                if sub.bar is not None:
+                    self.complete(reqId, sub)
@@ -11,14 +11,15 @@ The user just needs to override EWrapper methods to receive the answers.
 """
 
 import logging
-import queue
 import socket
 import sys
 
-from ibapi import decoder, reader, comm
+from ibapi import decoder, reader, comm, utils
 from ibapi.comm import make_field, make_field_handle_empty
 from ibapi.common import *  # @UnusedWildImport
 from ibapi.connection import Connection
+from ibapi.msg_queue import MsgQueue
+from ibapi.conflation import ConflatingDispatcher
 from ibapi.const import NO_VALID_ID, MAX_MSG_LEN, UNSET_DOUBLE
 from ibapi.contract import Contract
 from ibapi.errors import (
@@ -283,12 +284,19 @@ from ibapi.protobuf.UpdateConfigRequest_pb2 import UpdateConfigRequest as Update
 
 logger = logging.getLogger(__name__)
 
+# the requests a writer thread sends ahead of the others
+URGENT_MSG_IDS = frozenset(
+    msgId + offset
+    for msgId in (OUT.PLACE_ORDER, OUT.CANCEL_ORDER, OUT.REQ_GLOBAL_CANCEL)
+    for offset in (0, PROTOBUF_MSG_ID)
+)
+
 
 class EClient(object):
     (DISCONNECTED, CONNECTING, CONNECTED) = range(3)
 
     def __init__(self, wrapper):
-        self.msg_queue = queue.Queue()
+        self.msg_queue = MsgQueue()
         self.wrapper = wrapper
         self.decoder = None
         self.nKeybIntHard = 0
@@ -306,6 +314,15 @@ class EClient(object):
         self.decode = None
         self.setConnState(EClient.DISCONNECTED)
         self.connectOptions = None
+        self.socketOptions = {}
+        self.conflationInterval = None
+        self.conflator = None
+        self.tickStore = None
+        self.orderBooks = None
+        self.barAggregator = None
+        self.historicalDataArrays = False
+        self.historicalTicksArrays = False
+        self.contractDetailsCache = None
         self.reset()
 
     def reset(self):
@@ -332,14 +349,16 @@ class EClient(object):
 
     def sendMsgProtoBuf(self, msgId: int, msg: bytes):
         full_msg = comm.make_msg_proto(msgId, msg)
-        logger.info("%s %s %s", "SENDING", current_fn_name(1), full_msg)
-        self.conn.sendMsg(full_msg)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s %s %s", "SENDING", current_fn_name(1), full_msg)
+        self.conn.sendMsg(full_msg, msgId in URGENT_MSG_IDS)
 
     def sendMsg(self, msgId:int, msg: str):
         useRawIntMsgId = self.serverVersion() >= MIN_SERVER_VER_PROTOBUF
         full_msg = comm.make_msg(msgId, useRawIntMsgId, msg)
-        logger.info("%s %s %s", "SENDING", current_fn_name(1), full_msg)
-        self.conn.sendMsg(full_msg)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s %s %s", "SENDING", current_fn_name(1), full_msg)
+        self.conn.sendMsg(full_msg, msgId in URGENT_MSG_IDS)
 
     def logRequest(self, fnName, fnParams):
         log_(fnName, fnParams, "REQUEST")
@@ -471,27 +490,19 @@ class EClient(object):
                 "Connecting to %s:%d w/ id:%d", self.host, self.port, self.clientId
             )
 
-            self.conn = Connection(self.host, self.port)
+            self.conn = Connection(self.host, self.port, **self.socketOptions)
 
             self.conn.connect()
             self.setConnState(EClient.CONNECTING)
 
-            # TODO: support async mode
-
-            v100prefix = "API\0"
-            v100version = "v%d..%d" % (MIN_CLIENT_VER, MAX_CLIENT_VER)
+            # see async_client.AsyncEClient for the asyncio based connection
 
-            if self.connectOptions:
-                v100version = v100version + " " + self.connectOptions
-
-            # v100version = "v%d..%d" % (MIN_CLIENT_VER, 101)
-            msg = comm.make_initial_msg(v100version)
-            logger.debug("msg %s", msg)
-            msg2 = str.encode(v100prefix, "ascii") + msg
+            msg2 = self.makeInitialMsg()
             logger.debug("REQUEST %s", msg2)
             self.conn.sendMsg(msg2)
+            self.conn.flush()
 
-            self.decoder = decoder.Decoder(self.wrapper, self.serverVersion())
+            self.decoder = self.createDecoder()
             fields = []
 
             # sometimes I get news before the server version, thus the loop
@@ -522,10 +533,12 @@ class EClient(object):
 
             self.setConnState(EClient.CONNECTED)
 
+            self.msg_queue.open(self.serverVersion())
             self.reader = reader.EReader(self.conn, self.msg_queue)
             self.reader.start()  # start thread
             logger.info("sent startApi")
             self.startApi()
+            self.conn.flush()
             self.wrapper.connectAck()
         except socket.error:
             if self.wrapper:
@@ -533,12 +546,30 @@ class EClient(object):
             logger.info("could not connect")
             self.disconnect()
 
+    def makeInitialMsg(self) -> bytes:
+        """The API prefix followed by the supported client version range,
+        the first thing sent on a new connection."""
+
+        v100prefix = "API\0"
+        v100version = "v%d..%d" % (MIN_CLIENT_VER, MAX_CLIENT_VER)
+
+        if self.connectOptions:
+            v100version = v100version + " " + self.connectOptions
+
+        # v100version = "v%d..%d" % (MIN_CLIENT_VER, 101)
+        msg = comm.make_initial_msg(v100version)
+        logger.debug("msg %s", msg)
+        return str.encode(v100prefix, "ascii") + msg
+
     def disconnect(self):
         """Call this function to terminate the connections with TWS.
         Calling this function does not cancel orders that have already been
         sent."""
 
         self.setConnState(EClient.DISCONNECTED)
+        self.msg_queue.close()
+        if self.contractDetailsCache is not None:
+            self.contractDetailsCache.flush()
         if self.conn is not None:
             logger.info("disconnecting")
             self.conn.disconnect()
@@ -549,9 +580,10 @@ class EClient(object):
         """Call this function to check if there is a connection with TWS"""
 
         connConnected = self.conn and self.conn.isConnected()
-        logger.debug(
-            f"{id(self)} isConn: {self.connState}, connConnected: {str(connConnected)}"
-        )
+        if utils.TRACE:
+            logger.debug(
+                "%s isConn: %s, connConnected: %s", id(self), self.connState, connConnected
+            )
         return EClient.CONNECTED == self.connState and connConnected
 
     def keyboardInterrupt(self):
@@ -569,6 +601,96 @@ class EClient(object):
     def setOptionalCapabilities(self, optCapab):
         self.optCapab = optCapab
 
+    def setSocketOptions(self, **opts):
+        """Keyword arguments passed on to the Connection created by the next
+        connect(), eg: recvBufSize=1024 * 1024, sockRcvBuf=4 * 1024 * 1024,
+        tcpNoDelay=True, useSelector=False to poll the socket as before,
+        flushWindow=0.001 to write the requests in batches, see flush(),
+        writerThread=True for the requests to be queued and written by a
+        thread of its own, the orders and cancels ahead of the others,
+        rateLimiter=rate_limiter.RateLimiter() to stay within the TWS msg
+        rate limit."""
+        self.socketOptions = opts
+
+    def flush(self):
+        """Writes the requests buffered by the Connection, when created with
+        a flushWindow, eg: after a burst of reqMktData or cancelOrder."""
+        if self.conn is not None:
+            self.conn.flush()
+
+    def setConflation(self, interval):
+        """From the next connect() on, the tick callbacks are conflated and
+        called at most every interval seconds, see conflation.py. None turns
+        it off."""
+        self.conflationInterval = interval
+
+    def flushConflated(self):
+        """Calls the pending conflated tick callbacks now, on the calling
+        thread: only call it from the thread running the message loop."""
+        if self.conflator is not None:
+            self.conflator.flush()
+
+    def setTickStore(self, tickStore):
+        """The top of book ticks are also written into tickStore, see
+        tick_store.TickStore."""
+        self.tickStore = tickStore
+        if self.decoder is not None:
+            self.decoder.tickStore = tickStore
+
+    def setOrderBooks(self, orderBooks):
+        """The market depth updates are also applied to orderBooks, see
+        order_book.OrderBooks."""
+        self.orderBooks = orderBooks
+        if self.decoder is not None:
+            self.decoder.orderBooks = orderBooks
+
+    def setBarAggregator(self, barAggregator):
+        """The tick by tick trades and the real time bars are also fed to
+        barAggregator, see bar_aggregator.BarAggregator."""
+        self.barAggregator = barAggregator
+        if self.decoder is not None:
+            self.decoder.barAggregator = barAggregator
+
+    def setHistoricalDataArrays(self, enabled: bool):
+        """With enabled the historical data bars of a reqHistoricalData
+        answer come all at once to historicalDataArray(), as a
+        history_arrays.HistoricalDataArrays, rather than one by one to
+        historicalData()."""
+        self.historicalDataArrays = enabled
+        if self.decoder is not None:
+            self.decoder.historicalDataArrays = enabled
+
+    def setHistoricalTicksArrays(self, enabled: bool):
+        """With enabled the pages of a reqHistoricalTicks answer come to
+        historicalTicksArray()/historicalTicksBidAskArray()/
+        historicalTicksLastArray() as columns, see history_arrays, rather
+        than as lists of HistoricalTick* objects."""
+        self.historicalTicksArrays = enabled
+        if self.decoder is not None:
+            self.decoder.historicalTicksArrays = enabled
+
+    def setContractDetailsCache(self, contractDetailsCache):
+        """reqContractDetails is answered out of contractDetailsCache when it
+        can, see contract_details_cache.ContractDetailsCache."""
+        self.contractDetailsCache = contractDetailsCache
+        if self.decoder is not None:
+            self.decoder.contractDetailsCache = contractDetailsCache
+
+    def createDecoder(self):
+        target = self.wrapper
+        self.conflator = None
+        if self.conflationInterval is not None:
+            self.conflator = ConflatingDispatcher(self.wrapper, self.conflationInterval)
+            target = self.conflator
+        dec = decoder.Decoder(target, self.serverVersion())
+        dec.tickStore = self.tickStore
+        dec.orderBooks = self.orderBooks
+        dec.barAggregator = self.barAggregator
+        dec.historicalDataArrays = self.historicalDataArrays
+        dec.historicalTicksArrays = self.historicalTicksArrays
+        dec.contractDetailsCache = self.contractDetailsCache
+        return dec
+
     def msgLoopTmo(self):
         # intended to be overloaded
         pass
@@ -580,11 +702,25 @@ class EClient(object):
     def run(self):
         """This is the function that has the message loop."""
 
+        timeout = 0.2
+        if self.conflator is not None:
+            timeout = min(timeout, self.conflator.interval)
+
         try:
             while self.isConnected() or not self.msg_queue.empty():
+                batch = []
                 try:
+                    batch = self.msg_queue.getBatch(timeout=timeout)
+                    if not batch:
+                        logger.debug("queue.get: empty")
+                        self.msgLoopTmo()
+                except (KeyboardInterrupt, SystemExit):
+                    logger.info("detected KeyboardInterrupt, SystemExit")
+                    self.keyboardInterrupt()
+                    self.keyboardInterruptHard()
+
+                for text in batch:
                     try:
-                        text = self.msg_queue.get(block=True, timeout=0.2)
                         if len(text) > MAX_MSG_LEN:
                             self.wrapper.error(
                                 NO_VALID_ID,
@@ -592,44 +728,50 @@ class EClient(object):
                                 BAD_LENGTH.code(),
                                 f"{BAD_LENGTH.msg()}:{len(text)}:{text}",
                             )
-                            break
-                    except queue.Empty:
-                        logger.debug("queue.get: empty")
-                        self.msgLoopTmo()
-                    else:
-
-                        if self.serverVersion() >= MIN_SERVER_VER_PROTOBUF:
-                            sMsgId = text[:4]
-                            msgId = int.from_bytes(sMsgId, 'big')  
-                            text = text[4:]
-                        else:
-                            sMsgId = text[:text.index(b"\0")]
-                            text = text[text.index(b"\0") + len(b"\0"):]
-                            msgId = int(sMsgId)
-
-                        if msgId > PROTOBUF_MSG_ID:
-                            msgId -= PROTOBUF_MSG_ID
-                            logger.debug("msgId: %d, protobuf: %s", msgId, text)
-                            self.decoder.processProtoBuf(text, msgId)
-                        else:
-                            fields = comm.read_fields(text)
-                            logger.debug("msgId: %d, fields: %s", msgId, fields)
-                            self.decoder.interpret(fields, msgId)
+                            return
 
+                        self.dispatchMsg(text)
                         self.msgLoopRec()
-                except (KeyboardInterrupt, SystemExit):
-                    logger.info("detected KeyboardInterrupt, SystemExit")
-                    self.keyboardInterrupt()
-                    self.keyboardInterruptHard()
-                except BadMessage:
-                    logger.info("BadMessage")
-
-                logger.debug(
-                    "conn:%d queue.sz:%d", self.isConnected(), self.msg_queue.qsize()
-                )
+                    except (KeyboardInterrupt, SystemExit):
+                        logger.info("detected KeyboardInterrupt, SystemExit")
+                        self.keyboardInterrupt()
+                        self.keyboardInterruptHard()
+                    except BadMessage:
+                        logger.info("BadMessage")
+
+                if self.conflator is not None:
+                    self.conflator.poll()
+
+                if utils.TRACE:
+                    logger.debug(
+                        "conn:%d batch.sz:%d", self.isConnected(), len(batch)
+                    )
         finally:
             self.disconnect()
 
+    def dispatchMsg(self, text: bytes):
+        """Splits off the msgId and hands the payload to the decoder."""
+
+        if self.serverVersion() >= MIN_SERVER_VER_PROTOBUF:
+            sMsgId = text[:4]
+            msgId = int.from_bytes(sMsgId, 'big')
+            text = text[4:]
+        else:
+            sMsgId = text[:text.index(b"\0")]
+            text = text[text.index(b"\0") + len(b"\0"):]
+            msgId = int(sMsgId)
+
+        if msgId > PROTOBUF_MSG_ID:
+            msgId -= PROTOBUF_MSG_ID
+            if utils.TRACE:
+                logger.debug("msgId: %d, protobuf: %s", msgId, text)
+            self.decoder.processProtoBuf(text, msgId)
+        else:
+            fields = comm.read_fields(text)
+            if utils.TRACE:
+                logger.debug("msgId: %d, fields: %s", msgId, fields)
+            self.decoder.interpret(fields, msgId)
+
     def reqCurrentTime(self):
         """Asks the current system time on the server side."""
 
@@ -4147,6 +4289,18 @@ class EClient(object):
         contract:Contract - The summary description of the contract being looked
             up."""
 
+        if self.contractDetailsCache is not None:
+            cached = self.contractDetailsCache.lookup(contract)
+            if cached is not None:
+                for contractDetails, isBond in cached:
+                    if isBond:
+                        self.wrapper.bondContractDetails(reqId, contractDetails)
+                    else:
+                        self.wrapper.contractDetails(reqId, contractDetails)
+                self.wrapper.contractDetailsEnd(reqId)
+                return
+            self.contractDetailsCache.start(reqId, contract)
+
         if (self.useProtoBuf(OUT.REQ_CONTRACT_DATA)):
             contractDataRequestProto = createContractDataRequestProto(reqId, contract)
             self.reqContractDataProtoBuf(contractDataRequestProto)
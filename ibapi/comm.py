@@ -10,6 +10,7 @@ import logging
 import sys
 
 from ibapi.const import UNSET_INTEGER, UNSET_DOUBLE, DOUBLE_INFINITY, INFINITY_STR
+from ibapi import utils
 from ibapi.utils import ClientException
 from ibapi.utils import isAsciiPrintable
 from ibapi.errors import INVALID_SYMBOL
@@ -80,7 +81,8 @@ def read_msg(buf: bytes) -> tuple:
     if len(buf) < 4:
         return (0, "", buf)
     size = struct.unpack("!I", buf[0:4])[0]
-    logger.debug("read_msg: size: %d", size)
+    if utils.TRACE:
+        logger.debug("read_msg: size: %d", size)
     if len(buf) - 4 >= size:
         text = struct.unpack("!%ds" % size, buf[4 : 4 + size])[0]
         return (size, text, buf[4 + size :])
@@ -88,6 +90,74 @@ def read_msg(buf: bytes) -> tuple:
         return (size, "", buf)
 
 
+class FrameBuffer:
+    """Receive buffer for the size prefixed wire framing.
+
+    The socket is read straight into a preallocated bytearray (see
+    writable()/written()) and complete frames are handed out as memoryview
+    slices by moving a read offset, so the unread tail is never re-sliced
+    per frame the way read_msg() does it. A handed out view is only valid
+    until the next call to writable(): the unread bytes may be moved to the
+    front of the buffer at that point to make room."""
+
+    def __init__(self, size: int = 64 * 1024):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.readPos = 0
+        self.writePos = 0
+
+    def __len__(self):
+        return self.writePos - self.readPos
+
+    def writable(self) -> memoryview:
+        """returns the free region of the buffer to receive into"""
+        if self.readPos == self.writePos:
+            self.readPos = self.writePos = 0
+        elif len(self.buf) - self.writePos < len(self.buf) // 4:
+            pending = self.writePos - self.readPos
+            if pending * 2 > len(self.buf):
+                # mostly one incomplete frame: grow, the data is copied once
+                buf = bytearray(len(self.buf) * 2)
+                buf[:pending] = self.view[self.readPos : self.writePos]
+                self.buf = buf
+                self.view = memoryview(buf)
+            else:
+                self.view[:pending] = self.view[self.readPos : self.writePos]
+            self.readPos = 0
+            self.writePos = pending
+        return self.view[self.writePos :]
+
+    def written(self, nBytes: int):
+        """marks nBytes of the writable() region as received"""
+        self.writePos += nBytes
+
+    def write(self, data: bytes):
+        while data:
+            dest = self.writable()
+            n = min(len(dest), len(data))
+            dest[:n] = data[:n]
+            self.written(n)
+            data = data[n:]
+
+    def nextFrame(self):
+        """returns the next complete msg payload or None if more bytes are needed"""
+        pending = self.writePos - self.readPos
+        if pending < 4:
+            return None
+        (size,) = struct.unpack_from("!I", self.buf, self.readPos)
+        if pending - 4 < size:
+            return None
+        start = self.readPos + 4
+        self.readPos = start + size
+        return self.view[start : self.readPos]
+
+    def frames(self):
+        frame = self.nextFrame()
+        while frame is not None:
+            yield frame
+            frame = self.nextFrame()
+
+
 def read_fields(buf: bytes) -> tuple:
     if isinstance(buf, str):
         buf = buf.encode()
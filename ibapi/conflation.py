@@ -0,0 +1,111 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+The ConflatingDispatcher sits between the Decoder and the EWrapper. The top of
+book tick callbacks are not called right away: only the latest one per
+(reqId, tickType) is kept and they are all called on flush(), at most every
+interval seconds. Every other callback (orders, executions, errors...) goes
+straight to the wrapper. With thousands of reqMktData lines this bounds the
+rate of tick callbacks whatever the burst, the wrapper still ends up with the
+latest state of each tick.
+
+It is enabled on the EClient, before connecting:
+
+    app.setConflation(0.1)
+
+flush() calls the wrapper from the thread calling it: it is meant for the
+message loop thread, which calls all the other callbacks, else the tick
+callbacks run concurrently with them.
+"""
+
+import threading
+import time
+
+# the conflated callbacks, all of them (reqId, tickType, ...)
+CONFLATED_CALLBACKS = (
+    "tickPrice",
+    "tickSize",
+    "tickGeneric",
+    "tickString",
+    "tickOptionComputation",
+)
+
+# the protobuf callbacks, conflated by (proto.reqId, proto.tickType)
+CONFLATED_PROTOBUF_CALLBACKS = (
+    "tickPriceProtoBuf",
+    "tickSizeProtoBuf",
+    "tickGenericProtoBuf",
+    "tickStringProtoBuf",
+    "tickOptionComputationProtoBuf",
+)
+
+
+class ConflatingDispatcher:
+    def __init__(self, wrapper, interval=0.1):
+        self.wrapper = wrapper
+        self.interval = interval
+        self.nextFlush = time.monotonic() + interval
+        # (reqId, tickType, callback name) -> (callback, args)
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.nConflated = 0
+
+        for name in CONFLATED_CALLBACKS:
+            setattr(self, name, self.makeConflated(name))
+        for name in CONFLATED_PROTOBUF_CALLBACKS:
+            setattr(self, name, self.makeConflatedProtoBuf(name))
+
+    def __getattr__(self, name):
+        # everything not conflated is passed through
+        return getattr(self.wrapper, name)
+
+    def makeConflated(self, name):
+        callback = getattr(self.wrapper, name)
+        lock = self.lock
+
+        def conflated(reqId, tickType, *args):
+            key = (reqId, tickType, name)
+            with lock:
+                pending = self.pending
+                if key in pending:
+                    self.nConflated += 1
+                pending[key] = (callback, (reqId, tickType) + args)
+
+        return conflated
+
+    def makeConflatedProtoBuf(self, name):
+        callback = getattr(self.wrapper, name)
+        lock = self.lock
+
+        def conflated(proto):
+            key = (proto.reqId, proto.tickType, name)
+            with lock:
+                pending = self.pending
+                if key in pending:
+                    self.nConflated += 1
+                pending[key] = (callback, (proto,))
+
+        return conflated
+
+    def tickSnapshotEnd(self, reqId):
+        # the snapshot ticks have to be in before its end
+        self.flush()
+        self.wrapper.tickSnapshotEnd(reqId)
+
+    def flush(self):
+        """Calls the pending tick callbacks, in the order their
+        (reqId, tickType) first came in. To be called from the message loop
+        thread only, the callbacks run on the calling thread."""
+        self.nextFlush = time.monotonic() + self.interval
+        if not self.pending:
+            return
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for callback, args in pending.values():
+            callback(*args)
+
+    def poll(self):
+        """Flushes if the interval is over, called by the message loop."""
+        if self.pending and time.monotonic() >= self.nextFlush:
+            self.flush()
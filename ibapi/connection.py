@@ -8,27 +8,97 @@ Just a thin wrapper around a socket.
 It allows us to keep some other info along with it.
 """
 
+import collections
+import selectors
 import socket
 import threading
 import logging
 import sys
+import time
 from ibapi.errors import FAIL_CREATE_SOCK
 from ibapi.errors import CONNECT_FAIL
 from ibapi.const import NO_VALID_ID
+from ibapi import utils
+from ibapi.rate_limiter import DATA, ORDERS
 from ibapi.utils import currentTimeMillis
 
 # TODO: support SSL !!
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_RECV_BUF_SIZE = 256 * 1024
+DEFAULT_MAX_BUFFERED_BYTES = 64 * 1024
+
+DEFAULT_WRITE_TIMEOUT = 5.0
+
+# most systems take at most 1024 buffers per sendmsg
+IOV_MAX = 1024
+
+# how long disconnect() waits for a write in progress before shutting the
+# socket down underneath it
+DISCONNECT_LOCK_TIMEOUT = 0.5
+
 
 class Connection:
-    def __init__(self, host, port):
+    def __init__(
+        self,
+        host,
+        port,
+        recvBufSize=DEFAULT_RECV_BUF_SIZE,
+        sockRcvBuf=None,
+        tcpNoDelay=True,
+        useSelector=True,
+        flushWindow=None,
+        maxBufferedBytes=DEFAULT_MAX_BUFFERED_BYTES,
+        writerThread=False,
+        rateLimiter=None,
+        writeTimeout=DEFAULT_WRITE_TIMEOUT,
+    ):
+        """recvBufSize - max bytes taken from the kernel per receive call
+        sockRcvBuf - SO_RCVBUF to request, None keeps the OS default (and
+            with it the kernel's buffer auto tuning)
+        tcpNoDelay - disable Nagle so small requests are sent right away
+        useSelector - wait for incoming data with a selector instead of
+            polling the socket with a 1s timeout
+        flushWindow - None writes every msg to the socket right away, else
+            the msgs are buffered and written together by flush(): 0 leaves
+            it to the caller, a number of seconds flushes at most that long
+            after the first buffered msg
+        maxBufferedBytes - the buffered msgs are flushed once they are that
+            large
+        writerThread - a thread of its own writes the msgs: sendMsg only
+            queues them and returns, the urgent ones ahead of the others.
+            The msgs of a lane keep their order, flushWindow is not used
+        rateLimiter - a rate_limiter.RateLimiter pacing the msgs
+        writeTimeout - a write which makes no progress for that many
+            seconds, the peer not reading, fails with a socket.error"""
         self.host = host
         self.port = port
+        self.recvBufSize = recvBufSize
+        self.sockRcvBuf = sockRcvBuf
+        self.tcpNoDelay = tcpNoDelay
+        self.useSelector = useSelector
         self.socket = None
         self.wrapper = None
         self.lock = threading.Lock()
+        self.selector = None
+        self.selectorLock = threading.Lock()
+        self.wakeupRecv = None
+        self.wakeupSend = None
+        # a reader is blocked in select()
+        self.selecting = False
+        self.flushWindow = flushWindow
+        self.maxBufferedBytes = maxBufferedBytes
+        self.writeBuffer = []
+        self.nBufferedBytes = 0
+        self.flushTimer = None
+        self.writerThread = writerThread
+        self.writer = None
+        self.urgentLane = collections.deque()
+        self.bulkLane = collections.deque()
+        self.writeReady = threading.Event()
+        self.rateLimiter = rateLimiter
+        self.writeTimeout = writeTimeout
 
     def connect(self):
         try:
@@ -40,6 +110,16 @@ class Connection:
                     NO_VALID_ID, currentTimeMillis(), FAIL_CREATE_SOCK.code(), FAIL_CREATE_SOCK.msg()
                 )
 
+        try:
+            # SO_RCVBUF has to be set before connecting to affect the
+            # advertised TCP window
+            if self.sockRcvBuf:
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.sockRcvBuf)
+            if self.tcpNoDelay:
+                self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except socket.error:
+            logger.warning("could not set socket options %s", sys.exc_info())
+
         try:
             self.socket.connect((self.host, self.port))
         except socket.error:
@@ -48,50 +128,285 @@ class Connection:
 
         self.socket.settimeout(1)  # non-blocking
 
+        if self.useSelector:
+            self.openSelector()
+
+        if self.writerThread and self.isConnected():
+            self.startWriter()
+
+    def openSelector(self):
+        # disconnect() writes to the wakeup pair so that a reader
+        # blocked in select() notices it without any polling
+        self.wakeupRecv, self.wakeupSend = socket.socketpair()
+        self.wakeupRecv.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.socket, selectors.EVENT_READ)
+        self.selector.register(self.wakeupRecv, selectors.EVENT_READ)
+
+    def startWriter(self):
+        self.writer = threading.Thread(target=self._writeLoop, name="ibapi-writer", daemon=True)
+        self.writer.start()
+
     def disconnect(self):
-        self.lock.acquire()
+        if not self.lock.acquire(timeout=DISCONNECT_LOCK_TIMEOUT):
+            # a write is stuck on a peer which does not read, make it fail
+            sock = self.socket
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            self.lock.acquire()
         try:
             if self.socket is not None:
                 logger.debug("disconnecting")
+                self._flushBeforeClose()
                 self.socket.close()
                 self.socket = None
+                # the writer thread sees it is disconnected and ends
+                self.writeReady.set()
+                if self.wakeupSend is not None:
+                    try:
+                        self.wakeupSend.send(b"\0")
+                    except socket.error:
+                        pass
+                if not self.selecting:
+                    # else the reader releases it as it wakes up
+                    self._closeSelector()
                 logger.debug("disconnected")
                 if self.wrapper:
                     self.wrapper.connectionClosed()
         finally:
             self.lock.release()
 
+    def _flushBeforeClose(self):
+        """Best effort write of the msgs still buffered or queued, without
+        blocking and within the rate limit, the others are dropped. Called
+        with the lock held."""
+        if self.flushTimer is not None:
+            self.flushTimer.cancel()
+            self.flushTimer = None
+        frames, self.writeBuffer = self.writeBuffer, []
+        self.nBufferedBytes = 0
+        queued, nUrgent = self._takeQueued(None)
+        if self.rateLimiter is not None:
+            for idx in range(len(queued)):
+                if self.rateLimiter.take(ORDERS if idx < nUrgent else DATA) > 0:
+                    logger.info("dropping %d queued msgs over the rate limit on disconnect", len(queued) - idx)
+                    queued = queued[:idx]
+                    break
+            self.rateLimiter.clearQueued()
+        frames += queued
+        if not frames:
+            return
+        nBytes = sum(len(frame) for frame in frames)
+        try:
+            self.socket.setblocking(False)
+            if hasattr(self.socket, "sendmsg"):
+                nSent = self.socket.sendmsg(frames[:IOV_MAX])
+            else:
+                nSent = self.socket.send(b"".join(frames))
+        except OSError:
+            nSent = 0
+        if nSent < nBytes:
+            logger.info("could not write %d of %d bytes before disconnecting", nBytes - nSent, nBytes)
+
     def isConnected(self):
         return self.socket is not None
 
-    def sendMsg(self, msg):
-        logger.debug("acquiring lock")
+    def sendMsg(self, msg, urgent=False):
+        if self.writer is not None:
+            # no lock, the writer thread owns the socket
+            if not self.isConnected():
+                logger.debug("sendMsg attempted while not connected")
+                return 0
+            if self.rateLimiter is not None:
+                self.rateLimiter.queued(ORDERS if urgent else DATA)
+            (self.urgentLane if urgent else self.bulkLane).append(msg)
+            self.writeReady.set()
+            return len(msg)
+
+        if self.rateLimiter is not None:
+            self.rateLimiter.acquire(ORDERS if urgent else DATA)
+
+        trace = utils.TRACE
+        if trace:
+            logger.debug("acquiring lock")
         self.lock.acquire()
-        logger.debug("acquired lock")
+        if trace:
+            logger.debug("acquired lock")
         if not self.isConnected():
             logger.debug("sendMsg attempted while not connected, releasing lock")
             self.lock.release()
             return 0
         try:
-            nSent = self.socket.send(msg)
+            if self.flushWindow is None:
+                self.socket.sendall(msg)
+            else:
+                self.writeBuffer.append(msg)
+                self.nBufferedBytes += len(msg)
+                if self.nBufferedBytes >= self.maxBufferedBytes:
+                    self._writeBuffered()
+                elif self.flushWindow > 0 and self.flushTimer is None:
+                    self.flushTimer = threading.Timer(self.flushWindow, self._flushTimeout)
+                    self.flushTimer.daemon = True
+                    self.flushTimer.start()
         except socket.error:
             logger.debug("exception from sendMsg %s", sys.exc_info())
             raise
         finally:
-            logger.debug("releasing lock")
+            if trace:
+                logger.debug("releasing lock")
             self.lock.release()
-            logger.debug("release lock")
+            if trace:
+                logger.debug("release lock")
+
+        if trace:
+            logger.debug("sendMsg: sent: %d", len(msg))
+
+        return len(msg)
+
+    def flush(self):
+        """Writes the buffered msgs, returns the number of bytes written"""
+        if self.writer is not None:
+            self.writeReady.set()
+            return 0
+        with self.lock:
+            if not self.isConnected():
+                return 0
+            return self._writeBuffered()
 
-        logger.debug("sendMsg: sent: %d", nSent)
+    def _flushTimeout(self):
+        try:
+            self.flush()
+        except socket.error:
+            logger.debug("socket broken while flushing, disconnecting")
+            self.disconnect()
+
+    def _writeBuffered(self) -> int:
+        """Called with the lock held"""
+        if self.flushTimer is not None:
+            self.flushTimer.cancel()
+            self.flushTimer = None
+        frames, self.writeBuffer = self.writeBuffer, []
+        self.nBufferedBytes = 0
+        return self._writeFrames(frames)
+
+    def _writeFrames(self, frames) -> int:
+        """Writes frames with as few syscalls as the socket allows. Called
+        with the lock held."""
+        if not frames:
+            return 0
+        nBytes = sum(len(frame) for frame in frames)
+        if not hasattr(self.socket, "sendmsg"):
+            self.socket.sendall(b"".join(frames))
+            return nBytes
 
-        return nSent
+        # sendmsg may write only part of the frames, or of a frame
+        start = 0
+        deadline = time.monotonic() + self.writeTimeout
+        while start < len(frames):
+            try:
+                nSent = self.socket.sendmsg(frames[start : start + IOV_MAX])
+            except socket.timeout:
+                # the peer is not reading, nothing was written; each attempt
+                # blocks for the socket timeout
+                if time.monotonic() >= deadline:
+                    raise socket.timeout("no progress writing to the socket for %ss" % self.writeTimeout)
+                continue
+            deadline = time.monotonic() + self.writeTimeout
+            while start < len(frames) and nSent >= len(frames[start]):
+                nSent -= len(frames[start])
+                start += 1
+            if nSent:
+                frames[start] = memoryview(frames[start])[nSent:]
+        if utils.TRACE:
+            logger.debug("wrote %d msgs, %d bytes", len(frames), nBytes)
+        return nBytes
+
+    def _takeQueued(self, maxBytes) -> tuple:
+        """All the urgent msgs queued, then the others up to maxBytes, and
+        the number of urgent ones"""
+        frames = []
+        try:
+            while True:
+                frames.append(self.urgentLane.popleft())
+        except IndexError:
+            pass
+        nUrgent = len(frames)
+        nBytes = 0
+        try:
+            while maxBytes is None or nBytes < maxBytes:
+                frame = self.bulkLane.popleft()
+                frames.append(frame)
+                nBytes += len(frame)
+        except IndexError:
+            pass
+        return frames, nUrgent
+
+    def _writeLoop(self):
+        while self.isConnected():
+            self.writeReady.wait()
+            self.writeReady.clear()
+            while True:
+                # the bulk msgs go in slices, an urgent one waits for one
+                # slice at most
+                frames, nUrgent = self._takeQueued(self.maxBufferedBytes)
+                if not frames:
+                    break
+                wait = self._writeQueued(frames, nUrgent)
+                if wait is None:
+                    return
+                if wait > 0:
+                    # woken up early by a new msg, which may be urgent
+                    self.writeReady.wait(wait)
+                    self.writeReady.clear()
+
+    def _writeQueued(self, frames, nUrgent):
+        """Writes the frames the rate limiter lets through, the others go
+        back to their lanes. Returns 0 if some were written, else how long
+        until the next one may go, or None once disconnected."""
+        wait = 0.0
+        if self.rateLimiter is not None:
+            # each lane takes the tokens of its own category: urgent msgs
+            # held back by the orders budget do not hold the bulk ones
+            allowed = []
+            waits = []
+            for lane, category, laneFrames in (
+                (self.urgentLane, ORDERS, frames[:nUrgent]),
+                (self.bulkLane, DATA, frames[nUrgent:]),
+            ):
+                for idx, frame in enumerate(laneFrames):
+                    laneWait = self.rateLimiter.take(category)
+                    if laneWait > 0:
+                        lane.extendleft(reversed(laneFrames[idx:]))
+                        waits.append(laneWait)
+                        break
+                    allowed.append(frame)
+            if waits and not allowed:
+                wait = min(waits)
+            frames = allowed
+        with self.lock:
+            if not self.isConnected():
+                return None
+            try:
+                self._writeFrames(frames)
+                return wait
+            except socket.error:
+                pass
+        logger.debug("socket broken while writing, disconnecting")
+        self.disconnect()
+        return None
 
     def recvMsg(self):
         if not self.isConnected():
             logger.debug("recvMsg attempted while not connected, releasing lock")
             return b""
         try:
-            buf = self._recvAllMsg()
+            if self.useSelector:
+                buf = self._recvReadyMsg()
+            else:
+                buf = self._recvAllMsg()
             # receiving 0 bytes outside a timeout means the connection is either
             # closed or broken
             if len(buf) == 0:
@@ -104,13 +419,75 @@ class Connection:
             logger.debug("socket broken, disconnecting")
             self.disconnect()
             buf = b""
-        except OSError:
+        except (OSError, AttributeError):
             # Thrown if the socket was closed (ex: disconnected at end of script)
             # while waiting for self.socket.recv() to timeout.
             logger.debug("Socket is broken or closed.")
+            buf = b""
 
         return buf
 
+    def _waitReadable(self) -> bool:
+        """Blocks until the socket has data (or EOF) to read. Returns False
+        if woken up by disconnect() instead, the selector is released then."""
+        selector = self.selector
+        if selector is None:
+            return False
+        self.selecting = True
+        try:
+            events = selector.select()
+        except (OSError, ValueError, AttributeError):
+            # selector closed underneath us
+            events = []
+        finally:
+            self.selecting = False
+        if self.isConnected() and any(key.fileobj is not self.wakeupRecv for key, _ in events):
+            return True
+        if not self.isConnected():
+            self._closeSelector()
+        return False
+
+    def _closeSelector(self):
+        with self.selectorLock:
+            selector, self.selector = self.selector, None
+            if selector is not None:
+                selector.close()
+                self.wakeupRecv.close()
+                self.wakeupSend.close()
+
+    def _recvReadyMsg(self):
+        if not self._waitReadable():
+            raise socket.timeout()
+        return self.socket.recv(self.recvBufSize)
+
+    def recvInto(self, view) -> int:
+        """Receives straight into the given buffer, returns the number of
+        bytes received or 0 on timeout or once disconnected."""
+        if not self.isConnected():
+            logger.debug("recvInto attempted while not connected")
+            self._closeSelector()
+            return 0
+        try:
+            if self.useSelector and not self._waitReadable():
+                return 0
+            nRecv = self.socket.recv_into(view, min(len(view), self.recvBufSize))
+            # receiving 0 bytes outside a timeout means the connection is either
+            # closed or broken
+            if nRecv == 0:
+                logger.debug("socket either closed or broken, disconnecting")
+                self.disconnect()
+        except socket.timeout:
+            nRecv = 0
+        except socket.error:
+            logger.debug("socket broken, disconnecting")
+            self.disconnect()
+            nRecv = 0
+        except AttributeError:
+            # socket was set to None by a concurrent disconnect()
+            nRecv = 0
+
+        return nRecv
+
     def _recvAllMsg(self):
         cont = True
         allbuf = b""
@@ -118,7 +495,8 @@ class Connection:
         while cont and self.isConnected():
             buf = self.socket.recv(4096)
             allbuf += buf
-            logger.debug("len %d raw:%s|", len(buf), buf)
+            if utils.TRACE:
+                logger.debug("len %d raw:%s|", len(buf), buf)
 
             if len(buf) < 4096:
                 cont = False
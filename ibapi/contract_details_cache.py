@@ -0,0 +1,199 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+The ContractDetailsCache keeps the reqContractDetails answers for ttl seconds,
+by conId and by the fields of the requested contract. Once set on the client
+a request the cache can answer is not sent: the cached details are handed to
+contractDetails/bondContractDetails and contractDetailsEnd right away, from
+the thread calling reqContractDetails. The other requests are sent as usual
+and their answers cached as the Decoder gets them.
+
+    cache = ContractDetailsCache(ttl=86400, path="~/.ibapi/contract_details")
+    app.setContractDetailsCache(cache)
+    app.reqContractDetails(1, contract)
+
+With a path the cache is saved there, as a pickle, and loaded back at start
+up. The answers are saved by a timer thread, saveDelay seconds after the first
+one not saved yet, and by flush(), which EClient.disconnect() calls. The callbacks get copies of the cached details, a
+wrapper is free to change them.
+"""
+
+import copy
+import logging
+import os
+import pickle
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def contractKey(contract) -> tuple:
+    """The fields of a contract which select what reqContractDetails
+    returns, other than conId."""
+    return (
+        contract.symbol,
+        contract.secType,
+        contract.exchange,
+        contract.primaryExchange,
+        contract.currency,
+        contract.lastTradeDateOrContractMonth,
+        contract.strike,
+        contract.right,
+        contract.multiplier,
+        contract.tradingClass,
+        contract.localSymbol,
+        contract.secIdType,
+        contract.secId,
+        contract.includeExpired,
+    )
+
+
+class ContractDetailsCache:
+    def __init__(self, ttl=86400.0, path=None, saveDelay=5.0):
+        self.ttl = ttl
+        self.path = os.path.expanduser(path) if path else None
+        self.saveDelay = saveDelay
+        self.lock = threading.Lock()
+        self.dirty = False  # answers not saved yet
+        self.saveTimer = None
+        self.byConId = {}  # conId -> (expiry, ContractDetails, isBond)
+        self.byKey = {}  # contractKey -> (expiry, [conId])
+        self.pending = {}  # reqId -> (contract, [(ContractDetails, isBond)])
+        self.nHits = 0
+        self.nMisses = 0
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    def __len__(self):
+        return len(self.byConId)
+
+    def lookup(self, contract) -> list:
+        """[(ContractDetails, isBond), ...] copies of the cached answer for
+        contract, None if not cached or expired"""
+        now = time.time()
+        with self.lock:
+            if contract.conId:
+                conIds = [contract.conId]
+            else:
+                entry = self.byKey.get(contractKey(contract))
+                if entry is None or entry[0] <= now:
+                    self.nMisses += 1
+                    return None
+                conIds = entry[1]
+            result = []
+            for conId in conIds:
+                entry = self.byConId.get(conId)
+                if entry is None or entry[0] <= now:
+                    self.nMisses += 1
+                    return None
+                result.append((entry[1], entry[2]))
+            self.nHits += 1
+        return copy.deepcopy(result)
+
+    def get(self, conId):
+        """Copy of the cached ContractDetails of conId, None if not cached"""
+        with self.lock:
+            entry = self.byConId.get(conId)
+            if entry is None or entry[0] <= time.time():
+                return None
+            return copy.deepcopy(entry[1])
+
+    def start(self, reqId, contract):
+        """Called for a reqContractDetails the cache could not answer"""
+        with self.lock:
+            self.pending[reqId] = (copy.copy(contract), [])
+
+    def add(self, reqId, contractDetails, isBond=False):
+        """Called by the Decoder before the details go to the wrapper"""
+        with self.lock:
+            pending = self.pending.get(reqId)
+            if pending is not None:
+                pending[1].append((copy.deepcopy(contractDetails), isBond))
+
+    def end(self, reqId):
+        with self.lock:
+            pending = self.pending.pop(reqId, None)
+            if pending is None:
+                return
+            contract, answer = pending
+            expiry = time.time() + self.ttl
+            conIds = []
+            for contractDetails, isBond in answer:
+                conId = contractDetails.contract.conId
+                self.byConId[conId] = (expiry, contractDetails, isBond)
+                conIds.append(conId)
+            if not contract.conId:
+                self.byKey[contractKey(contract)] = (expiry, conIds)
+            if self.path:
+                # off the decoder thread, and once for a burst of answers
+                self.dirty = True
+                if self.saveTimer is None:
+                    self.saveTimer = threading.Timer(self.saveDelay, self.flush)
+                    self.saveTimer.daemon = True
+                    self.saveTimer.start()
+
+    def flush(self):
+        """Saves the answers not saved yet"""
+        with self.lock:
+            if self.saveTimer is not None:
+                self.saveTimer.cancel()
+                self.saveTimer = None
+            dirty, self.dirty = self.dirty, False
+        if dirty:
+            self.save()
+
+    def discard(self, reqId):
+        """Forgets a request which failed, its answer is not cached"""
+        with self.lock:
+            self.pending.pop(reqId, None)
+
+    def invalidate(self, conId=None):
+        """Drops the details of conId, or all of them"""
+        with self.lock:
+            if conId is None:
+                self.byConId.clear()
+                self.byKey.clear()
+            else:
+                self.byConId.pop(conId, None)
+                for key, (_, conIds) in list(self.byKey.items()):
+                    if conId in conIds:
+                        del self.byKey[key]
+
+    def expire(self):
+        """Drops the expired entries"""
+        now = time.time()
+        with self.lock:
+            for conId, entry in list(self.byConId.items()):
+                if entry[0] <= now:
+                    del self.byConId[conId]
+            for key, entry in list(self.byKey.items()):
+                if entry[0] <= now:
+                    del self.byKey[key]
+
+    def save(self, path=None):
+        path = path or self.path
+        self.expire()
+        with self.lock:
+            state = {"byConId": dict(self.byConId), "byKey": dict(self.byKey)}
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("could not save the contract details to %s: %s", path, exc)
+
+    def load(self, path=None):
+        path = path or self.path
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as exc:
+            logger.warning("could not load the contract details from %s: %s", path, exc)
+            return
+        with self.lock:
+            self.byConId.update(state.get("byConId", {}))
+            self.byKey.update(state.get("byKey", {}))
+        self.expire()
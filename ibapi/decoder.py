@@ -18,6 +18,7 @@ from ibapi.wrapper import *  # @UnusedWildImport
 from ibapi.contract import ContractDescription
 from ibapi.server_versions import *  # @UnusedWildImport
 from ibapi.utils import *  # @UnusedWildImport
+from ibapi import utils
 from ibapi.softdollartier import SoftDollarTier
 from ibapi.ticktype import *  # @UnusedWildImport
 from ibapi.tag_value import TagValue
@@ -28,6 +29,18 @@ from ibapi.orderdecoder import OrderDecoder
 from ibapi.contract import FundDistributionPolicyIndicator
 from ibapi.contract import FundAssetType
 from ibapi.ineligibility_reason import IneligibilityReason
+from ibapi.order_book import MKT_DEPTH_RESET
+from ibapi.history_arrays import (
+    StringTable,
+    readHistoricalDataArrays,
+    historicalDataArraysFromProto,
+    readHistoricalTicksArrays,
+    readHistoricalTicksBidAskArrays,
+    readHistoricalTicksLastArrays,
+    historicalTicksArraysFromProto,
+    historicalTicksBidAskArraysFromProto,
+    historicalTicksLastArraysFromProto,
+)
 from ibapi.decoder_utils import decodeContract, decodeOrder, decodeExecution, decodeOrderState, decodeContractDetails, setLastTradeDate
 from ibapi.decoder_utils import decodeHistoricalDataBar, decodeHistogramDataEntry, decodeHistoricalTickLast, decodeHistoricalTickBidAsk, decodeHistoricalTick
 from ibapi.decoder_utils import decodeSoftDollarTier, decodeFamilyCode, decodeSmartComponents, decodePriceIncrement, decodeDepthMarketDataDescription
@@ -122,10 +135,33 @@ from ibapi.protobuf.UpdateConfigResponse_pb2 import UpdateConfigResponse as Upda
 logger = logging.getLogger(__name__)
 
 
+def decodeStrAscii7(field: bytes) -> str:
+    try:
+        return field.decode("unicode-escape")
+    except UnicodeDecodeError:
+        return field.decode("latin-1")
+
+
+def decodeStrUtf8(field: bytes) -> str:
+    try:
+        return field.decode("UTF-8")
+    except UnicodeDecodeError:
+        return field.decode("latin-1")
+
+
+def decodeDecimal(field: bytes) -> Decimal:
+    return Decimal(field.decode()) if field else UNSET_DECIMAL
+
+
+# int() and float() take the ascii bytes as they are
+FIELD_CONVERTERS = {int: int, float: float, Decimal: decodeDecimal}
+
+
 class HandleInfo(Object):
     def __init__(self, wrap=None, proc=None):
         self.wrapperMeth = wrap
         self.wrapperParams = None
+        self.wrapperDecoder = None
         self.processMeth = proc
         if wrap is None and proc is None:
             raise ValueError("both wrap and proc can't be None")
@@ -134,21 +170,74 @@ class HandleInfo(Object):
         s = f"wrap:{self.wrapperMeth} meth:{self.processMeth} prms:{self.wrapperParams}"
         return s
 
+    def compileWrapperDecoder(self):
+        """Builds the function decoding the fields of a message straight into
+        a call of the wrapper method, with the per param converters picked
+        once here from the annotations instead of on every message."""
+        methName = self.wrapperMeth.__name__
+        annotations = [
+            param.annotation
+            for pname, param in self.wrapperParams.items()
+            if pname != "self"
+        ]
+        ascii7Converters = tuple(
+            FIELD_CONVERTERS.get(annotation, decodeStrAscii7)
+            for annotation in annotations
+        )
+        utf8Converters = tuple(
+            FIELD_CONVERTERS.get(annotation, decodeStrUtf8)
+            for annotation in annotations
+        )
+        nFields = len(annotations) + 1  # the version field is skipped
+        handleInfo = self
+
+        def wrapperDecoder(decoder, fields):
+            if len(fields) != nFields:
+                logger.error(
+                    "diff len fields and params %d %d for fields: %s and handleInfo: %s",
+                    len(fields),
+                    nFields,
+                    fields,
+                    handleInfo,
+                )
+                return
+            converters = (
+                ascii7Converters
+                if decoder.serverVersion >= MIN_SERVER_VER_ENCODE_MSG_ASCII7
+                else utf8Converters
+            )
+            args = [conv(field) for conv, field in zip(converters, fields[1:])]
+            getattr(decoder.wrapper, methName)(*args)
+
+        self.wrapperDecoder = wrapperDecoder
+
 
 class Decoder(Object):
     def __init__(self, wrapper, serverVersion):
         self.wrapper = wrapper
         self.serverVersion = serverVersion
+        self.tickStore = None
+        self.orderBooks = None
+        self.barAggregator = None
+        self.historicalDataArrays = False
+        self.historicalTicksArrays = False
+        self.tickStrings = StringTable()
+        self.contractDetailsCache = None
         self.discoverParams()
 
     def processTickPriceMsg(self, fields):
-        decode(int, fields)
+        read_int(fields)
+
+        reqId = read_int(fields)
+        tickType = read_int(fields)
+        price = read_float(fields)
+        size = read_decimal(fields)  # ver 2 field
+        attrMask = read_int(fields)  # ver 3 field
 
-        reqId = decode(int, fields)
-        tickType = decode(int, fields)
-        price = decode(float, fields)
-        size = decode(Decimal, fields)  # ver 2 field
-        attrMask = decode(int, fields)  # ver 3 field
+        if self.tickStore is not None:
+            self.tickStore.updatePrice(reqId, tickType, price, size)
+            if not self.tickStore.forwardTicks:
+                return
 
         attrib = TickAttrib()
 
@@ -184,12 +273,18 @@ class Decoder(Object):
         tickPriceProto = TickPriceProto()
         tickPriceProto.ParseFromString(protobuf)
 
-        self.wrapper.tickPriceProtoBuf(tickPriceProto)
-
         reqId = tickPriceProto.reqId if tickPriceProto.HasField('reqId') else NO_VALID_ID
         tickType = tickPriceProto.tickType if tickPriceProto.HasField('tickType') else UNSET_INTEGER
         price = tickPriceProto.price if tickPriceProto.HasField('price') else UNSET_DOUBLE
         size = Decimal(tickPriceProto.size) if tickPriceProto.HasField('size') else UNSET_DECIMAL
+
+        if self.tickStore is not None:
+            self.tickStore.updatePrice(reqId, tickType, price, size)
+            if not self.tickStore.forwardTicks:
+                return
+
+        self.wrapper.tickPriceProtoBuf(tickPriceProto)
+
         attrMask = tickPriceProto.attrMask if tickPriceProto.HasField('attrMask') else UNSET_INTEGER
         attrib = TickAttrib()
         attrib.canAutoExecute = attrMask & 1 != 0
@@ -216,11 +311,16 @@ class Decoder(Object):
             self.wrapper.tickSize(reqId, sizeTickType, size)
 
     def processTickSizeMsg(self, fields):
-        decode(int, fields)
+        read_int(fields)
 
-        reqId = decode(int, fields)
-        sizeTickType = decode(int, fields)
-        size = decode(Decimal, fields)
+        reqId = read_int(fields)
+        sizeTickType = read_int(fields)
+        size = read_decimal(fields)
+
+        if self.tickStore is not None:
+            self.tickStore.updateSize(reqId, sizeTickType, size)
+            if not self.tickStore.forwardTicks:
+                return
 
         if sizeTickType != TickTypeEnum.NOT_SET:
             self.wrapper.tickSize(reqId, sizeTickType, size)
@@ -229,32 +329,65 @@ class Decoder(Object):
         tickSizeProto = TickSizeProto()
         tickSizeProto.ParseFromString(protobuf)
 
-        self.wrapper.tickSizeProtoBuf(tickSizeProto)
-
         reqId = tickSizeProto.reqId if tickSizeProto.HasField('reqId') else NO_VALID_ID
         tickType = tickSizeProto.tickType if tickSizeProto.HasField('tickType') else UNSET_INTEGER
         size = Decimal(tickSizeProto.size) if tickSizeProto.HasField('size') else UNSET_DECIMAL
 
+        if self.tickStore is not None:
+            self.tickStore.updateSize(reqId, tickType, size)
+            if not self.tickStore.forwardTicks:
+                return
+
+        self.wrapper.tickSizeProtoBuf(tickSizeProto)
+
         if tickType != TickTypeEnum.NOT_SET:
             self.wrapper.tickSize(reqId, tickType, size)
 
+    def processTickGenericMsg(self, fields):
+        read_int(fields)
+
+        reqId = read_int(fields)
+        tickType = read_int(fields)
+        value = read_float(fields)
+
+        if self.tickStore is not None:
+            self.tickStore.update(reqId, tickType, value)
+            if not self.tickStore.forwardTicks:
+                return
+
+        self.wrapper.tickGeneric(reqId, tickType, value)
+
+    def processTickStringMsg(self, fields):
+        read_int(fields)
+
+        reqId = read_int(fields)
+        tickType = read_int(fields)
+        value = read_str(fields, self.serverVersion >= MIN_SERVER_VER_ENCODE_MSG_ASCII7)
+
+        if self.tickStore is not None:
+            self.tickStore.updateString(reqId, tickType, value)
+            if not self.tickStore.forwardTicks:
+                return
+
+        self.wrapper.tickString(reqId, tickType, value)
+
     def processOrderStatusMsg(self, fields):
         if self.serverVersion < MIN_SERVER_VER_MARKET_CAP_PRICE:
-            decode(int, fields)
-        orderId = decode(int, fields)
-        status = decode(str, fields)
-        filled = decode(Decimal, fields)
-        remaining = decode(Decimal, fields)
-        avgFillPrice = decode(float, fields)
-
-        permId = decode(int, fields)  # ver 2 field
-        parentId = decode(int, fields)  # ver 3 field
-        lastFillPrice = decode(float, fields)  # ver 4 field
-        clientId = decode(int, fields)  # ver 5 field
-        whyHeld = decode(str, fields)  # ver 6 field
+            read_int(fields)
+        orderId = read_int(fields)
+        status = read_str(fields)
+        filled = read_decimal(fields)
+        remaining = read_decimal(fields)
+        avgFillPrice = read_float(fields)
+
+        permId = read_int(fields)  # ver 2 field
+        parentId = read_int(fields)  # ver 3 field
+        lastFillPrice = read_float(fields)  # ver 4 field
+        clientId = read_int(fields)  # ver 5 field
+        whyHeld = read_str(fields)  # ver 6 field
 
         if self.serverVersion >= MIN_SERVER_VER_MARKET_CAP_PRICE:
-            mktCapPrice = decode(float, fields)
+            mktCapPrice = read_float(fields)
         else:
             mktCapPrice = None
 
@@ -298,7 +431,7 @@ class Decoder(Object):
         orderState = OrderState()
 
         if self.serverVersion < MIN_SERVER_VER_ORDER_CONTAINER:
-            version = decode(int, fields)
+            version = read_int(fields)
         else:
             version = self.serverVersion
 
@@ -428,38 +561,38 @@ class Decoder(Object):
         self.wrapper.openOrderEnd()
 
     def processPortfolioValueMsg(self, fields):
-        version = decode(int, fields)
+        version = read_int(fields)
 
         # read contract fields
         contract = Contract()
-        contract.conId = decode(int, fields)  # ver 6 field
-        contract.symbol = decode(str, fields)
-        contract.secType = decode(str, fields)
-        contract.lastTradeDateOrContractMonth = decode(str, fields)
-        contract.strike = decode(float, fields)
-        contract.right = decode(str, fields)
+        contract.conId = read_int(fields)  # ver 6 field
+        contract.symbol = read_str(fields)
+        contract.secType = read_str(fields)
+        contract.lastTradeDateOrContractMonth = read_str(fields)
+        contract.strike = read_float(fields)
+        contract.right = read_str(fields)
 
         if version >= 7:
-            contract.multiplier = decode(str, fields)
-            contract.primaryExchange = decode(str, fields)
+            contract.multiplier = read_str(fields)
+            contract.primaryExchange = read_str(fields)
 
-        contract.currency = decode(str, fields)
-        contract.localSymbol = decode(str, fields)  # ver 2 field
+        contract.currency = read_str(fields)
+        contract.localSymbol = read_str(fields)  # ver 2 field
         if version >= 8:
-            contract.tradingClass = decode(str, fields)
+            contract.tradingClass = read_str(fields)
 
-        position = decode(Decimal, fields)
+        position = read_decimal(fields)
 
-        marketPrice = decode(float, fields)
-        marketValue = decode(float, fields)
-        averageCost = decode(float, fields)  # ver 3 field
-        unrealizedPNL = decode(float, fields)  # ver 3 field
-        realizedPNL = decode(float, fields)  # ver 3 field
+        marketPrice = read_float(fields)
+        marketValue = read_float(fields)
+        averageCost = read_float(fields)  # ver 3 field
+        unrealizedPNL = read_float(fields)  # ver 3 field
+        realizedPNL = read_float(fields)  # ver 3 field
 
-        accountName = decode(str, fields)  # ver 4 field
+        accountName = read_str(fields)  # ver 4 field
 
         if version == 6 and self.serverVersion == 39:
-            contract.primaryExchange = decode(str, fields)
+            contract.primaryExchange = read_str(fields)
 
         self.wrapper.updatePortfolio(
             contract,
@@ -496,125 +629,128 @@ class Decoder(Object):
     def processContractDataMsg(self, fields):
         version = 8
         if self.serverVersion < MIN_SERVER_VER_SIZE_RULES:
-            version = decode(int, fields)
+            version = read_int(fields)
 
         reqId = -1
         if version >= 3:
-            reqId = decode(int, fields)
+            reqId = read_int(fields)
 
         contract = ContractDetails()
-        contract.contract.symbol = decode(str, fields)
-        contract.contract.secType = decode(str, fields)
+        contract.contract.symbol = read_str(fields)
+        contract.contract.secType = read_str(fields)
         self.readLastTradeDate(fields, contract, False)
         if self.serverVersion >= MIN_SERVER_VER_LAST_TRADE_DATE:
-            contract.contract.lastTradeDate = decode(str, fields)
-        contract.contract.strike = decode(float, fields)
-        contract.contract.right = decode(str, fields)
-        contract.contract.exchange = decode(str, fields)
-        contract.contract.currency = decode(str, fields)
-        contract.contract.localSymbol = decode(str, fields)
-        contract.marketName = decode(str, fields)
-        contract.contract.tradingClass = decode(str, fields)
-        contract.contract.conId = decode(int, fields)
-        contract.minTick = decode(float, fields)
+            contract.contract.lastTradeDate = read_str(fields)
+        contract.contract.strike = read_float(fields)
+        contract.contract.right = read_str(fields)
+        contract.contract.exchange = read_str(fields)
+        contract.contract.currency = read_str(fields)
+        contract.contract.localSymbol = read_str(fields)
+        contract.marketName = read_str(fields)
+        contract.contract.tradingClass = read_str(fields)
+        contract.contract.conId = read_int(fields)
+        contract.minTick = read_float(fields)
         if (
             self.serverVersion >= MIN_SERVER_VER_MD_SIZE_MULTIPLIER
             and self.serverVersion < MIN_SERVER_VER_SIZE_RULES
         ):
-            decode(int, fields)  # mdSizeMultiplier - not used anymore
-        contract.contract.multiplier = decode(str, fields)
-        contract.orderTypes = decode(str, fields)
-        contract.validExchanges = decode(str, fields)
-        contract.priceMagnifier = decode(int, fields)  # ver 2 field
+            read_int(fields)  # mdSizeMultiplier - not used anymore
+        contract.contract.multiplier = read_str(fields)
+        contract.orderTypes = read_str(fields)
+        contract.validExchanges = read_str(fields)
+        contract.priceMagnifier = read_int(fields)  # ver 2 field
         if version >= 4:
-            contract.underConId = decode(int, fields)
+            contract.underConId = read_int(fields)
         if version >= 5:
             contract.longName = (
-                decode(str, fields).encode().decode("unicode-escape")
+                read_str(fields).encode().decode("unicode-escape")
                 if self.serverVersion >= MIN_SERVER_VER_ENCODE_MSG_ASCII7
-                else decode(str, fields)
+                else read_str(fields)
             )
-            contract.contract.primaryExchange = decode(str, fields)
+            contract.contract.primaryExchange = read_str(fields)
         if version >= 6:
-            contract.contractMonth = decode(str, fields)
-            contract.industry = decode(str, fields)
-            contract.category = decode(str, fields)
-            contract.subcategory = decode(str, fields)
-            contract.timeZoneId = decode(str, fields)
-            contract.tradingHours = decode(str, fields)
-            contract.liquidHours = decode(str, fields)
+            contract.contractMonth = read_str(fields)
+            contract.industry = read_str(fields)
+            contract.category = read_str(fields)
+            contract.subcategory = read_str(fields)
+            contract.timeZoneId = read_str(fields)
+            contract.tradingHours = read_str(fields)
+            contract.liquidHours = read_str(fields)
         if version >= 8:
-            contract.evRule = decode(str, fields)
-            contract.evMultiplier = decode(int, fields)
+            contract.evRule = read_str(fields)
+            contract.evMultiplier = read_int(fields)
         if version >= 7:
-            secIdListCount = decode(int, fields)
+            secIdListCount = read_int(fields)
             if secIdListCount > 0:
                 contract.secIdList = []
                 for _ in range(secIdListCount):
                     tagValue = TagValue()
-                    tagValue.tag = decode(str, fields)
-                    tagValue.value = decode(str, fields)
+                    tagValue.tag = read_str(fields)
+                    tagValue.value = read_str(fields)
                     contract.secIdList.append(tagValue)
 
         if self.serverVersion >= MIN_SERVER_VER_AGG_GROUP:
-            contract.aggGroup = decode(int, fields)
+            contract.aggGroup = read_int(fields)
 
         if self.serverVersion >= MIN_SERVER_VER_UNDERLYING_INFO:
-            contract.underSymbol = decode(str, fields)
-            contract.underSecType = decode(str, fields)
+            contract.underSymbol = read_str(fields)
+            contract.underSecType = read_str(fields)
 
         if self.serverVersion >= MIN_SERVER_VER_MARKET_RULES:
-            contract.marketRuleIds = decode(str, fields)
+            contract.marketRuleIds = read_str(fields)
 
         if self.serverVersion >= MIN_SERVER_VER_REAL_EXPIRATION_DATE:
-            contract.realExpirationDate = decode(str, fields)
+            contract.realExpirationDate = read_str(fields)
 
         if self.serverVersion >= MIN_SERVER_VER_STOCK_TYPE:
-            contract.stockType = decode(str, fields)
+            contract.stockType = read_str(fields)
 
         if (
             self.serverVersion >= MIN_SERVER_VER_FRACTIONAL_SIZE_SUPPORT
             and self.serverVersion < MIN_SERVER_VER_SIZE_RULES
         ):
-            decode(Decimal, fields)  # sizeMinTick - not used anymore
+            read_decimal(fields)  # sizeMinTick - not used anymore
 
         if self.serverVersion >= MIN_SERVER_VER_SIZE_RULES:
-            contract.minSize = decode(Decimal, fields)
-            contract.sizeIncrement = decode(Decimal, fields)
-            contract.suggestedSizeIncrement = decode(Decimal, fields)
+            contract.minSize = read_decimal(fields)
+            contract.sizeIncrement = read_decimal(fields)
+            contract.suggestedSizeIncrement = read_decimal(fields)
 
         if (
             self.serverVersion >= MIN_SERVER_VER_FUND_DATA_FIELDS
             and contract.contract.secType == "FUND"
         ):
-            contract.fundName = decode(str, fields)
-            contract.fundFamily = decode(str, fields)
-            contract.fundType = decode(str, fields)
-            contract.fundFrontLoad = decode(str, fields)
-            contract.fundBackLoad = decode(str, fields)
-            contract.fundBackLoadTimeInterval = decode(str, fields)
-            contract.fundManagementFee = decode(str, fields)
-            contract.fundClosed = decode(bool, fields)
-            contract.fundClosedForNewInvestors = decode(bool, fields)
-            contract.fundClosedForNewMoney = decode(bool, fields)
-            contract.fundNotifyAmount = decode(str, fields)
-            contract.fundMinimumInitialPurchase = decode(str, fields)
-            contract.fundSubsequentMinimumPurchase = decode(str, fields)
-            contract.fundBlueSkyStates = decode(str, fields)
-            contract.fundBlueSkyTerritories = decode(str, fields)
-            contract.fundDistributionPolicyIndicator = getEnumTypeFromString(FundDistributionPolicyIndicator, decode(str, fields))
-            contract.fundAssetType = getEnumTypeFromString(FundAssetType, decode(str, fields))
+            contract.fundName = read_str(fields)
+            contract.fundFamily = read_str(fields)
+            contract.fundType = read_str(fields)
+            contract.fundFrontLoad = read_str(fields)
+            contract.fundBackLoad = read_str(fields)
+            contract.fundBackLoadTimeInterval = read_str(fields)
+            contract.fundManagementFee = read_str(fields)
+            contract.fundClosed = read_bool(fields)
+            contract.fundClosedForNewInvestors = read_bool(fields)
+            contract.fundClosedForNewMoney = read_bool(fields)
+            contract.fundNotifyAmount = read_str(fields)
+            contract.fundMinimumInitialPurchase = read_str(fields)
+            contract.fundSubsequentMinimumPurchase = read_str(fields)
+            contract.fundBlueSkyStates = read_str(fields)
+            contract.fundBlueSkyTerritories = read_str(fields)
+            contract.fundDistributionPolicyIndicator = getEnumTypeFromString(FundDistributionPolicyIndicator, read_str(fields))
+            contract.fundAssetType = getEnumTypeFromString(FundAssetType, read_str(fields))
 
         if self.serverVersion >= MIN_SERVER_VER_INELIGIBILITY_REASONS:
-            ineligibilityReasonListCount = decode(int, fields)
+            ineligibilityReasonListCount = read_int(fields)
             if ineligibilityReasonListCount > 0:
                 contract.ineligibilityReasonList = []
                 for _ in range(ineligibilityReasonListCount):
                     ineligibilityReason = IneligibilityReason()
-                    ineligibilityReason.id_ = decode(str, fields)
-                    ineligibilityReason.description = decode(str, fields)
+                    ineligibilityReason.id_ = read_str(fields)
+                    ineligibilityReason.description = read_str(fields)
                     contract.ineligibilityReasonList.append(ineligibilityReason)
 
+        if self.contractDetailsCache is not None:
+            self.contractDetailsCache.add(reqId, contract, False)
+
         self.wrapper.contractDetails(reqId, contract)
 
     def processContractDataMsgProtoBuf(self, protobuf):
@@ -630,77 +766,83 @@ class Decoder(Object):
             return
         contractDetails = decodeContractDetails(contractDataProto.contract, contractDataProto.contractDetails, False)
 
+        if self.contractDetailsCache is not None:
+            self.contractDetailsCache.add(reqId, contractDetails, False)
+
         self.wrapper.contractDetails(reqId, contractDetails)
 
     def processBondContractDataMsg(self, fields):
         version = 6
         if self.serverVersion < MIN_SERVER_VER_SIZE_RULES:
-            version = decode(int, fields)
+            version = read_int(fields)
 
         reqId = -1
         if version >= 3:
-            reqId = decode(int, fields)
+            reqId = read_int(fields)
 
         contract = ContractDetails()
-        contract.contract.symbol = decode(str, fields)
-        contract.contract.secType = decode(str, fields)
-        contract.cusip = decode(str, fields)
-        contract.coupon = decode(float, fields)
+        contract.contract.symbol = read_str(fields)
+        contract.contract.secType = read_str(fields)
+        contract.cusip = read_str(fields)
+        contract.coupon = read_float(fields)
         self.readLastTradeDate(fields, contract, True)
-        contract.issueDate = decode(str, fields)
-        contract.ratings = decode(str, fields)
-        contract.bondType = decode(str, fields)
-        contract.couponType = decode(str, fields)
-        contract.convertible = decode(bool, fields)
-        contract.callable = decode(bool, fields)
-        contract.putable = decode(bool, fields)
-        contract.descAppend = decode(str, fields)
-        contract.contract.exchange = decode(str, fields)
-        contract.contract.currency = decode(str, fields)
-        contract.marketName = decode(str, fields)
-        contract.contract.tradingClass = decode(str, fields)
-        contract.contract.conId = decode(int, fields)
-        contract.minTick = decode(float, fields)
+        contract.issueDate = read_str(fields)
+        contract.ratings = read_str(fields)
+        contract.bondType = read_str(fields)
+        contract.couponType = read_str(fields)
+        contract.convertible = read_bool(fields)
+        contract.callable = read_bool(fields)
+        contract.putable = read_bool(fields)
+        contract.descAppend = read_str(fields)
+        contract.contract.exchange = read_str(fields)
+        contract.contract.currency = read_str(fields)
+        contract.marketName = read_str(fields)
+        contract.contract.tradingClass = read_str(fields)
+        contract.contract.conId = read_int(fields)
+        contract.minTick = read_float(fields)
         if (
             self.serverVersion >= MIN_SERVER_VER_MD_SIZE_MULTIPLIER
             and self.serverVersion < MIN_SERVER_VER_SIZE_RULES
         ):
-            decode(int, fields)  # mdSizeMultiplier - not used anymore
-        contract.orderTypes = decode(str, fields)
-        contract.validExchanges = decode(str, fields)
-        contract.nextOptionDate = decode(str, fields)  # ver 2 field
-        contract.nextOptionType = decode(str, fields)  # ver 2 field
-        contract.nextOptionPartial = decode(bool, fields)  # ver 2 field
-        contract.notes = decode(str, fields)  # ver 2 field
+            read_int(fields)  # mdSizeMultiplier - not used anymore
+        contract.orderTypes = read_str(fields)
+        contract.validExchanges = read_str(fields)
+        contract.nextOptionDate = read_str(fields)  # ver 2 field
+        contract.nextOptionType = read_str(fields)  # ver 2 field
+        contract.nextOptionPartial = read_bool(fields)  # ver 2 field
+        contract.notes = read_str(fields)  # ver 2 field
         if version >= 4:
-            contract.longName = decode(str, fields)
+            contract.longName = read_str(fields)
         if self.serverVersion >= MIN_SERVER_VER_BOND_TRADING_HOURS:
-            contract.timeZoneId = decode(str, fields)
-            contract.tradingHours = decode(str, fields)
-            contract.liquidHours = decode(str, fields)
+            contract.timeZoneId = read_str(fields)
+            contract.tradingHours = read_str(fields)
+            contract.liquidHours = read_str(fields)
         if version >= 6:
-            contract.evRule = decode(str, fields)
-            contract.evMultiplier = decode(int, fields)
+            contract.evRule = read_str(fields)
+            contract.evMultiplier = read_int(fields)
         if version >= 5:
-            secIdListCount = decode(int, fields)
+            secIdListCount = read_int(fields)
             if secIdListCount > 0:
                 contract.secIdList = []
                 for _ in range(secIdListCount):
                     tagValue = TagValue()
-                    tagValue.tag = decode(str, fields)
-                    tagValue.value = decode(str, fields)
+                    tagValue.tag = read_str(fields)
+                    tagValue.value = read_str(fields)
                     contract.secIdList.append(tagValue)
 
         if self.serverVersion >= MIN_SERVER_VER_AGG_GROUP:
-            contract.aggGroup = decode(int, fields)
+            contract.aggGroup = read_int(fields)
 
         if self.serverVersion >= MIN_SERVER_VER_MARKET_RULES:
-            contract.marketRuleIds = decode(str, fields)
+            contract.marketRuleIds = read_str(fields)
 
         if self.serverVersion >= MIN_SERVER_VER_SIZE_RULES:
-            contract.minSize = decode(Decimal, fields)
-            contract.sizeIncrement = decode(Decimal, fields)
-            contract.suggestedSizeIncrement = decode(Decimal, fields)
+            contract.minSize = read_decimal(fields)
+            contract.sizeIncrement = read_decimal(fields)
+            contract.suggestedSizeIncrement = read_decimal(fields)
+
+        if self.contractDetailsCache is not None:
+            self.contractDetailsCache.add(reqId, contract, True)
 
         self.wrapper.bondContractDetails(reqId, contract)
 
@@ -717,8 +859,20 @@ class Decoder(Object):
             return
         contractDetails = decodeContractDetails(contractDataProto.contract, contractDataProto.contractDetails, True)
 
+        if self.contractDetailsCache is not None:
+            self.contractDetailsCache.add(reqId, contractDetails, True)
+
         self.wrapper.bondContractDetails(reqId, contractDetails)
 
+    def processContractDataEndMsg(self, fields):
+        read_int(fields)
+        reqId = read_int(fields)
+
+        if self.contractDetailsCache is not None:
+            self.contractDetailsCache.end(reqId)
+
+        self.wrapper.contractDetailsEnd(reqId)
+
     def processContractDataEndMsgProtoBuf(self, protobuf):
         contractDataEndProto = ContractDataEndProto()
         contractDataEndProto.ParseFromString(protobuf)
@@ -727,34 +881,37 @@ class Decoder(Object):
 
         reqId = contractDataEndProto.reqId if contractDataEndProto.HasField('reqId') else NO_VALID_ID
 
+        if self.contractDetailsCache is not None:
+            self.contractDetailsCache.end(reqId)
+
         self.wrapper.contractDetailsEnd(reqId)
 
     def processScannerDataMsg(self, fields):
-        decode(int, fields)
-        reqId = decode(int, fields)
+        read_int(fields)
+        reqId = read_int(fields)
 
-        numberOfElements = decode(int, fields)
+        numberOfElements = read_int(fields)
 
         for _ in range(numberOfElements):
             data = ScanData()
             data.contract = ContractDetails()
 
-            data.rank = decode(int, fields)
-            data.contract.contract.conId = decode(int, fields)  # ver 3 field
-            data.contract.contract.symbol = decode(str, fields)
-            data.contract.contract.secType = decode(str, fields)
-            data.contract.contract.lastTradeDateOrContractMonth = decode(str, fields)
-            data.contract.contract.strike = decode(float, fields)
-            data.contract.contract.right = decode(str, fields)
-            data.contract.contract.exchange = decode(str, fields)
-            data.contract.contract.currency = decode(str, fields)
-            data.contract.contract.localSymbol = decode(str, fields)
-            data.contract.marketName = decode(str, fields)
-            data.contract.contract.tradingClass = decode(str, fields)
-            data.distance = decode(str, fields)
-            data.benchmark = decode(str, fields)
-            data.projection = decode(str, fields)
-            data.legsStr = decode(str, fields)
+            data.rank = read_int(fields)
+            data.contract.contract.conId = read_int(fields)  # ver 3 field
+            data.contract.contract.symbol = read_str(fields)
+            data.contract.contract.secType = read_str(fields)
+            data.contract.contract.lastTradeDateOrContractMonth = read_str(fields)
+            data.contract.contract.strike = read_float(fields)
+            data.contract.contract.right = read_str(fields)
+            data.contract.contract.exchange = read_str(fields)
+            data.contract.contract.currency = read_str(fields)
+            data.contract.contract.localSymbol = read_str(fields)
+            data.contract.marketName = read_str(fields)
+            data.contract.contract.tradingClass = read_str(fields)
+            data.distance = read_str(fields)
+            data.benchmark = read_str(fields)
+            data.projection = read_str(fields)
+            data.legsStr = read_str(fields)
             self.wrapper.scannerData(
                 reqId,
                 data.rank,
@@ -799,62 +956,62 @@ class Decoder(Object):
         version = self.serverVersion
 
         if self.serverVersion < MIN_SERVER_VER_LAST_LIQUIDITY:
-            version = decode(int, fields)
+            version = read_int(fields)
 
         reqId = -1
         if version >= 7:
-            reqId = decode(int, fields)
+            reqId = read_int(fields)
 
-        orderId = decode(int, fields)
+        orderId = read_int(fields)
 
         # decode contract fields
         contract = Contract()
-        contract.conId = decode(int, fields)  # ver 5 field
-        contract.symbol = decode(str, fields)
-        contract.secType = decode(str, fields)
-        contract.lastTradeDateOrContractMonth = decode(str, fields)
-        contract.strike = decode(float, fields)
-        contract.right = decode(str, fields)
+        contract.conId = read_int(fields)  # ver 5 field
+        contract.symbol = read_str(fields)
+        contract.secType = read_str(fields)
+        contract.lastTradeDateOrContractMonth = read_str(fields)
+        contract.strike = read_float(fields)
+        contract.right = read_str(fields)
         if version >= 9:
-            contract.multiplier = decode(str, fields)
-        contract.exchange = decode(str, fields)
-        contract.currency = decode(str, fields)
-        contract.localSymbol = decode(str, fields)
+            contract.multiplier = read_str(fields)
+        contract.exchange = read_str(fields)
+        contract.currency = read_str(fields)
+        contract.localSymbol = read_str(fields)
         if version >= 10:
-            contract.tradingClass = decode(str, fields)
+            contract.tradingClass = read_str(fields)
 
         # decode execution fields
         execution = Execution()
         execution.orderId = orderId
-        execution.execId = decode(str, fields)
-        execution.time = decode(str, fields)
-        execution.acctNumber = decode(str, fields)
-        execution.exchange = decode(str, fields)
-        execution.side = decode(str, fields)
-        execution.shares = decode(Decimal, fields)
-        execution.price = decode(float, fields)
-        execution.permId = decode(int, fields)  # ver 2 field
-        execution.clientId = decode(int, fields)  # ver 3 field
-        execution.liquidation = decode(int, fields)  # ver 4 field
+        execution.execId = read_str(fields)
+        execution.time = read_str(fields)
+        execution.acctNumber = read_str(fields)
+        execution.exchange = read_str(fields)
+        execution.side = read_str(fields)
+        execution.shares = read_decimal(fields)
+        execution.price = read_float(fields)
+        execution.permId = read_int(fields)  # ver 2 field
+        execution.clientId = read_int(fields)  # ver 3 field
+        execution.liquidation = read_int(fields)  # ver 4 field
 
         if version >= 6:
-            execution.cumQty = decode(Decimal, fields)
-            execution.avgPrice = decode(float, fields)
+            execution.cumQty = read_decimal(fields)
+            execution.avgPrice = read_float(fields)
 
         if version >= 8:
-            execution.orderRef = decode(str, fields)
+            execution.orderRef = read_str(fields)
 
         if version >= 9:
-            execution.evRule = decode(str, fields)
-            execution.evMultiplier = decode(float, fields)
+            execution.evRule = read_str(fields)
+            execution.evMultiplier = read_float(fields)
         if self.serverVersion >= MIN_SERVER_VER_MODELS_SUPPORT:
-            execution.modelCode = decode(str, fields)
+            execution.modelCode = read_str(fields)
         if self.serverVersion >= MIN_SERVER_VER_LAST_LIQUIDITY:
-            execution.lastLiquidity = decode(int, fields)
+            execution.lastLiquidity = read_int(fields)
         if self.serverVersion >= MIN_SERVER_VER_PENDING_PRICE_REVISION:
-            execution.pendingPriceRevision = decode(bool, fields)
+            execution.pendingPriceRevision = read_bool(fields)
         if self.serverVersion >= MIN_SERVER_VER_SUBMITTER:
-            execution.submitter = decode(str, fields)
+            execution.submitter = read_str(fields)
 
         self.wrapper.execDetails(reqId, contract, execution)
 
@@ -890,30 +1047,37 @@ class Decoder(Object):
 
     def processHistoricalDataMsg(self, fields):
         if self.serverVersion < MIN_SERVER_VER_SYNT_REALTIME_BARS:
-            decode(int, fields)
+            read_int(fields)
 
-        reqId = decode(int, fields)
+        reqId = read_int(fields)
         
         if self.serverVersion < MIN_SERVER_VER_HISTORICAL_DATA_END:
-            startDateStr = decode(str, fields)  # ver 2 field
-            endDateStr = decode(str, fields)  # ver 2 field
+            startDateStr = read_str(fields)  # ver 2 field
+            endDateStr = read_str(fields)  # ver 2 field
 
-        itemCount = decode(int, fields)
+        itemCount = read_int(fields)
+
+        if self.historicalDataArrays:
+            arrays = readHistoricalDataArrays(
+                fields, itemCount, self.serverVersion < MIN_SERVER_VER_SYNT_REALTIME_BARS
+            )
+            self.wrapper.historicalDataArray(reqId, arrays)
+            itemCount = 0
 
         for _ in range(itemCount):
             bar = BarData()
-            bar.date = decode(str, fields)
-            bar.open = decode(float, fields)
-            bar.high = decode(float, fields)
-            bar.low = decode(float, fields)
-            bar.close = decode(float, fields)
-            bar.volume = decode(Decimal, fields)
-            bar.wap = decode(Decimal, fields)
+            bar.date = read_str(fields)
+            bar.open = read_float(fields)
+            bar.high = read_float(fields)
+            bar.low = read_float(fields)
+            bar.close = read_float(fields)
+            bar.volume = read_decimal(fields)
+            bar.wap = read_decimal(fields)
 
             if self.serverVersion < MIN_SERVER_VER_SYNT_REALTIME_BARS:
-                decode(str, fields)
+                read_str(fields)
 
-            bar.barCount = decode(int, fields)  # ver 3 field
+            bar.barCount = read_int(fields)  # ver 3 field
 
             self.wrapper.historicalData(reqId, bar)
 
@@ -932,14 +1096,19 @@ class Decoder(Object):
         if not historicalDataProto.historicalDataBars:
             return
 
+        if self.historicalDataArrays:
+            arrays = historicalDataArraysFromProto(historicalDataProto.historicalDataBars)
+            self.wrapper.historicalDataArray(reqId, arrays)
+            return
+
         for historicalDataBarProto in historicalDataProto.historicalDataBars:
             bar = decodeHistoricalDataBar(historicalDataBarProto)
             self.wrapper.historicalData(reqId, bar)
 
     def processHistoricalDataEndMsg(self, fields):
-        reqId = decode(int, fields)
-        startDateStr = decode(str, fields)
-        endDateStr = decode(str, fields)
+        reqId = read_int(fields)
+        startDateStr = read_str(fields)
+        endDateStr = read_str(fields)
         
         self.wrapper.historicalDataEnd(reqId, startDateStr, endDateStr)
 
@@ -956,16 +1125,16 @@ class Decoder(Object):
         self.wrapper.historicalDataEnd(reqId, startDateStr, endDateStr)
 
     def processHistoricalDataUpdateMsg(self, fields):
-        reqId = decode(int, fields)
+        reqId = read_int(fields)
         bar = BarData()
-        bar.barCount = decode(int, fields)
-        bar.date = decode(str, fields)
-        bar.open = decode(float, fields)
-        bar.close = decode(float, fields)
-        bar.high = decode(float, fields)
-        bar.low = decode(float, fields)
-        bar.wap = decode(Decimal, fields)
-        bar.volume = decode(Decimal, fields)
+        bar.barCount = read_int(fields)
+        bar.date = read_str(fields)
+        bar.open = read_float(fields)
+        bar.close = read_float(fields)
+        bar.high = read_float(fields)
+        bar.low = read_float(fields)
+        bar.wap = read_decimal(fields)
+        bar.volume = read_decimal(fields)
         self.wrapper.historicalDataUpdate(reqId, bar)
 
     def processHistoricalDataUpdateMsgProtoBuf(self, protobuf):
@@ -983,18 +1152,23 @@ class Decoder(Object):
         self.wrapper.historicalDataUpdate(reqId, bar)
 
     def processRealTimeBarMsg(self, fields):
-        decode(int, fields)
-        reqId = decode(int, fields)
+        read_int(fields)
+        reqId = read_int(fields)
 
         bar = RealTimeBar()
-        bar.time = decode(int, fields)
-        bar.open = decode(float, fields)
-        bar.high = decode(float, fields)
-        bar.low = decode(float, fields)
-        bar.close = decode(float, fields)
-        bar.volume = decode(Decimal, fields)
-        bar.wap = decode(Decimal, fields)
-        bar.count = decode(int, fields)
+        bar.time = read_int(fields)
+        bar.open = read_float(fields)
+        bar.high = read_float(fields)
+        bar.low = read_float(fields)
+        bar.close = read_float(fields)
+        bar.volume = read_decimal(fields)
+        bar.wap = read_decimal(fields)
+        bar.count = read_int(fields)
+
+        if self.barAggregator is not None:
+            self.barAggregator.addRealTimeBar(
+                reqId, bar.time, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.wap, bar.count
+            )
 
         self.wrapper.realtimeBar(
             reqId,
@@ -1024,6 +1198,9 @@ class Decoder(Object):
         wap = Decimal(realTimeBarTickProto.WAP) if realTimeBarTickProto.HasField('WAP') else UNSET_DECIMAL
         count = realTimeBarTickProto.count if realTimeBarTickProto.HasField('count') else 0
 
+        if self.barAggregator is not None:
+            self.barAggregator.addRealTimeBar(reqId, time, open_, high, low, close, volume, wap, count)
+
         self.wrapper.realtimeBar(reqId, time, open_, high, low, close, volume, wap, count)
 
     def processTickOptionComputationMsg(self, fields):
@@ -1037,16 +1214,16 @@ class Decoder(Object):
         undPrice = None
 
         if self.serverVersion < MIN_SERVER_VER_PRICE_BASED_VOLATILITY:
-            version = decode(int, fields)
+            version = read_int(fields)
 
-        reqId = decode(int, fields)
-        tickTypeInt = decode(int, fields)
+        reqId = read_int(fields)
+        tickTypeInt = read_int(fields)
 
         if self.serverVersion >= MIN_SERVER_VER_PRICE_BASED_VOLATILITY:
-            tickAttrib = decode(int, fields)
+            tickAttrib = read_int(fields)
 
-        impliedVol = decode(float, fields)
-        delta = decode(float, fields)
+        impliedVol = read_float(fields)
+        delta = read_float(fields)
 
         if impliedVol < 0:  # -1 is the "not computed" indicator
             impliedVol = None
@@ -1058,8 +1235,8 @@ class Decoder(Object):
             or tickTypeInt == TickTypeEnum.MODEL_OPTION
             or tickTypeInt == TickTypeEnum.DELAYED_MODEL_OPTION
         ):
-            optPrice = decode(float, fields)
-            pvDividend = decode(float, fields)
+            optPrice = read_float(fields)
+            pvDividend = read_float(fields)
 
             if optPrice == -1:  # -1 is the "not computed" indicator
                 optPrice = None
@@ -1067,10 +1244,10 @@ class Decoder(Object):
                 pvDividend = None
 
         if version >= 6:
-            gamma = decode(float, fields)
-            vega = decode(float, fields)
-            theta = decode(float, fields)
-            undPrice = decode(float, fields)
+            gamma = read_float(fields)
+            vega = read_float(fields)
+            theta = read_float(fields)
+            undPrice = read_float(fields)
 
             if gamma == -2:  # -2 is the "not yet computed" indicator
                 gamma = None
@@ -1132,21 +1309,21 @@ class Decoder(Object):
         self.wrapper.tickOptionComputation(reqId, tickType, tickAttrib, impliedVol, delta, optPrice, pvDividend, gamma, vega, theta, undPrice)
 
     def processDeltaNeutralValidationMsg(self, fields):
-        decode(int, fields)
-        reqId = decode(int, fields)
+        read_int(fields)
+        reqId = read_int(fields)
 
         deltaNeutralContract = DeltaNeutralContract()
 
-        deltaNeutralContract.conId = decode(int, fields)
-        deltaNeutralContract.delta = decode(float, fields)
-        deltaNeutralContract.price = decode(float, fields)
+        deltaNeutralContract.conId = read_int(fields)
+        deltaNeutralContract.delta = read_float(fields)
+        deltaNeutralContract.price = read_float(fields)
 
         self.wrapper.deltaNeutralValidation(reqId, deltaNeutralContract)
 
     def processMarketDataTypeMsg(self, fields):
-        decode(int, fields)
-        reqId = decode(int, fields)
-        marketDataType = decode(int, fields)
+        read_int(fields)
+        reqId = read_int(fields)
+        marketDataType = read_int(fields)
 
         self.wrapper.marketDataType(reqId, marketDataType)
 
@@ -1162,15 +1339,15 @@ class Decoder(Object):
         self.wrapper.marketDataType(reqId, marketDataType)
 
     def processCommissionAndFeesReportMsg(self, fields):
-        decode(int, fields)
+        read_int(fields)
 
         commissionAndFeesReport = CommissionAndFeesReport()
-        commissionAndFeesReport.execId = decode(str, fields)
-        commissionAndFeesReport.commissionAndFees = decode(float, fields)
-        commissionAndFeesReport.currency = decode(str, fields)
-        commissionAndFeesReport.realizedPNL = decode(float, fields)
-        commissionAndFeesReport.yield_ = decode(float, fields)
-        commissionAndFeesReport.yieldRedemptionDate = decode(int, fields)
+        commissionAndFeesReport.execId = read_str(fields)
+        commissionAndFeesReport.commissionAndFees = read_float(fields)
+        commissionAndFeesReport.currency = read_str(fields)
+        commissionAndFeesReport.realizedPNL = read_float(fields)
+        commissionAndFeesReport.yield_ = read_float(fields)
+        commissionAndFeesReport.yieldRedemptionDate = read_int(fields)
 
         self.wrapper.commissionAndFeesReport(commissionAndFeesReport)
 
@@ -1191,30 +1368,30 @@ class Decoder(Object):
         self.wrapper.commissionAndFeesReport(commissionAndFeesReport)
 
     def processPositionDataMsg(self, fields):
-        version = decode(int, fields)
+        version = read_int(fields)
 
-        account = decode(str, fields)
+        account = read_str(fields)
 
         # decode contract fields
         contract = Contract()
-        contract.conId = decode(int, fields)
-        contract.symbol = decode(str, fields)
-        contract.secType = decode(str, fields)
-        contract.lastTradeDateOrContractMonth = decode(str, fields)
-        contract.strike = decode(float, fields)
-        contract.right = decode(str, fields)
-        contract.multiplier = decode(str, fields)
-        contract.exchange = decode(str, fields)
-        contract.currency = decode(str, fields)
-        contract.localSymbol = decode(str, fields)
+        contract.conId = read_int(fields)
+        contract.symbol = read_str(fields)
+        contract.secType = read_str(fields)
+        contract.lastTradeDateOrContractMonth = read_str(fields)
+        contract.strike = read_float(fields)
+        contract.right = read_str(fields)
+        contract.multiplier = read_str(fields)
+        contract.exchange = read_str(fields)
+        contract.currency = read_str(fields)
+        contract.localSymbol = read_str(fields)
         if version >= 2:
-            contract.tradingClass = decode(str, fields)
+            contract.tradingClass = read_str(fields)
 
-        position = decode(Decimal, fields)
+        position = read_decimal(fields)
 
         avgCost = 0.0
         if version >= 3:
-            avgCost = decode(float, fields)
+            avgCost = read_float(fields)
 
         self.wrapper.position(account, contract, position, avgCost)
 
@@ -1236,26 +1413,26 @@ class Decoder(Object):
         self.wrapper.position(account, contract, position, avgCost)
 
     def processPositionMultiMsg(self, fields):
-        decode(int, fields)
-        reqId = decode(int, fields)
-        account = decode(str, fields)
+        read_int(fields)
+        reqId = read_int(fields)
+        account = read_str(fields)
 
         # decode contract fields
         contract = Contract()
-        contract.conId = decode(int, fields)
-        contract.symbol = decode(str, fields)
-        contract.secType = decode(str, fields)
-        contract.lastTradeDateOrContractMonth = decode(str, fields)
-        contract.strike = decode(float, fields)
-        contract.right = decode(str, fields)
-        contract.multiplier = decode(str, fields)
-        contract.exchange = decode(str, fields)
-        contract.currency = decode(str, fields)
-        contract.localSymbol = decode(str, fields)
-        contract.tradingClass = decode(str, fields)
-        position = decode(Decimal, fields)
-        avgCost = decode(float, fields)
-        modelCode = decode(str, fields)
+        contract.conId = read_int(fields)
+        contract.symbol = read_str(fields)
+        contract.secType = read_str(fields)
+        contract.lastTradeDateOrContractMonth = read_str(fields)
+        contract.strike = read_float(fields)
+        contract.right = read_str(fields)
+        contract.multiplier = read_str(fields)
+        contract.exchange = read_str(fields)
+        contract.currency = read_str(fields)
+        contract.localSymbol = read_str(fields)
+        contract.tradingClass = read_str(fields)
+        position = read_decimal(fields)
+        avgCost = read_float(fields)
+        modelCode = read_str(fields)
 
         self.wrapper.positionMulti(
             reqId, account, modelCode, contract, position, avgCost
@@ -1282,22 +1459,22 @@ class Decoder(Object):
         self.wrapper.positionMulti(reqId, account, modelCode, contract, position, avgCost)
 
     def processSecurityDefinitionOptionParameterMsg(self, fields):
-        reqId = decode(int, fields)
-        exchange = decode(str, fields)
-        underlyingConId = decode(int, fields)
-        tradingClass = decode(str, fields)
-        multiplier = decode(str, fields)
+        reqId = read_int(fields)
+        exchange = read_str(fields)
+        underlyingConId = read_int(fields)
+        tradingClass = read_str(fields)
+        multiplier = read_str(fields)
 
-        expCount = decode(int, fields)
+        expCount = read_int(fields)
         expirations = set()
         for _ in range(expCount):
-            expiration = decode(str, fields)
+            expiration = read_str(fields)
             expirations.add(expiration)
 
-        strikeCount = decode(int, fields)
+        strikeCount = read_int(fields)
         strikes = set()
         for _ in range(strikeCount):
-            strike = decode(float, fields)
+            strike = read_float(fields)
             strikes.add(strike)
 
         self.wrapper.securityDefinitionOptionParameter(
@@ -1335,7 +1512,7 @@ class Decoder(Object):
         self.wrapper.securityDefinitionOptionParameter(reqId, exchange, underlyingConId, tradingClass, multiplier, expirations, strikes)
 
     def processSecurityDefinitionOptionParameterEndMsg(self, fields):
-        reqId = decode(int, fields)
+        reqId = read_int(fields)
         self.wrapper.securityDefinitionOptionParameterEnd(reqId)
 
     def processSecurityDefinitionOptionParameterEndMsgProtoBuf(self, protobuf):
@@ -1349,15 +1526,15 @@ class Decoder(Object):
         self.wrapper.securityDefinitionOptionParameterEnd(reqId)
 
     def processSoftDollarTiersMsg(self, fields):
-        reqId = decode(int, fields)
-        nTiers = decode(int, fields)
+        reqId = read_int(fields)
+        nTiers = read_int(fields)
 
         tiers = []
         for _ in range(nTiers):
             tier = SoftDollarTier()
-            tier.name = decode(str, fields)
-            tier.val = decode(str, fields)
-            tier.displayName = decode(str, fields)
+            tier.name = read_str(fields)
+            tier.val = read_str(fields)
+            tier.displayName = read_str(fields)
             tiers.append(tier)
 
         self.wrapper.softDollarTiers(reqId, tiers)
@@ -1379,12 +1556,12 @@ class Decoder(Object):
         self.wrapper.softDollarTiers(reqId, tiers)
 
     def processFamilyCodesMsg(self, fields):
-        nFamilyCodes = decode(int, fields)
+        nFamilyCodes = read_int(fields)
         familyCodes = []
         for _ in range(nFamilyCodes):
             famCode = FamilyCode()
-            famCode.accountID = decode(str, fields)
-            famCode.familyCodeStr = decode(str, fields)
+            famCode.accountID = read_str(fields)
+            famCode.familyCodeStr = read_str(fields)
             familyCodes.append(famCode)
 
         self.wrapper.familyCodes(familyCodes)
@@ -1404,27 +1581,27 @@ class Decoder(Object):
         self.wrapper.familyCodes(familyCodes)
 
     def processSymbolSamplesMsg(self, fields):
-        reqId = decode(int, fields)
-        nContractDescriptions = decode(int, fields)
+        reqId = read_int(fields)
+        nContractDescriptions = read_int(fields)
         contractDescriptions = []
         for _ in range(nContractDescriptions):
             conDesc = ContractDescription()
-            conDesc.contract.conId = decode(int, fields)
-            conDesc.contract.symbol = decode(str, fields)
-            conDesc.contract.secType = decode(str, fields)
-            conDesc.contract.primaryExchange = decode(str, fields)
-            conDesc.contract.currency = decode(str, fields)
+            conDesc.contract.conId = read_int(fields)
+            conDesc.contract.symbol = read_str(fields)
+            conDesc.contract.secType = read_str(fields)
+            conDesc.contract.primaryExchange = read_str(fields)
+            conDesc.contract.currency = read_str(fields)
 
-            nDerivativeSecTypes = decode(int, fields)
+            nDerivativeSecTypes = read_int(fields)
             conDesc.derivativeSecTypes = []
             for _ in range(nDerivativeSecTypes):
-                derivSecType = decode(str, fields)
+                derivSecType = read_str(fields)
                 conDesc.derivativeSecTypes.append(derivSecType)
             contractDescriptions.append(conDesc)
 
             if self.serverVersion >= MIN_SERVER_VER_BOND_ISSUERID:
-                conDesc.contract.description = decode(str, fields)
-                conDesc.contract.issuerId = decode(str, fields)
+                conDesc.contract.description = read_str(fields)
+                conDesc.contract.issuerId = read_str(fields)
 
         self.wrapper.symbolSamples(reqId, contractDescriptions)
 
@@ -1458,15 +1635,15 @@ class Decoder(Object):
         self.wrapper.symbolSamples(reqId, contractDescriptions)
 
     def processSmartComponents(self, fields):
-        reqId = decode(int, fields)
-        n = decode(int, fields)
+        reqId = read_int(fields)
+        n = read_int(fields)
 
         smartComponentMap = []
         for _ in range(n):
             smartComponent = SmartComponent()
-            smartComponent.bitNumber = decode(int, fields)
-            smartComponent.exchange = decode(str, fields)
-            smartComponent.exchangeLetter = decode(str, fields)
+            smartComponent.bitNumber = read_int(fields)
+            smartComponent.exchange = read_str(fields)
+            smartComponent.exchangeLetter = read_str(fields)
             smartComponentMap.append(smartComponent)
 
         self.wrapper.smartComponents(reqId, smartComponentMap)
@@ -1486,10 +1663,10 @@ class Decoder(Object):
         self.wrapper.smartComponents(reqId, smartComponentsMap)
 
     def processTickReqParams(self, fields):
-        tickerId = decode(int, fields)
-        minTick = decode(float, fields)
-        bboExchange = decode(str, fields)
-        snapshotPermissions = decode(int, fields)
+        tickerId = read_int(fields)
+        minTick = read_float(fields)
+        bboExchange = read_str(fields)
+        snapshotPermissions = read_int(fields)
         self.wrapper.tickReqParams(tickerId, minTick, bboExchange, snapshotPermissions)
 
     def processTickReqParamsMsgProtoBuf(self, protobuf):
@@ -1507,19 +1684,19 @@ class Decoder(Object):
 
     def processMktDepthExchanges(self, fields):
         depthMktDataDescriptions = []
-        nDepthMktDataDescriptions = decode(int, fields)
+        nDepthMktDataDescriptions = read_int(fields)
 
         if nDepthMktDataDescriptions > 0:
             for _ in range(nDepthMktDataDescriptions):
                 desc = DepthMktDataDescription()
-                desc.exchange = decode(str, fields)
-                desc.secType = decode(str, fields)
+                desc.exchange = read_str(fields)
+                desc.secType = read_str(fields)
                 if self.serverVersion >= MIN_SERVER_VER_SERVICE_DATA_TYPE:
-                    desc.listingExch = decode(str, fields)
-                    desc.serviceDataType = decode(str, fields)
-                    desc.aggGroup = decode(int, fields)
+                    desc.listingExch = read_str(fields)
+                    desc.serviceDataType = read_str(fields)
+                    desc.aggGroup = read_int(fields)
                 else:
-                    decode(int, fields)  # boolean notSuppIsL2
+                    read_int(fields)  # boolean notSuppIsL2
                 depthMktDataDescriptions.append(desc)
 
         self.wrapper.mktDepthExchanges(depthMktDataDescriptions)
@@ -1538,8 +1715,8 @@ class Decoder(Object):
         self.wrapper.mktDepthExchanges(depthMktDataDescriptions)
 
     def processHeadTimestamp(self, fields):
-        reqId = decode(int, fields)
-        headTimestamp = decode(str, fields)
+        reqId = read_int(fields)
+        headTimestamp = read_str(fields)
         self.wrapper.headTimestamp(reqId, headTimestamp)
 
     def processHeadTimestampMsgProtoBuf(self, protobuf):
@@ -1554,12 +1731,12 @@ class Decoder(Object):
         self.wrapper.headTimestamp(reqId, headTimestamp)
 
     def processTickNews(self, fields):
-        tickerId = decode(int, fields)
-        timeStamp = decode(int, fields)
-        providerCode = decode(str, fields)
-        articleId = decode(str, fields)
-        headline = decode(str, fields)
-        extraData = decode(str, fields)
+        tickerId = read_int(fields)
+        timeStamp = read_int(fields)
+        providerCode = read_str(fields)
+        articleId = read_str(fields)
+        headline = read_str(fields)
+        extraData = read_str(fields)
         self.wrapper.tickNews(
             tickerId, timeStamp, providerCode, articleId, headline, extraData
         )
@@ -1581,12 +1758,12 @@ class Decoder(Object):
 
     def processNewsProviders(self, fields):
         newsProviders = []
-        nNewsProviders = decode(int, fields)
+        nNewsProviders = read_int(fields)
         if nNewsProviders > 0:
             for _ in range(nNewsProviders):
                 provider = NewsProvider()
-                provider.code = decode(str, fields)
-                provider.name = decode(str, fields)
+                provider.code = read_str(fields)
+                provider.name = read_str(fields)
                 newsProviders.append(provider)
 
         self.wrapper.newsProviders(newsProviders)
@@ -1608,9 +1785,9 @@ class Decoder(Object):
         self.wrapper.newsProviders(newsProviders)
 
     def processNewsArticle(self, fields):
-        reqId = decode(int, fields)
-        articleType = decode(int, fields)
-        articleText = decode(str, fields)
+        reqId = read_int(fields)
+        articleType = read_int(fields)
+        articleText = read_str(fields)
         self.wrapper.newsArticle(reqId, articleType, articleText)
 
     def processNewsArticleMsgProtoBuf(self, protobuf):
@@ -1626,11 +1803,11 @@ class Decoder(Object):
         self.wrapper.newsArticle(reqId, articleType, articleText)
 
     def processHistoricalNews(self, fields):
-        requestId = decode(int, fields)
-        time = decode(str, fields)
-        providerCode = decode(str, fields)
-        articleId = decode(str, fields)
-        headline = decode(str, fields)
+        requestId = read_int(fields)
+        time = read_str(fields)
+        providerCode = read_str(fields)
+        articleId = read_str(fields)
+        headline = read_str(fields)
         self.wrapper.historicalNews(requestId, time, providerCode, articleId, headline)
 
     def processHistoricalNewsMsgProtoBuf(self, protobuf):
@@ -1648,8 +1825,8 @@ class Decoder(Object):
         self.wrapper.historicalNews(reqId, time, providerCode, articleId, headline)
 
     def processHistoricalNewsEnd(self, fields):
-        reqId = decode(int, fields)
-        hasMore = decode(bool, fields)
+        reqId = read_int(fields)
+        hasMore = read_bool(fields)
         self.wrapper.historicalNewsEnd(reqId, hasMore)
 
     def processHistoricalNewsEndMsgProtoBuf(self, protobuf):
@@ -1664,14 +1841,14 @@ class Decoder(Object):
         self.wrapper.historicalNewsEnd(reqId, hasMore)
 
     def processHistogramData(self, fields):
-        reqId = decode(int, fields)
-        numPoints = decode(int, fields)
+        reqId = read_int(fields)
+        numPoints = read_int(fields)
 
         histogram = []
         for _ in range(numPoints):
             dataPoint = HistogramData()
-            dataPoint.price = decode(float, fields)
-            dataPoint.size = decode(Decimal, fields)
+            dataPoint.price = read_float(fields)
+            dataPoint.size = read_decimal(fields)
             histogram.append(dataPoint)
 
         self.wrapper.histogramData(reqId, histogram)
@@ -1693,9 +1870,9 @@ class Decoder(Object):
         self.wrapper.histogramData(reqId, histogram)
 
     def processRerouteMktDataReq(self, fields):
-        reqId = decode(int, fields)
-        conId = decode(int, fields)
-        exchange = decode(str, fields)
+        reqId = read_int(fields)
+        conId = read_int(fields)
+        exchange = read_str(fields)
 
         self.wrapper.rerouteMktDataReq(reqId, conId, exchange)
 
@@ -1712,9 +1889,9 @@ class Decoder(Object):
         self.wrapper.rerouteMktDataReq(reqId, conId, exchange)
 
     def processRerouteMktDepthReq(self, fields):
-        reqId = decode(int, fields)
-        conId = decode(int, fields)
-        exchange = decode(str, fields)
+        reqId = read_int(fields)
+        conId = read_int(fields)
+        exchange = read_str(fields)
 
         self.wrapper.rerouteMktDepthReq(reqId, conId, exchange)
 
@@ -1731,16 +1908,16 @@ class Decoder(Object):
         self.wrapper.rerouteMktDepthReq(reqId, conId, exchange)
 
     def processMarketRuleMsg(self, fields):
-        marketRuleId = decode(int, fields)
+        marketRuleId = read_int(fields)
 
-        nPriceIncrements = decode(int, fields)
+        nPriceIncrements = read_int(fields)
         priceIncrements = []
 
         if nPriceIncrements > 0:
             for _ in range(nPriceIncrements):
                 prcInc = PriceIncrement()
-                prcInc.lowEdge = decode(float, fields)
-                prcInc.increment = decode(float, fields)
+                prcInc.lowEdge = read_float(fields)
+                prcInc.increment = read_float(fields)
                 priceIncrements.append(prcInc)
 
         self.wrapper.marketRule(marketRuleId, priceIncrements)
@@ -1762,16 +1939,16 @@ class Decoder(Object):
         self.wrapper.marketRule(marketRuleId, priceIncrements)
 
     def processPnLMsg(self, fields):
-        reqId = decode(int, fields)
-        dailyPnL = decode(float, fields)
+        reqId = read_int(fields)
+        dailyPnL = read_float(fields)
         unrealizedPnL = None
         realizedPnL = None
 
         if self.serverVersion >= MIN_SERVER_VER_UNREALIZED_PNL:
-            unrealizedPnL = decode(float, fields)
+            unrealizedPnL = read_float(fields)
 
         if self.serverVersion >= MIN_SERVER_VER_REALIZED_PNL:
-            realizedPnL = decode(float, fields)
+            realizedPnL = read_float(fields)
 
         self.wrapper.pnl(reqId, dailyPnL, unrealizedPnL, realizedPnL)
 
@@ -1789,19 +1966,19 @@ class Decoder(Object):
         self.wrapper.pnl(reqId, dailyPnL, unrealizedPnL, realizedPnL)
 
     def processPnLSingleMsg(self, fields):
-        reqId = decode(int, fields)
-        pos = decode(Decimal, fields)
-        dailyPnL = decode(float, fields)
+        reqId = read_int(fields)
+        pos = read_decimal(fields)
+        dailyPnL = read_float(fields)
         unrealizedPnL = None
         realizedPnL = None
 
         if self.serverVersion >= MIN_SERVER_VER_UNREALIZED_PNL:
-            unrealizedPnL = decode(float, fields)
+            unrealizedPnL = read_float(fields)
 
         if self.serverVersion >= MIN_SERVER_VER_REALIZED_PNL:
-            realizedPnL = decode(float, fields)
+            realizedPnL = read_float(fields)
 
-        value = decode(float, fields)
+        value = read_float(fields)
 
         self.wrapper.pnlSingle(reqId, pos, dailyPnL, unrealizedPnL, realizedPnL, value)
 
@@ -1821,20 +1998,26 @@ class Decoder(Object):
         self.wrapper.pnlSingle(reqId, pos, dailyPnL, unrealizedPnL, realizedPnL, value)
 
     def processHistoricalTicks(self, fields):
-        reqId = decode(int, fields)
-        tickCount = decode(int, fields)
+        reqId = read_int(fields)
+        tickCount = read_int(fields)
+
+        if self.historicalTicksArrays:
+            arrays = readHistoricalTicksArrays(fields, tickCount)
+            done = read_bool(fields)
+            self.wrapper.historicalTicksArray(reqId, arrays, done)
+            return
 
         ticks = []
 
         for _ in range(tickCount):
             historicalTick = HistoricalTick()
-            historicalTick.time = decode(int, fields)
+            historicalTick.time = read_int(fields)
             next(fields)  # for consistency
-            historicalTick.price = decode(float, fields)
-            historicalTick.size = decode(Decimal, fields)
+            historicalTick.price = read_float(fields)
+            historicalTick.size = read_decimal(fields)
             ticks.append(historicalTick)
 
-        done = decode(bool, fields)
+        done = read_bool(fields)
 
         self.wrapper.historicalTicks(reqId, ticks, done)
 
@@ -1846,7 +2029,12 @@ class Decoder(Object):
 
         reqId = historicalTicksProto.reqId if historicalTicksProto.HasField('reqId') else NO_VALID_ID
         isDone = historicalTicksProto.isDone if historicalTicksProto.HasField('isDone') else False
-    
+
+        if self.historicalTicksArrays:
+            arrays = historicalTicksArraysFromProto(historicalTicksProto.historicalTicks)
+            self.wrapper.historicalTicksArray(reqId, arrays, isDone)
+            return
+
         historicalTicks = []
         if historicalTicksProto.historicalTicks:
             for historicalTickProto in historicalTicksProto.historicalTicks:
@@ -1856,26 +2044,32 @@ class Decoder(Object):
         self.wrapper.historicalTicks(reqId, historicalTicks, isDone)
 
     def processHistoricalTicksBidAsk(self, fields):
-        reqId = decode(int, fields)
-        tickCount = decode(int, fields)
+        reqId = read_int(fields)
+        tickCount = read_int(fields)
+
+        if self.historicalTicksArrays:
+            arrays = readHistoricalTicksBidAskArrays(fields, tickCount)
+            done = read_bool(fields)
+            self.wrapper.historicalTicksBidAskArray(reqId, arrays, done)
+            return
 
         ticks = []
 
         for _ in range(tickCount):
             historicalTickBidAsk = HistoricalTickBidAsk()
-            historicalTickBidAsk.time = decode(int, fields)
-            mask = decode(int, fields)
+            historicalTickBidAsk.time = read_int(fields)
+            mask = read_int(fields)
             tickAttribBidAsk = TickAttribBidAsk()
             tickAttribBidAsk.askPastHigh = mask & 1 != 0
             tickAttribBidAsk.bidPastLow = mask & 2 != 0
             historicalTickBidAsk.tickAttribBidAsk = tickAttribBidAsk
-            historicalTickBidAsk.priceBid = decode(float, fields)
-            historicalTickBidAsk.priceAsk = decode(float, fields)
-            historicalTickBidAsk.sizeBid = decode(Decimal, fields)
-            historicalTickBidAsk.sizeAsk = decode(Decimal, fields)
+            historicalTickBidAsk.priceBid = read_float(fields)
+            historicalTickBidAsk.priceAsk = read_float(fields)
+            historicalTickBidAsk.sizeBid = read_decimal(fields)
+            historicalTickBidAsk.sizeAsk = read_decimal(fields)
             ticks.append(historicalTickBidAsk)
 
-        done = decode(bool, fields)
+        done = read_bool(fields)
 
         self.wrapper.historicalTicksBidAsk(reqId, ticks, done)
 
@@ -1887,7 +2081,12 @@ class Decoder(Object):
 
         reqId = historicalTicksBidAskProto.reqId if historicalTicksBidAskProto.HasField('reqId') else NO_VALID_ID
         isDone = historicalTicksBidAskProto.isDone if historicalTicksBidAskProto.HasField('isDone') else False
-    
+
+        if self.historicalTicksArrays:
+            arrays = historicalTicksBidAskArraysFromProto(historicalTicksBidAskProto.historicalTicksBidAsk)
+            self.wrapper.historicalTicksBidAskArray(reqId, arrays, isDone)
+            return
+
         historicalTicksBidAsk = []
         if historicalTicksBidAskProto.historicalTicksBidAsk:
             for historicalTickBidAskProto in historicalTicksBidAskProto.historicalTicksBidAsk:
@@ -1897,26 +2096,32 @@ class Decoder(Object):
         self.wrapper.historicalTicksBidAsk(reqId, historicalTicksBidAsk, isDone)
 
     def processHistoricalTicksLast(self, fields):
-        reqId = decode(int, fields)
-        tickCount = decode(int, fields)
+        reqId = read_int(fields)
+        tickCount = read_int(fields)
+
+        if self.historicalTicksArrays:
+            arrays = readHistoricalTicksLastArrays(fields, tickCount, self.tickStrings)
+            done = read_bool(fields)
+            self.wrapper.historicalTicksLastArray(reqId, arrays, done)
+            return
 
         ticks = []
 
         for _ in range(tickCount):
             historicalTickLast = HistoricalTickLast()
-            historicalTickLast.time = decode(int, fields)
-            mask = decode(int, fields)
+            historicalTickLast.time = read_int(fields)
+            mask = read_int(fields)
             tickAttribLast = TickAttribLast()
             tickAttribLast.pastLimit = mask & 1 != 0
             tickAttribLast.unreported = mask & 2 != 0
             historicalTickLast.tickAttribLast = tickAttribLast
-            historicalTickLast.price = decode(float, fields)
-            historicalTickLast.size = decode(Decimal, fields)
-            historicalTickLast.exchange = decode(str, fields)
-            historicalTickLast.specialConditions = decode(str, fields)
+            historicalTickLast.price = read_float(fields)
+            historicalTickLast.size = read_decimal(fields)
+            historicalTickLast.exchange = read_str(fields)
+            historicalTickLast.specialConditions = read_str(fields)
             ticks.append(historicalTickLast)
 
-        done = decode(bool, fields)
+        done = read_bool(fields)
 
         self.wrapper.historicalTicksLast(reqId, ticks, done)
 
@@ -1928,7 +2133,12 @@ class Decoder(Object):
 
         reqId = historicalTicksLastProto.reqId if historicalTicksLastProto.HasField('reqId') else NO_VALID_ID
         isDone = historicalTicksLastProto.isDone if historicalTicksLastProto.HasField('isDone') else False
-    
+
+        if self.historicalTicksArrays:
+            arrays = historicalTicksLastArraysFromProto(historicalTicksLastProto.historicalTicksLast, self.tickStrings)
+            self.wrapper.historicalTicksLastArray(reqId, arrays, isDone)
+            return
+
         historicalTicksLast = []
         if historicalTicksLastProto.historicalTicksLast:
             for historicalTickLastProto in historicalTicksLastProto.historicalTicksLast:
@@ -1938,24 +2148,27 @@ class Decoder(Object):
         self.wrapper.historicalTicksLast(reqId, historicalTicksLast, isDone)
 
     def processTickByTickMsg(self, fields):
-        reqId = decode(int, fields)
-        tickType = decode(int, fields)
-        time = decode(int, fields)
+        reqId = read_int(fields)
+        tickType = read_int(fields)
+        time = read_int(fields)
 
         if tickType == 0:
             # None
             pass
         elif tickType == 1 or tickType == 2:
             # Last or AllLast
-            price = decode(float, fields)
-            size = decode(Decimal, fields)
-            mask = decode(int, fields)
+            price = read_float(fields)
+            size = read_decimal(fields)
+            mask = read_int(fields)
 
             tickAttribLast = TickAttribLast()
             tickAttribLast.pastLimit = mask & 1 != 0
             tickAttribLast.unreported = mask & 2 != 0
-            exchange = decode(str, fields)
-            specialConditions = decode(str, fields)
+            exchange = read_str(fields)
+            specialConditions = read_str(fields)
+
+            if self.barAggregator is not None:
+                self.barAggregator.addTrade(reqId, time, price, size)
 
             self.wrapper.tickByTickAllLast(
                 reqId,
@@ -1969,11 +2182,11 @@ class Decoder(Object):
             )
         elif tickType == 3:
             # BidAsk
-            bidPrice = decode(float, fields)
-            askPrice = decode(float, fields)
-            bidSize = decode(Decimal, fields)
-            askSize = decode(Decimal, fields)
-            mask = decode(int, fields)
+            bidPrice = read_float(fields)
+            askPrice = read_float(fields)
+            bidSize = read_decimal(fields)
+            askSize = read_decimal(fields)
+            mask = read_int(fields)
             tickAttribBidAsk = TickAttribBidAsk()
             tickAttribBidAsk.bidPastLow = mask & 1 != 0
             tickAttribBidAsk.askPastHigh = mask & 2 != 0
@@ -1983,7 +2196,10 @@ class Decoder(Object):
             )
         elif tickType == 4:
             # MidPoint
-            midPoint = decode(float, fields)
+            midPoint = read_float(fields)
+
+            if self.barAggregator is not None:
+                self.barAggregator.addTrade(reqId, time, midPoint, UNSET_DECIMAL)
 
             self.wrapper.tickByTickMidPoint(reqId, time, midPoint)
 
@@ -2003,6 +2219,10 @@ class Decoder(Object):
             # Last or AllLast
             if tickByTickDataProto.HasField('historicalTickLast'):
                 historicalTickLast = decodeHistoricalTickLast(tickByTickDataProto.historicalTickLast)
+                if self.barAggregator is not None:
+                    self.barAggregator.addTrade(
+                        reqId, historicalTickLast.time, historicalTickLast.price, historicalTickLast.size
+                    )
                 self.wrapper.tickByTickAllLast(
                     reqId,
                     tickType,
@@ -2030,12 +2250,14 @@ class Decoder(Object):
             # MidPoint
             if tickByTickDataProto.HasField('historicalTickMidPoint'):
                 historicalTick = decodeHistoricalTick(tickByTickDataProto.historicalTickMidPoint)
+                if self.barAggregator is not None:
+                    self.barAggregator.addTrade(reqId, historicalTick.time, historicalTick.price, UNSET_DECIMAL)
                 self.wrapper.tickByTickMidPoint(reqId, historicalTick.time, historicalTick.price)
 
     def processOrderBoundMsg(self, fields):
-        permId = decode(int, fields)
-        clientId = decode(int, fields)
-        orderId = decode(int, fields)
+        permId = read_int(fields)
+        clientId = read_int(fields)
+        orderId = read_int(fields)
 
         self.wrapper.orderBound(permId, clientId, orderId)
 
@@ -2052,14 +2274,19 @@ class Decoder(Object):
         self.wrapper.orderBound(permId, clientId, orderId)
 
     def processMarketDepthMsg(self, fields):
-        decode(int, fields)
-        reqId = decode(int, fields)
+        read_int(fields)
+        reqId = read_int(fields)
+
+        position = read_int(fields)
+        operation = read_int(fields)
+        side = read_int(fields)
+        price = read_float(fields)
+        size = read_decimal(fields)
 
-        position = decode(int, fields)
-        operation = decode(int, fields)
-        side = decode(int, fields)
-        price = decode(float, fields)
-        size = decode(Decimal, fields)
+        if self.orderBooks is not None:
+            self.orderBooks.update(reqId, position, "", operation, side, price, size)
+            if not self.orderBooks.forwardDepth:
+                return
 
         self.wrapper.updateMktDepth(reqId, position, operation, side, price, size)
 
@@ -2067,7 +2294,8 @@ class Decoder(Object):
         marketDepthProto = MarketDepthProto()
         marketDepthProto.ParseFromString(protobuf)
 
-        self.wrapper.updateMarketDepthProtoBuf(marketDepthProto)
+        if self.orderBooks is None or self.orderBooks.forwardDepth:
+            self.wrapper.updateMarketDepthProtoBuf(marketDepthProto)
 
         reqId = marketDepthProto.reqId if marketDepthProto.HasField('reqId') else NO_VALID_ID
 
@@ -2082,22 +2310,34 @@ class Decoder(Object):
         price = marketDepthDataProto.price if marketDepthDataProto.HasField('price') else UNSET_DOUBLE
         size = Decimal(marketDepthDataProto.size) if marketDepthDataProto.HasField('size') else UNSET_DECIMAL
 
+        if self.orderBooks is not None:
+            self.orderBooks.update(reqId, position, "", operation, side, price, size)
+            if not self.orderBooks.forwardDepth:
+                return
+
         self.wrapper.updateMktDepth(reqId, position, operation, side, price, size)
 
     def processMarketDepthL2Msg(self, fields):
-        decode(int, fields)
-        reqId = decode(int, fields)
-
-        position = decode(int, fields)
-        marketMaker = decode(str, fields)
-        operation = decode(int, fields)
-        side = decode(int, fields)
-        price = decode(float, fields)
-        size = decode(Decimal, fields)
+        read_int(fields)
+        reqId = read_int(fields)
+
+        position = read_int(fields)
+        marketMaker = read_str(fields)
+        operation = read_int(fields)
+        side = read_int(fields)
+        price = read_float(fields)
+        size = read_decimal(fields)
         isSmartDepth = False
 
         if self.serverVersion >= MIN_SERVER_VER_SMART_DEPTH:
-            isSmartDepth = decode(bool, fields)
+            isSmartDepth = read_bool(fields)
+
+        if self.orderBooks is not None:
+            self.orderBooks.update(
+                reqId, position, marketMaker, operation, side, price, size, isSmartDepth
+            )
+            if not self.orderBooks.forwardDepth:
+                return
 
         self.wrapper.updateMktDepthL2(
             reqId, position, marketMaker, operation, side, price, size, isSmartDepth
@@ -2107,7 +2347,8 @@ class Decoder(Object):
         marketDepthL2Proto = MarketDepthL2Proto()
         marketDepthL2Proto.ParseFromString(protobuf)
 
-        self.wrapper.updateMarketDepthL2ProtoBuf(marketDepthL2Proto)
+        if self.orderBooks is None or self.orderBooks.forwardDepth:
+            self.wrapper.updateMarketDepthL2ProtoBuf(marketDepthL2Proto)
 
         reqId = marketDepthL2Proto.reqId if marketDepthL2Proto.HasField('reqId') else NO_VALID_ID
 
@@ -2124,6 +2365,11 @@ class Decoder(Object):
         size = Decimal(marketDepthDataProto.size) if marketDepthDataProto.HasField('size') else UNSET_DECIMAL
         isSmartDepth = marketDepthDataProto.isSmartDepth if marketDepthDataProto.HasField('isSmartDepth') else False
 
+        if self.orderBooks is not None:
+            self.orderBooks.update(reqId, position, marketMaker, operation, side, price, size, isSmartDepth)
+            if not self.orderBooks.forwardDepth:
+                return
+
         self.wrapper.updateMktDepthL2(reqId, position, marketMaker, operation, side, price, size, isSmartDepth)
 
     def processCompletedOrderMsg(self, fields):
@@ -2241,8 +2487,8 @@ class Decoder(Object):
         self.wrapper.completedOrdersEnd()
 
     def processReplaceFAEndMsg(self, fields):
-        reqId = decode(int, fields)
-        text = decode(str, fields)
+        reqId = read_int(fields)
+        text = read_str(fields)
 
         self.wrapper.replaceFAEnd(reqId, text)
 
@@ -2258,8 +2504,8 @@ class Decoder(Object):
         self.wrapper.replaceFAEnd(reqId, text)
 
     def processWshMetaDataMsg(self, fields):
-        reqId = decode(int, fields)
-        dataJson = decode(str, fields)
+        reqId = read_int(fields)
+        dataJson = read_str(fields)
 
         self.wrapper.wshMetaData(reqId, dataJson)
 
@@ -2275,8 +2521,8 @@ class Decoder(Object):
         self.wrapper.wshMetaData(reqId, dataJson)
 
     def processWshEventDataMsg(self, fields):
-        reqId = decode(int, fields)
-        dataJson = decode(str, fields)
+        reqId = read_int(fields)
+        dataJson = read_str(fields)
 
         self.wrapper.wshEventData(reqId, dataJson)
 
@@ -2292,19 +2538,19 @@ class Decoder(Object):
         self.wrapper.wshEventData(reqId, dataJson)
 
     def processHistoricalSchedule(self, fields):
-        reqId = decode(int, fields)
-        startDateTime = decode(str, fields)
-        endDateTime = decode(str, fields)
-        timeZone = decode(str, fields)
-        sessionsCount = decode(int, fields)
+        reqId = read_int(fields)
+        startDateTime = read_str(fields)
+        endDateTime = read_str(fields)
+        timeZone = read_str(fields)
+        sessionsCount = read_int(fields)
 
         sessions = []
 
         for _ in range(sessionsCount):
             historicalSession = HistoricalSession()
-            historicalSession.startDateTime = decode(str, fields)
-            historicalSession.endDateTime = decode(str, fields)
-            historicalSession.refDate = decode(str, fields)
+            historicalSession.startDateTime = read_str(fields)
+            historicalSession.endDateTime = read_str(fields)
+            historicalSession.refDate = read_str(fields)
             sessions.append(historicalSession)
 
         self.wrapper.historicalSchedule(
@@ -2334,8 +2580,8 @@ class Decoder(Object):
         self.wrapper.historicalSchedule(reqId, startDateTime, endDateTime, timeZone, sessions)
 
     def processUserInfo(self, fields):
-        reqId = decode(int, fields)
-        whiteBrandingId = decode(str, fields)
+        reqId = read_int(fields)
+        whiteBrandingId = read_str(fields)
 
         self.wrapper.userInfo(reqId, whiteBrandingId)
 
@@ -2351,7 +2597,7 @@ class Decoder(Object):
         self.wrapper.userInfo(reqId, whiteBrandingId)
 
     def processCurrentTimeInMillis(self, fields):
-        timeInMillis = decode(int, fields)
+        timeInMillis = read_int(fields)
 
         self.wrapper.currentTimeInMillis(timeInMillis)
 
@@ -2367,18 +2613,23 @@ class Decoder(Object):
 
     def processErrorMsg(self, fields):
         if self.serverVersion < MIN_SERVER_VER_ERROR_TIME:
-            decode(int, fields)
-        reqId = decode(TickerId, fields)
-        errorCode = decode(int, fields)
-        errorString = decode(
-            str, fields, False, self.serverVersion >= MIN_SERVER_VER_ENCODE_MSG_ASCII7
+            read_int(fields)
+        reqId = read_int(fields)
+        errorCode = read_int(fields)
+        errorString = read_str(
+            fields, self.serverVersion >= MIN_SERVER_VER_ENCODE_MSG_ASCII7
         )
         advancedOrderRejectJson = ""
         if self.serverVersion >= MIN_SERVER_VER_ADVANCED_ORDER_REJECT:
-            advancedOrderRejectJson = decode(str, fields, False, True)
+            advancedOrderRejectJson = read_str(fields, True)
         errorTime = 0
         if self.serverVersion >= MIN_SERVER_VER_ERROR_TIME:
-            errorTime = decode(int, fields)
+            errorTime = read_int(fields)
+
+        if self.orderBooks is not None and errorCode == MKT_DEPTH_RESET:
+            self.orderBooks.clear(reqId)
+        if self.contractDetailsCache is not None:
+            self.contractDetailsCache.discard(reqId)
 
         self.wrapper.error(reqId, errorTime, errorCode, errorString, advancedOrderRejectJson)
 
@@ -2394,18 +2645,28 @@ class Decoder(Object):
         advancedOrderRejectJson = errorMessageProto.advancedOrderRejectJson if errorMessageProto.HasField('advancedOrderRejectJson') else ""
         errorTime = errorMessageProto.errorTime if errorMessageProto.HasField('errorTime') else 0
 
+        if self.orderBooks is not None and errorCode == MKT_DEPTH_RESET:
+            self.orderBooks.clear(reqId)
+        if self.contractDetailsCache is not None:
+            self.contractDetailsCache.discard(reqId)
+
         self.wrapper.error(reqId, errorTime, errorCode, errorMsg, advancedOrderRejectJson)
 
     def processTickStringMsgProtoBuf(self, protobuf):
         tickStringProto = TickStringProto()
         tickStringProto.ParseFromString(protobuf)
 
-        self.wrapper.tickStringProtoBuf(tickStringProto)
-
         reqId = tickStringProto.reqId if tickStringProto.HasField('reqId') else NO_VALID_ID
         tickType = tickStringProto.tickType if tickStringProto.HasField('tickType') else UNSET_INTEGER
         value = tickStringProto.value if tickStringProto.HasField('value') else ""
 
+        if self.tickStore is not None:
+            self.tickStore.updateString(reqId, tickType, value)
+            if not self.tickStore.forwardTicks:
+                return
+
+        self.wrapper.tickStringProtoBuf(tickStringProto)
+
         if tickType != TickTypeEnum.NOT_SET:
             self.wrapper.tickString(reqId, tickType, value)
 
@@ -2413,12 +2674,17 @@ class Decoder(Object):
         tickGenericProto = TickGenericProto()
         tickGenericProto.ParseFromString(protobuf)
 
-        self.wrapper.tickGenericProtoBuf(tickGenericProto)
-
         reqId = tickGenericProto.reqId if tickGenericProto.HasField('reqId') else NO_VALID_ID
         tickType = tickGenericProto.tickType if tickGenericProto.HasField('tickType') else UNSET_INTEGER
         value = tickGenericProto.value if tickGenericProto.HasField('value') else UNSET_DOUBLE
 
+        if self.tickStore is not None:
+            self.tickStore.update(reqId, tickType, value)
+            if not self.tickStore.forwardTicks:
+                return
+
+        self.wrapper.tickGenericProtoBuf(tickGenericProto)
+
         if tickType != TickTypeEnum.NOT_SET:
             self.wrapper.tickGeneric(reqId, tickType, value)
 
@@ -2665,7 +2931,7 @@ class Decoder(Object):
     ######################################################################
 
     def readLastTradeDate(self, fields, contract: ContractDetails, isBond: bool):
-        lastTradeDateOrContractMonth = decode(str, fields)
+        lastTradeDateOrContractMonth = read_str(fields)
         setLastTradeDate(lastTradeDateOrContractMonth, contract, isBond)
 
     ######################################################################
@@ -2682,6 +2948,7 @@ class Decoder(Object):
             handleInfo = meth2handleInfo.get(meth, None)
             if handleInfo is not None:
                 handleInfo.wrapperParams = sig.parameters
+                handleInfo.compileWrapperDecoder()
 
             # for (pname, param) in sig.parameters.items():
             #     logger.debug("\tparam %s %s %s", pname, param.name, param.annotation)
@@ -2697,51 +2964,11 @@ class Decoder(Object):
                         )
 
     def interpretWithSignature(self, fields, handleInfo):
-        if handleInfo.wrapperParams is None:
+        if handleInfo.wrapperDecoder is None:
             logger.debug("%s: no param info in %s", fields, handleInfo)
             return
 
-        nIgnoreFields = 1  # bypass msgId faster this way
-        if len(fields) - nIgnoreFields != len(handleInfo.wrapperParams) - 1:
-            logger.error(
-                "diff len fields and params %d %d for fields: %s and handleInfo: %s",
-                len(fields),
-                len(handleInfo.wrapperParams),
-                fields,
-                handleInfo,
-            )
-            return
-
-        fieldIdx = nIgnoreFields
-        args = []
-        for pname, param in handleInfo.wrapperParams.items():
-            if pname != "self":
-                logger.debug("field %s ", fields[fieldIdx])
-                try:
-                    arg = fields[fieldIdx].decode(
-                        "unicode-escape"
-                        if self.serverVersion >= MIN_SERVER_VER_ENCODE_MSG_ASCII7
-                        else "UTF-8"
-                    )
-                except UnicodeDecodeError:
-                    arg = fields[fieldIdx].decode("latin-1")
-                logger.debug("arg %s type %s", arg, param.annotation)
-                if param.annotation is int:
-                    arg = int(arg)
-                elif param.annotation is float:
-                    arg = float(arg)
-                elif param.annotation is Decimal:
-                    if arg is None or len(arg) == 0:
-                        return UNSET_DECIMAL
-                    else:
-                        return Decimal(arg)
-
-                args.append(arg)
-                fieldIdx += 1
-
-        method = getattr(self.wrapper, handleInfo.wrapperMeth.__name__)
-        logger.debug("calling %s with %s %s", method, self.wrapper, args)
-        method(*args)
+        handleInfo.wrapperDecoder(self, fields)
 
     def interpret(self, fields, msgId):
         if msgId == 0:
@@ -2757,7 +2984,8 @@ class Decoder(Object):
 
         try:
             if handleInfo.wrapperMeth is not None:
-                logger.debug("In interpret(), handleInfo: %s", handleInfo)
+                if utils.TRACE:
+                    logger.debug("In interpret(), handleInfo: %s", handleInfo)
                 self.interpretWithSignature(fields, handleInfo)
             elif handleInfo.processMeth is not None:
                 handleInfo.processMeth(self, iter(fields))
@@ -2815,13 +3043,13 @@ class Decoder(Object):
         IN.SCANNER_PARAMETERS: HandleInfo(wrap=EWrapper.scannerParameters),
         IN.SCANNER_DATA: HandleInfo(proc=processScannerDataMsg),
         IN.TICK_OPTION_COMPUTATION: HandleInfo(proc=processTickOptionComputationMsg),
-        IN.TICK_GENERIC: HandleInfo(wrap=EWrapper.tickGeneric),
-        IN.TICK_STRING: HandleInfo(wrap=EWrapper.tickString),
+        IN.TICK_GENERIC: HandleInfo(proc=processTickGenericMsg),
+        IN.TICK_STRING: HandleInfo(proc=processTickStringMsg),
         IN.TICK_EFP: HandleInfo(wrap=EWrapper.tickEFP),
         IN.CURRENT_TIME: HandleInfo(wrap=EWrapper.currentTime),
         IN.REAL_TIME_BARS: HandleInfo(proc=processRealTimeBarMsg),
         IN.FUNDAMENTAL_DATA: HandleInfo(wrap=EWrapper.fundamentalData),
-        IN.CONTRACT_DATA_END: HandleInfo(wrap=EWrapper.contractDetailsEnd),
+        IN.CONTRACT_DATA_END: HandleInfo(proc=processContractDataEndMsg),
         IN.OPEN_ORDER_END: HandleInfo(wrap=EWrapper.openOrderEnd),
         IN.ACCT_DOWNLOAD_END: HandleInfo(wrap=EWrapper.accountDownloadEnd),
         IN.EXECUTION_DATA_END: HandleInfo(wrap=EWrapper.execDetailsEnd),
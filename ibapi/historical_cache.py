@@ -0,0 +1,401 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+On disk cache of historical bars and ticks, in front of a HistoricalDownloader.
+A series is keyed by (conId, barSize, whatToShow, useRTH), "ticks" standing
+for the bar size of the historical ticks. Each downloaded window of a series
+is one file, named after the [start, end) range it covers, holding the rows
+as contiguous 8 bytes columns which are read back through mmap:
+
+    header   MAGIC, number of rows, number of columns
+    columns  time int64, then the float64/int64 columns of the kind
+
+A request only downloads the parts of its range no file covers yet, the
+result is merged from the files. Once the files take more than maxBytes the
+least recently used ones are deleted, after a request is answered and never
+those of a series a request is in the middle of.
+
+    cache = HistoricalCache("~/.ibapi/history", maxBytes=10 * 2**30)
+    bars = cache.downloadBars(downloader, contract, start, end, "1 min",
+                              "TRADES", useRTH=1).result()
+
+The ticks only keep their numeric fields: the tick attributes, exchange and
+special conditions of the cached ticks are lost. The part of a range which is
+not over yet, from the bar still forming on, is downloaded every time, it is
+never cached.
+"""
+
+import collections
+import concurrent.futures
+import datetime
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from decimal import Decimal
+
+from ibapi.common import BarData, HistoricalTick, HistoricalTickBidAsk, HistoricalTickLast
+from ibapi.const import UNSET_DECIMAL
+from ibapi.historical_downloader import barStart, toDatetime
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"IBHC0001"
+HEADER = struct.Struct("<8sQQ")
+
+# (name, typecode) of the columns of each kind, all of them 8 bytes wide
+BAR_COLUMNS = (
+    ("time", "q"),
+    ("open", "d"),
+    ("high", "d"),
+    ("low", "d"),
+    ("close", "d"),
+    ("volume", "d"),
+    ("wap", "d"),
+    ("barCount", "q"),
+)
+TICK_COLUMNS = (("time", "q"), ("price", "d"), ("size", "d"))
+BID_ASK_COLUMNS = (
+    ("time", "q"),
+    ("priceBid", "d"),
+    ("priceAsk", "d"),
+    ("sizeBid", "d"),
+    ("sizeAsk", "d"),
+)
+
+TICKS = "ticks"
+DAILY_BAR_SIZES = ("day", "week", "month")
+
+# seconds of the bar size units, a month at its longest
+BAR_SIZE_UNITS = {
+    "sec": 1,
+    "min": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 31 * 86400,
+}
+
+
+def decimalToFloat(value) -> float:
+    return math.nan if value == UNSET_DECIMAL else float(value)
+
+
+def floatToDecimal(value) -> Decimal:
+    return UNSET_DECIMAL if math.isnan(value) else Decimal(repr(value))
+
+
+def barSeconds(barSize) -> int:
+    """seconds of a bar, eg: 300 for 5 mins"""
+    count, unit = barSize.split()
+    return int(count) * BAR_SIZE_UNITS[unit.rstrip("s")]
+
+
+def completeEnd(barSize, now) -> int:
+    """end of the range holding only the bars already complete at now"""
+    if barSize == TICKS:
+        return now
+    seconds = barSeconds(barSize)
+    if seconds <= 900:
+        # on the quarter hours in every time zone
+        return now - now % seconds
+    # the longer bars start on the hours or days of the exchange: keep those
+    # which started a bar ago, the daily ones a day more for the sessions
+    # ending after midnight UTC
+    if seconds < 86400:
+        return now - seconds + 1
+    end = now - seconds - 86400
+    return end - end % 86400 + 86400
+
+
+def columnsOf(barSize, whatToShow):
+    if barSize != TICKS:
+        return BAR_COLUMNS
+    return BID_ASK_COLUMNS if whatToShow == "BID_ASK" else TICK_COLUMNS
+
+
+def writeColumns(path, columns, rows):
+    """rows are tuples in the order of columns"""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(rows), len(columns)))
+        for idx, (_, typecode) in enumerate(columns):
+            array(typecode, (row[idx] for row in rows)).tofile(f)
+    os.replace(tmp, path)
+
+
+def readColumns(path, columns) -> dict:
+    """{name: memoryview} of the columns of a file, backed by its mmap"""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError("truncated cache file %s" % path)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, nRows, nColumns = HEADER.unpack_from(mm)
+    if magic != MAGIC or nColumns != len(columns) or size != HEADER.size + nRows * nColumns * 8:
+        mm.close()
+        raise ValueError("bad cache file %s" % path)
+    view = memoryview(mm)
+    result = {}
+    for idx, (name, typecode) in enumerate(columns):
+        start = HEADER.size + idx * nRows * 8
+        result[name] = view[start : start + nRows * 8].cast(typecode)
+    return result
+
+
+class HistoricalCache:
+    def __init__(self, directory, maxBytes=1 << 30):
+        self.directory = os.path.expanduser(directory)
+        self.maxBytes = maxBytes
+        self.clock = time.time
+        self.lock = threading.Lock()
+        self.inUse = collections.Counter()  # seriesDir -> number of requests reading it
+        os.makedirs(self.directory, exist_ok=True)
+
+    def seriesDir(self, conId, barSize, whatToShow, useRTH) -> str:
+        name = "%d_%s_%s_%d" % (conId, barSize.replace(" ", ""), whatToShow, int(bool(useRTH)))
+        if len(name) > 100:
+            name = hashlib.sha1(name.encode()).hexdigest()
+        return os.path.join(self.directory, name)
+
+    def files(self, seriesDir) -> list:
+        """[(start, end, path), ...] sorted by start"""
+        try:
+            names = os.listdir(seriesDir)
+        except FileNotFoundError:
+            return []
+        files = []
+        for name in names:
+            if not name.endswith(".col"):
+                continue
+            start, _, end = name[:-4].partition("_")
+            files.append((int(start), int(end), os.path.join(seriesDir, name)))
+        return sorted(files)
+
+    def missing(self, seriesDir, start, end) -> list:
+        """[(start, end), ...] parts of [start, end) no file covers"""
+        gaps = []
+        cursor = start
+        for fileStart, fileEnd, _ in self.files(seriesDir):
+            if fileEnd <= cursor:
+                continue
+            if fileStart >= end:
+                break
+            if fileStart > cursor:
+                gaps.append((cursor, fileStart))
+            cursor = max(cursor, fileEnd)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def store(self, seriesDir, columns, start, end, rows):
+        os.makedirs(seriesDir, exist_ok=True)
+        writeColumns(os.path.join(seriesDir, "%d_%d.col" % (start, end)), columns, rows)
+
+    def pin(self, seriesDir):
+        with self.lock:
+            self.inUse[seriesDir] += 1
+
+    def unpin(self, seriesDir):
+        with self.lock:
+            self.inUse[seriesDir] -= 1
+            if not self.inUse[seriesDir]:
+                del self.inUse[seriesDir]
+
+    def read(self, seriesDir, columns, start, end) -> dict:
+        """{name: array} of the rows of [start, end), by time. A row is
+        keyed by its time and its rank among the rows of that time in its
+        file, the rows of files which overlap are only kept once."""
+        result = {name: array(typecode) for name, typecode in columns}
+        keys = []
+        seen = set()
+        for fileStart, fileEnd, path in self.files(seriesDir):
+            if fileEnd <= start or fileStart >= end:
+                continue
+            data = readColumns(path, columns)
+            times = data["time"]
+            keep = []
+            ranks = collections.Counter()
+            for i in range(len(times)):
+                t = times[i]
+                if not start <= t < end:
+                    continue
+                key = (t, ranks[t])
+                ranks[t] += 1
+                if key not in seen:
+                    seen.add(key)
+                    keys.append(key)
+                    keep.append(i)
+            for name, _ in columns:
+                column = data[name]
+                result[name].extend(column[i] for i in keep)
+            for column in data.values():
+                column.release()
+            os.utime(path)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return {name: array(column.typecode, (column[i] for i in order)) for name, column in result.items()}
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            total = 0
+            for root, _, names in os.walk(self.directory):
+                for name in names:
+                    if name.endswith(".col"):
+                        if root in self.inUse:
+                            continue
+                        path = os.path.join(root, name)
+                        st = os.stat(path)
+                        entries.append((st.st_mtime, st.st_size, path))
+                        total += st.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.maxBytes:
+                    break
+                logger.debug("evicting %s", path)
+                os.remove(path)
+                total -= size
+
+    def downloadBars(self, downloader, contract, start, end, barSize, whatToShow, useRTH=1):
+        """Future of the BarData list of [start, end), see
+        HistoricalDownloader.downloadBars(). The bar dates are epoch seconds
+        strings, as with formatDate=2, or yyyymmdd for the daily bars."""
+        daily = any(unit in barSize for unit in DAILY_BAR_SIZES)
+
+        def toRows(bars):
+            rows = []
+            for bar in bars:
+                rows.append(
+                    (barStart(bar), bar.open, bar.high, bar.low, bar.close,
+                     decimalToFloat(bar.volume), decimalToFloat(bar.wap), bar.barCount)
+                )
+            return rows
+
+        def toItems(data):
+            bars = []
+            for i in range(len(data["time"])):
+                bar = BarData()
+                t = data["time"][i]
+                bar.date = (
+                    datetime.datetime.fromtimestamp(t, datetime.timezone.utc).strftime("%Y%m%d")
+                    if daily else str(t)
+                )
+                bar.open = data["open"][i]
+                bar.high = data["high"][i]
+                bar.low = data["low"][i]
+                bar.close = data["close"][i]
+                bar.volume = floatToDecimal(data["volume"][i])
+                bar.wap = floatToDecimal(data["wap"][i])
+                bar.barCount = data["barCount"][i]
+                bars.append(bar)
+            return bars
+
+        def download(gapStart, gapEnd):
+            return downloader.downloadBars(
+                contract, gapStart, gapEnd, barSize, whatToShow, useRTH
+            ).future
+
+        return self.fetch(contract, barSize, whatToShow, useRTH, start, end, download, toRows, toItems)
+
+    def downloadTicks(self, downloader, contract, start, end, whatToShow, useRth=1):
+        """Future of the historical ticks of [start, end), see
+        HistoricalDownloader.downloadTicks()."""
+        bidAsk = whatToShow == "BID_ASK"
+        trades = whatToShow == "TRADES"
+
+        def toRows(ticks):
+            if bidAsk:
+                return [
+                    (tick.time, tick.priceBid, tick.priceAsk,
+                     decimalToFloat(tick.sizeBid), decimalToFloat(tick.sizeAsk))
+                    for tick in ticks
+                ]
+            return [(tick.time, tick.price, decimalToFloat(tick.size)) for tick in ticks]
+
+        def toItems(data):
+            ticks = []
+            for i in range(len(data["time"])):
+                if bidAsk:
+                    tick = HistoricalTickBidAsk()
+                    tick.priceBid = data["priceBid"][i]
+                    tick.priceAsk = data["priceAsk"][i]
+                    tick.sizeBid = floatToDecimal(data["sizeBid"][i])
+                    tick.sizeAsk = floatToDecimal(data["sizeAsk"][i])
+                else:
+                    tick = HistoricalTickLast() if trades else HistoricalTick()
+                    tick.price = data["price"][i]
+                    tick.size = floatToDecimal(data["size"][i])
+                tick.time = data["time"][i]
+                ticks.append(tick)
+            return ticks
+
+        def download(gapStart, gapEnd):
+            return downloader.downloadTicks(contract, gapStart, gapEnd, whatToShow, useRth).future
+
+        return self.fetch(contract, TICKS, whatToShow, useRth, start, end, download, toRows, toItems)
+
+    def fetch(self, contract, barSize, whatToShow, useRTH, start, end, download, toRows, toItems):
+        if not contract.conId:
+            raise ValueError("the contract conId is needed to cache its history")
+        start = int(toDatetime(start).timestamp())
+        end = int(toDatetime(end).timestamp())
+        seriesDir = self.seriesDir(contract.conId, barSize, whatToShow, useRTH)
+        columns = columnsOf(barSize, whatToShow)
+        result = concurrent.futures.Future()
+        # the files of the series stay until the request is answered
+        self.pin(seriesDir)
+        result.add_done_callback(lambda _: self.unpin(seriesDir))
+
+        # the part of the range not over yet is not cached
+        cacheEnd = min(end, completeEnd(barSize, int(self.clock())))
+        gaps = self.missing(seriesDir, start, cacheEnd) if start < cacheEnd else []
+        live = (max(start, cacheEnd), end) if end > cacheEnd else None
+        pending = [len(gaps) + (live is not None)]
+        liveItems = []
+        lock = threading.Lock()
+
+        def finish():
+            try:
+                items = toItems(self.read(seriesDir, columns, start, cacheEnd))
+            except Exception as exc:
+                result.set_exception(exc)
+                return
+            result.set_result(items + liveItems)
+            try:
+                self.evict()
+            except OSError as exc:
+                logger.warning("could not evict from %s: %s", self.directory, exc)
+
+        def done(gap, future):
+            if result.done():
+                return
+            exc = future.exception()
+            if exc is not None:
+                result.set_exception(exc)
+                return
+            if gap is live:
+                liveItems.extend(future.result())
+            else:
+                try:
+                    self.store(seriesDir, columns, gap[0], gap[1], toRows(future.result()))
+                except OSError as exc:
+                    logger.warning("could not cache %s: %s", seriesDir, exc)
+                    liveItems.extend(future.result())
+            with lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            finish()
+
+        if not pending[0]:
+            finish()
+            return result
+        for gap in gaps + ([live] if live else []):
+            download(gap[0], gap[1]).add_done_callback(lambda future, gap=gap: done(gap, future))
+        return result
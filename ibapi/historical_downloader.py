@@ -0,0 +1,479 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+The HistoricalDownloader backfills long date ranges of historical bars and
+ticks. A range is split into the largest chunks a single request may ask for
+the bar size, the chunks of all the downloads are sent by one scheduler
+thread as fast as the pacing rules of the historical data farm allow:
+
+    - at most 60 requests in any 10 minutes
+    - no identical request within 15 seconds
+    - at most 6 requests for the same contract, exchange and tick type in
+      2 seconds
+
+and the chunks rejected with a pacing violation (error 162), or left
+unanswered for requestTimeout seconds, are sent again later. The results are
+streamed out chunk by chunk as they come in.
+
+It works on top of a RequestFuturesWrapper based app:
+
+    class App(RequestFuturesWrapper, EClient):
+        ...
+
+    downloader = HistoricalDownloader(app)
+    download = downloader.downloadBars(
+        contract, start, end, "1 min", "TRADES", useRTH=1, onData=store)
+    download.future.result()
+
+The downloader works on BarData and HistoricalTick* items, a download fails
+with a TypeError if setHistoricalDataArrays(True) or
+setHistoricalTicksArrays(True) is on.
+"""
+
+import collections
+import concurrent.futures
+import datetime
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from ibapi.history_arrays import HistoricalDataArrays, TicksArrays
+from ibapi.request_futures import RequestError
+
+logger = logging.getLogger(__name__)
+
+HISTORICAL_DATA_ERROR = 162
+# the error 162 of a range without data, as opposed to a failed request
+NO_DATA_MSG = "hmds query returned no data"
+
+# largest duration in seconds of one reqHistoricalData by bar size
+MAX_CHUNK_SECONDS = {
+    "1 secs": 1800,
+    "5 secs": 3600,
+    "10 secs": 14400,
+    "15 secs": 14400,
+    "30 secs": 28800,
+    "1 min": 7 * 86400,
+    "2 mins": 14 * 86400,
+    "3 mins": 14 * 86400,
+    "5 mins": 28 * 86400,
+    "10 mins": 28 * 86400,
+    "15 mins": 28 * 86400,
+    "20 mins": 28 * 86400,
+    "30 mins": 28 * 86400,
+}
+MAX_CHUNK_SECONDS_DEFAULT = 365 * 86400
+
+TICKS_PER_REQUEST = 1000
+
+
+def toDatetime(value) -> datetime.datetime:
+    if isinstance(value, (int, float)):
+        return datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+def formatEndDateTime(value: datetime.datetime) -> str:
+    return value.astimezone(datetime.timezone.utc).strftime("%Y%m%d-%H:%M:%S")
+
+
+def formatDuration(seconds) -> str:
+    if seconds <= 86400:
+        return "%d S" % seconds
+    return "%d D" % -(-seconds // 86400)
+
+
+def splitRange(start, end, chunkSeconds) -> list:
+    """[(chunkStart, chunkEnd), ...] covering [start, end), newest first"""
+    chunks = []
+    chunkEnd = end
+    step = datetime.timedelta(seconds=chunkSeconds)
+    while chunkEnd > start:
+        chunkStart = max(start, chunkEnd - step)
+        chunks.append((chunkStart, chunkEnd))
+        chunkEnd = chunkStart
+    return chunks
+
+
+def barTime(bar):
+    """epoch seconds of an intraday bar received with formatDate=2, None for
+    the daily ones"""
+    date = bar.date.split(" ")[0]
+    if len(date) > 8 and date.isdigit():
+        return int(date)
+    return None
+
+
+def barStart(bar):
+    """epoch seconds of the start of a bar, midnight UTC of its date for the
+    daily ones"""
+    t = barTime(bar)
+    if t is None:
+        day = datetime.datetime.strptime(bar.date.split(" ")[0], "%Y%m%d")
+        t = int(day.replace(tzinfo=datetime.timezone.utc).timestamp())
+    return t
+
+
+class PacingLimiter:
+    def __init__(
+        self,
+        maxRequests=60,
+        window=600.0,
+        identicalInterval=15.0,
+        maxBurst=6,
+        burstWindow=2.0,
+    ):
+        self.maxRequests = maxRequests
+        self.window = window
+        self.identicalInterval = identicalInterval
+        self.maxBurst = maxBurst
+        self.burstWindow = burstWindow
+        self.sent = collections.deque()  # send times in the window
+        self.bursts = {}  # burst key -> deque of send times
+        self.identical = {}  # request key -> last send time
+
+    def delay(self, requestKey, burstKey, now) -> float:
+        """seconds to wait before the request may be sent"""
+        while self.sent and self.sent[0] <= now - self.window:
+            self.sent.popleft()
+        wait = 0.0
+        if len(self.sent) >= self.maxRequests:
+            wait = self.sent[len(self.sent) - self.maxRequests] + self.window - now
+
+        burst = self.bursts.get(burstKey)
+        if burst is not None:
+            while burst and burst[0] <= now - self.burstWindow:
+                burst.popleft()
+            if len(burst) >= self.maxBurst:
+                wait = max(wait, burst[len(burst) - self.maxBurst] + self.burstWindow - now)
+
+        last = self.identical.get(requestKey)
+        if last is not None:
+            wait = max(wait, last + self.identicalInterval - now)
+        return wait
+
+    def record(self, requestKey, burstKey, now):
+        self.sent.append(now)
+        self.bursts.setdefault(burstKey, collections.deque()).append(now)
+        self.identical[requestKey] = now
+        if len(self.identical) > 4 * self.maxRequests:
+            self.identical = {
+                key: sent
+                for key, sent in self.identical.items()
+                if sent > now - self.identicalInterval
+            }
+
+
+class Download:
+    """One downloadBars()/downloadTicks() call. future completes, with the
+    number of bars or ticks received, once all the chunks are in."""
+
+    def __init__(self, contract, onData):
+        self.contract = contract
+        self.onData = onData
+        self.future = concurrent.futures.Future()
+        self.items = [] if onData is None else None
+        self.nItems = 0
+        self.nPending = 0
+        self.lock = threading.Lock()
+
+    def deliver(self, chunkStart, chunkEnd, items):
+        with self.lock:
+            self.nItems += len(items)
+            if self.onData is not None:
+                self.onData(self, chunkStart, chunkEnd, items)
+            else:
+                self.items.append((chunkStart, items))
+
+    def chunkDone(self):
+        with self.lock:
+            self.nPending -= 1
+            if self.nPending or self.future.done():
+                return
+        if self.items is not None:
+            self.items.sort(key=lambda chunk: chunk[0])
+            self.future.set_result([item for _, items in self.items for item in items])
+        else:
+            self.future.set_result(self.nItems)
+
+    def fail(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+class Chunk:
+    def __init__(self, download, start, end, send, args, requestKey, burstKey, cancel=None):
+        self.download = download
+        self.start = start
+        self.end = end
+        self.send = send
+        self.args = args
+        self.requestKey = requestKey
+        self.burstKey = burstKey
+        self.cancel = cancel  # cancel(reqId) of a timed out request
+        self.reqId = None
+        self.nTries = 0
+        # (whatToShow, useRth, ignoreSize, nSeen) for a page of ticks
+        self.ticks = None
+
+
+class HistoricalDownloader:
+    def __init__(
+        self, app, limiter=None, maxInFlight=50, maxTries=5, retryDelay=15.0, requestTimeout=120.0
+    ):
+        self.app = app
+        self.limiter = limiter if limiter is not None else PacingLimiter()
+        self.maxInFlight = maxInFlight
+        self.maxTries = maxTries
+        self.retryDelay = retryDelay
+        self.requestTimeout = requestTimeout
+        self.cond = threading.Condition()
+        self.queue = []  # heap of (not before, seq, chunk)
+        self.deadlines = []  # heap of (deadline, seq, chunk, future) of the sent chunks
+        self.seq = itertools.count()
+        self.inFlight = 0
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name="HistoricalDownloader", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+
+    def downloadBars(
+        self,
+        contract,
+        start,
+        end,
+        barSize,
+        whatToShow,
+        useRTH=1,
+        onData=None,
+        chunkSeconds=None,
+    ) -> Download:
+        """Downloads the bars of [start, end), datetimes or epoch seconds.
+        onData(download, chunkStart, chunkEnd, bars) is called for each chunk
+        from the message loop thread, in no particular order; without it the
+        future's result is the list of all the bars."""
+        start = toDatetime(start)
+        end = toDatetime(end)
+        if chunkSeconds is None:
+            chunkSeconds = MAX_CHUNK_SECONDS.get(barSize, MAX_CHUNK_SECONDS_DEFAULT)
+        download = Download(contract, onData)
+        chunks = splitRange(start, end, chunkSeconds)
+        download.nPending = len(chunks)
+        if not chunks:
+            download.future.set_result([] if onData is None else 0)
+            return download
+
+        contractKey = (contract.conId, contract.symbol, contract.secType, contract.exchange)
+        burstKey = contractKey + (whatToShow,)
+        for chunkStart, chunkEnd in chunks:
+            seconds = int((chunkEnd - chunkStart).total_seconds())
+            args = (
+                contract,
+                formatEndDateTime(chunkEnd),
+                formatDuration(seconds),
+                barSize,
+                whatToShow,
+                useRTH,
+                2,
+                False,
+                [],
+            )
+            requestKey = contractKey + args[1:7]
+            self.submit(
+                Chunk(
+                    download, chunkStart, chunkEnd, self.app.reqHistoricalData, args, requestKey, burstKey,
+                    self.app.cancelHistoricalData,
+                )
+            )
+        return download
+
+    def downloadTicks(
+        self, contract, start, end, whatToShow, useRth=1, ignoreSize=False, onData=None
+    ) -> Download:
+        """Downloads the historical ticks of [start, end), page after page of
+        TICKS_PER_REQUEST ticks, see downloadBars() for onData."""
+        download = Download(contract, onData)
+        download.nPending = 1
+        self.submitTicks(download, toDatetime(start), toDatetime(end), whatToShow, useRth, ignoreSize, 0)
+        return download
+
+    def submitTicks(self, download, cursor, end, whatToShow, useRth, ignoreSize, nSeen):
+        contract = download.contract
+        args = (
+            contract,
+            formatEndDateTime(cursor),
+            "",
+            TICKS_PER_REQUEST,
+            whatToShow,
+            useRth,
+            ignoreSize,
+            [],
+        )
+        contractKey = (contract.conId, contract.symbol, contract.secType, contract.exchange)
+        chunk = Chunk(
+            download, cursor, end, self.app.reqHistoricalTicks, args, contractKey + args[1:7], contractKey + (whatToShow,)
+        )
+        chunk.ticks = (whatToShow, useRth, ignoreSize, nSeen)
+        self.submit(chunk)
+
+    def submit(self, chunk, notBefore=0.0):
+        with self.cond:
+            heapq.heappush(self.queue, (notBefore, next(self.seq), chunk))
+            self.cond.notify()
+
+    def run(self):
+        with self.cond:
+            while not self.stopped:
+                now = time.monotonic()
+                expired = self.expired(now)
+                if expired:
+                    self.cond.release()
+                    try:
+                        for chunk, future in expired:
+                            self.timedOut(chunk, future)
+                    finally:
+                        self.cond.acquire()
+                    continue
+                timeout = self.deadlines[0][0] - now if self.deadlines else None
+                if not self.queue or self.inFlight >= self.maxInFlight:
+                    self.cond.wait(timeout)
+                    continue
+                notBefore, _, chunk = self.queue[0]
+                if chunk.download.future.done():
+                    # the download failed, spare the pacing budget
+                    heapq.heappop(self.queue)
+                    continue
+                wait = max(notBefore - now, self.limiter.delay(chunk.requestKey, chunk.burstKey, now))
+                if wait > 0:
+                    self.cond.wait(wait if timeout is None else min(wait, timeout))
+                    continue
+                heapq.heappop(self.queue)
+                self.limiter.record(chunk.requestKey, chunk.burstKey, now)
+                self.inFlight += 1
+                self.cond.release()
+                try:
+                    self.send(chunk)
+                finally:
+                    self.cond.acquire()
+
+    def expired(self, now) -> list:
+        """[(chunk, future), ...] of the sent chunks still unanswered past
+        their deadline"""
+        expired = []
+        while self.deadlines and self.deadlines[0][0] <= now:
+            _, _, chunk, future = heapq.heappop(self.deadlines)
+            if not future.done():
+                expired.append((chunk, future))
+        return expired
+
+    def timedOut(self, chunk, future):
+        # received() sends the chunk again
+        if future.cancel():
+            logger.info("no answer to %s in %ss, sending it again", chunk.requestKey, self.requestTimeout)
+            if chunk.cancel is not None:
+                chunk.cancel(chunk.reqId)
+
+    def send(self, chunk):
+        chunk.nTries += 1
+
+        def sendChunk(reqId, *args):
+            chunk.reqId = reqId
+            chunk.send(reqId, *args)
+
+        try:
+            future = self.app.request(sendChunk, *chunk.args)
+        except Exception as exc:
+            self.chunkFinished()
+            chunk.download.fail(exc)
+            return
+        with self.cond:
+            heapq.heappush(
+                self.deadlines, (time.monotonic() + self.requestTimeout, next(self.seq), chunk, future)
+            )
+        future.add_done_callback(lambda f: self.received(chunk, f))
+
+    def chunkFinished(self):
+        with self.cond:
+            self.inFlight -= 1
+            self.cond.notify()
+
+    def received(self, chunk, future):
+        self.chunkFinished()
+        download = chunk.download
+        if future.cancelled():
+            if chunk.nTries < self.maxTries:
+                self.submit(chunk)
+            else:
+                download.fail(TimeoutError("no answer to %s after %d tries" % (chunk.requestKey, chunk.nTries)))
+            return
+        exc = future.exception()
+        if exc is not None:
+            if isinstance(exc, RequestError) and exc.code == HISTORICAL_DATA_ERROR:
+                msg = exc.msg.lower()
+                if "pacing violation" in msg:
+                    if chunk.nTries < self.maxTries:
+                        logger.info("pacing violation, sending %s again later", chunk.requestKey)
+                        self.submit(chunk, time.monotonic() + self.retryDelay * chunk.nTries)
+                        return
+                elif NO_DATA_MSG in msg:
+                    self.chunkReceived(chunk, [])
+                    return
+            # eg: no market data permissions, a farm error
+            download.fail(exc)
+            return
+        items = future.result()
+        if items and isinstance(items[0], (HistoricalDataArrays, TicksArrays)):
+            download.fail(
+                TypeError("the HistoricalDownloader needs setHistoricalDataArrays/setHistoricalTicksArrays off")
+            )
+            return
+        self.chunkReceived(chunk, items)
+
+    def chunkReceived(self, chunk, items):
+        download = chunk.download
+        if download.future.done():
+            return
+        if chunk.ticks is None:
+            # the chunks overlap, a daily bar belongs to the one holding its
+            # midnight UTC
+            start = chunk.start.timestamp()
+            end = chunk.end.timestamp()
+            items = [bar for bar in items if start <= barStart(bar) < end]
+            download.deliver(chunk.start, chunk.end, items)
+            download.chunkDone()
+            return
+
+        # a page of ticks: skip the ones of the last second already seen, go
+        # on from the last tick time until past the end
+        whatToShow, useRth, ignoreSize, nSeen = chunk.ticks
+        cursorTime = int(chunk.start.timestamp())
+        endTime = chunk.end.timestamp()
+        skip = 0
+        while skip < len(items) and skip < nSeen and items[skip].time == cursorTime:
+            skip += 1
+        page = [tick for tick in items[skip:] if tick.time < endTime]
+        if page:
+            download.deliver(chunk.start, chunk.end, page)
+
+        if len(items) < TICKS_PER_REQUEST or len(page) < len(items) - skip:
+            download.chunkDone()
+            return
+        lastTime = items[-1].time
+        if lastTime == cursorTime:
+            # a whole page in the same second, better lose some than loop
+            lastTime += 1
+            nLast = 0
+        else:
+            nLast = sum(1 for tick in items if tick.time == lastTime)
+        self.submitTicks(
+            download, toDatetime(lastTime), chunk.end, whatToShow, useRth, ignoreSize, nLast
+        )
@@ -0,0 +1,377 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+Struct of arrays forms of the historical data answers. Once turned on with
+EClient.setHistoricalDataArrays(True) a reqHistoricalData answer is decoded in
+one pass into a HistoricalDataArrays and handed to
+EWrapper.historicalDataArray(reqId, arrays), rather than going through one
+BarData and one historicalData call per bar:
+
+    class App(EWrapper, EClient):
+        def historicalDataArray(self, reqId, arrays):
+            closes = arrays.close  # array("d")
+
+    app.setHistoricalDataArrays(True)
+
+The numeric columns are array("d")/array("q"), the unset volume/wap are NaN.
+With numpy installed toNumpy() gives zero copy views of them.
+
+Likewise with EClient.setHistoricalTicksArrays(True) a page of reqHistoricalTicks
+is decoded into one of the *TicksArrays below and handed to
+historicalTicksArray/historicalTicksBidAskArray/historicalTicksLastArray. The
+tick attributes are kept as the bitmask of the text msg and the exchange and
+special conditions strings as codes into a StringTable, shared by all the pages
+decoded by a Decoder. toNumpy() gives them as a numpy record array.
+"""
+
+import math
+from array import array
+
+from ibapi.utils import BadMessage, UNSET_DECIMAL_FIELDS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NAN = math.nan
+
+# the proto bars carry volume and WAP as str
+UNSET_DECIMAL_STRS = frozenset(s.decode() for s in UNSET_DECIMAL_FIELDS)
+
+
+class HistoricalDataArrays:
+    COLUMNS = ("date", "open", "high", "low", "close", "volume", "wap", "barCount")
+
+    def __init__(self):
+        self.date = []
+        self.open = array("d")
+        self.high = array("d")
+        self.low = array("d")
+        self.close = array("d")
+        self.volume = array("d")
+        self.wap = array("d")
+        self.barCount = array("q")
+
+    def __len__(self):
+        return len(self.date)
+
+    def toNumpy(self) -> dict:
+        """{column name: numpy array}, the numeric ones are views"""
+        if numpy is None:
+            raise ImportError("numpy is needed for HistoricalDataArrays.toNumpy()")
+        result = {"date": numpy.array(self.date)}
+        for name in self.COLUMNS[1:]:
+            column = getattr(self, name)
+            result[name] = numpy.frombuffer(column, dtype=column.typecode)
+        return result
+
+    def __str__(self):
+        return "HistoricalDataArrays: %d bars" % len(self)
+
+
+def readHistoricalDataArrays(fields, itemCount, skipWap2) -> HistoricalDataArrays:
+    """The bars of a text HISTORICAL_DATA msg, skipWap2 for the old server
+    versions which send a field after the wap."""
+    arrays = HistoricalDataArrays()
+    dates = arrays.date
+    opens = arrays.open.append
+    highs = arrays.high.append
+    lows = arrays.low.append
+    closes = arrays.close.append
+    volumes = arrays.volume.append
+    waps = arrays.wap.append
+    barCounts = arrays.barCount.append
+    unset = UNSET_DECIMAL_FIELDS
+    field = fields.__next__
+
+    try:
+        for _ in range(itemCount):
+            dates.append(field().decode("UTF-8", errors="backslashreplace"))
+            # float() takes the b"Infinity" sent for the infinite values
+            s = field()
+            opens(float(s) if s else 0.0)
+            s = field()
+            highs(float(s) if s else 0.0)
+            s = field()
+            lows(float(s) if s else 0.0)
+            s = field()
+            closes(float(s) if s else 0.0)
+            s = field()
+            volumes(NAN if s in unset else float(s))
+            s = field()
+            waps(NAN if s in unset else float(s))
+            if skipWap2:
+                field()
+            s = field()
+            barCounts(int(s) if s else 0)
+    except StopIteration:
+        raise BadMessage("no more fields")
+    return arrays
+
+
+def historicalDataArraysFromProto(historicalDataBarProtos) -> HistoricalDataArrays:
+    arrays = HistoricalDataArrays()
+    dates = arrays.date
+    opens = arrays.open.append
+    highs = arrays.high.append
+    lows = arrays.low.append
+    closes = arrays.close.append
+    volumes = arrays.volume.append
+    waps = arrays.wap.append
+    barCounts = arrays.barCount.append
+    unset = UNSET_DECIMAL_STRS
+
+    for bar in historicalDataBarProtos:
+        dates.append(bar.date)
+        opens(bar.open)
+        highs(bar.high)
+        lows(bar.low)
+        closes(bar.close)
+        s = bar.volume
+        volumes(NAN if s in unset else float(s))
+        s = bar.WAP
+        waps(NAN if s in unset else float(s))
+        barCounts(bar.barCount)
+    return arrays
+
+
+class StringTable:
+    """Interns the strings of the tick pages: code -> str and back."""
+
+    def __init__(self):
+        self.codes = {}  # raw field (bytes or str) -> code
+        self.strings = []  # code -> str
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, code) -> str:
+        return self.strings[code]
+
+    def intern(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            text = value if type(value) is str else value.decode("UTF-8", errors="backslashreplace")
+            code = self.codes.get(text)
+            if code is None:
+                code = self.codes[text] = len(self.strings)
+                self.strings.append(text)
+            self.codes[value] = code
+        return code
+
+
+class TicksArrays:
+    # (name, typecode) of the columns
+    COLUMNS = ()
+
+    def __init__(self, strings: StringTable = None):
+        self.strings = strings
+        for name, typecode in self.COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.time)
+
+    def toNumpy(self):
+        """numpy record array of the ticks, a copy"""
+        if numpy is None:
+            raise ImportError("numpy is needed for %s.toNumpy()" % type(self).__name__)
+        return numpy.rec.fromarrays(
+            [numpy.frombuffer(getattr(self, name), dtype=typecode) for name, typecode in self.COLUMNS],
+            names=[name for name, _ in self.COLUMNS],
+        )
+
+    def __str__(self):
+        return "%s: %d ticks" % (type(self).__name__, len(self))
+
+
+class HistoricalTicksArrays(TicksArrays):
+    """whatToShow=MIDPOINT"""
+
+    COLUMNS = (("time", "q"), ("price", "d"), ("size", "d"))
+
+
+class HistoricalTicksBidAskArrays(TicksArrays):
+    """whatToShow=BID_ASK, mask bit 1 is askPastHigh and bit 2 bidPastLow"""
+
+    COLUMNS = (
+        ("time", "q"),
+        ("mask", "B"),
+        ("priceBid", "d"),
+        ("priceAsk", "d"),
+        ("sizeBid", "d"),
+        ("sizeAsk", "d"),
+    )
+
+
+class HistoricalTicksLastArrays(TicksArrays):
+    """whatToShow=TRADES, mask bit 1 is pastLimit and bit 2 unreported"""
+
+    COLUMNS = (
+        ("time", "q"),
+        ("mask", "B"),
+        ("price", "d"),
+        ("size", "d"),
+        ("exchange", "I"),
+        ("specialConditions", "I"),
+    )
+
+    def exchangeOf(self, idx) -> str:
+        return self.strings[self.exchange[idx]]
+
+    def specialConditionsOf(self, idx) -> str:
+        return self.strings[self.specialConditions[idx]]
+
+
+def readHistoricalTicksArrays(fields, tickCount) -> HistoricalTicksArrays:
+    arrays = HistoricalTicksArrays()
+    times = arrays.time.append
+    prices = arrays.price.append
+    sizes = arrays.size.append
+    unset = UNSET_DECIMAL_FIELDS
+    field = fields.__next__
+
+    try:
+        for _ in range(tickCount):
+            s = field()
+            times(int(s) if s else 0)
+            field()  # for consistency
+            s = field()
+            prices(float(s) if s else 0.0)
+            s = field()
+            sizes(NAN if s in unset else float(s))
+    except StopIteration:
+        raise BadMessage("no more fields")
+    return arrays
+
+
+def readHistoricalTicksBidAskArrays(fields, tickCount) -> HistoricalTicksBidAskArrays:
+    arrays = HistoricalTicksBidAskArrays()
+    times = arrays.time.append
+    masks = arrays.mask.append
+    pricesBid = arrays.priceBid.append
+    pricesAsk = arrays.priceAsk.append
+    sizesBid = arrays.sizeBid.append
+    sizesAsk = arrays.sizeAsk.append
+    unset = UNSET_DECIMAL_FIELDS
+    field = fields.__next__
+
+    try:
+        for _ in range(tickCount):
+            s = field()
+            times(int(s) if s else 0)
+            s = field()
+            masks(int(s) & 3 if s else 0)
+            s = field()
+            pricesBid(float(s) if s else 0.0)
+            s = field()
+            pricesAsk(float(s) if s else 0.0)
+            s = field()
+            sizesBid(NAN if s in unset else float(s))
+            s = field()
+            sizesAsk(NAN if s in unset else float(s))
+    except StopIteration:
+        raise BadMessage("no more fields")
+    return arrays
+
+
+def readHistoricalTicksLastArrays(fields, tickCount, strings: StringTable) -> HistoricalTicksLastArrays:
+    arrays = HistoricalTicksLastArrays(strings)
+    times = arrays.time.append
+    masks = arrays.mask.append
+    prices = arrays.price.append
+    sizes = arrays.size.append
+    exchanges = arrays.exchange.append
+    specialConditions = arrays.specialConditions.append
+    codes = strings.codes
+    intern = strings.intern
+    unset = UNSET_DECIMAL_FIELDS
+    field = fields.__next__
+
+    try:
+        for _ in range(tickCount):
+            s = field()
+            times(int(s) if s else 0)
+            s = field()
+            masks(int(s) & 3 if s else 0)
+            s = field()
+            prices(float(s) if s else 0.0)
+            s = field()
+            sizes(NAN if s in unset else float(s))
+            s = field()
+            code = codes.get(s)
+            exchanges(intern(s) if code is None else code)
+            s = field()
+            code = codes.get(s)
+            specialConditions(intern(s) if code is None else code)
+    except StopIteration:
+        raise BadMessage("no more fields")
+    return arrays
+
+
+def historicalTicksArraysFromProto(historicalTickProtos) -> HistoricalTicksArrays:
+    arrays = HistoricalTicksArrays()
+    times = arrays.time.append
+    prices = arrays.price.append
+    sizes = arrays.size.append
+    unset = UNSET_DECIMAL_STRS
+
+    for tick in historicalTickProtos:
+        times(tick.time)
+        prices(tick.price)
+        s = tick.size
+        sizes(NAN if s in unset else float(s))
+    return arrays
+
+
+def historicalTicksBidAskArraysFromProto(historicalTickBidAskProtos) -> HistoricalTicksBidAskArrays:
+    arrays = HistoricalTicksBidAskArrays()
+    times = arrays.time.append
+    masks = arrays.mask.append
+    pricesBid = arrays.priceBid.append
+    pricesAsk = arrays.priceAsk.append
+    sizesBid = arrays.sizeBid.append
+    sizesAsk = arrays.sizeAsk.append
+    unset = UNSET_DECIMAL_STRS
+
+    for tick in historicalTickBidAskProtos:
+        times(tick.time)
+        attrib = tick.tickAttribBidAsk
+        masks(attrib.askPastHigh | attrib.bidPastLow << 1)
+        pricesBid(tick.priceBid)
+        pricesAsk(tick.priceAsk)
+        s = tick.sizeBid
+        sizesBid(NAN if s in unset else float(s))
+        s = tick.sizeAsk
+        sizesAsk(NAN if s in unset else float(s))
+    return arrays
+
+
+def historicalTicksLastArraysFromProto(historicalTickLastProtos, strings: StringTable) -> HistoricalTicksLastArrays:
+    arrays = HistoricalTicksLastArrays(strings)
+    times = arrays.time.append
+    masks = arrays.mask.append
+    prices = arrays.price.append
+    sizes = arrays.size.append
+    exchanges = arrays.exchange.append
+    specialConditions = arrays.specialConditions.append
+    codes = strings.codes
+    intern = strings.intern
+    unset = UNSET_DECIMAL_STRS
+
+    for tick in historicalTickLastProtos:
+        times(tick.time)
+        attrib = tick.tickAttribLast
+        masks(attrib.pastLimit | attrib.unreported << 1)
+        prices(tick.price)
+        s = tick.size
+        sizes(NAN if s in unset else float(s))
+        s = tick.exchange
+        code = codes.get(s)
+        exchanges(intern(s) if code is None else code)
+        s = tick.specialConditions
+        code = codes.get(s)
+        specialConditions(intern(s) if code is None else code)
+    return arrays
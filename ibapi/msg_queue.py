@@ -0,0 +1,249 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+The MsgQueue hands the messages read by the EReader over to the thread running
+EClient.run(). The reader puts all the messages it got out of one receive as
+a single batch so that the lock/wakeup cost is paid per batch instead of per
+message.
+
+The MsgQueue is unbounded: if the wrapper callbacks cannot keep up, eg: during
+the open auction, the backlog grows without limit. A BoundedMsgQueue holds at
+most maxSize messages and applies its overflow policy:
+
+    OVERFLOW_BLOCK       once full, the reader waits for room, the socket
+                         buffers and then TWS take the backlog
+    OVERFLOW_DROP_OLDEST once full, the oldest pending market data msg is
+                         dropped to make room
+    OVERFLOW_CONFLATE    full or not, a market data msg replaces the pending
+                         one for the same (msgId, reqId, tickType), so that
+                         only the latest value of each tick is ever queued;
+                         once full, the reader waits for room for the others
+
+Only the top of book market data msgs are ever dropped or conflated, orders,
+executions, errors, market depth... are always delivered: when none can make
+room the reader blocks, whatever the policy.
+
+    app.msg_queue = BoundedMsgQueue(50000, OVERFLOW_CONFLATE)
+    app.connect(...)
+"""
+
+import collections
+import threading
+import time
+
+from ibapi.common import PROTOBUF_MSG_ID
+from ibapi.message import IN
+from ibapi.server_versions import MIN_SERVER_VER_PROTOBUF, MIN_SERVER_VER_PRICE_BASED_VOLATILITY
+
+from ibapi.protobuf.TickPrice_pb2 import TickPrice as TickPriceProto
+from ibapi.protobuf.TickSize_pb2 import TickSize as TickSizeProto
+from ibapi.protobuf.TickGeneric_pb2 import TickGeneric as TickGenericProto
+from ibapi.protobuf.TickString_pb2 import TickString as TickStringProto
+from ibapi.protobuf.TickOptionComputation_pb2 import TickOptionComputation as TickOptionComputationProto
+
+(OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_CONFLATE) = range(3)
+
+# msgs the overflow policies may drop; the market depth ones are not, losing
+# an update would corrupt the book built from them
+DROPPABLE_MSG_IDS = frozenset(
+    (
+        IN.TICK_PRICE,
+        IN.TICK_SIZE,
+        IN.TICK_OPTION_COMPUTATION,
+        IN.TICK_GENERIC,
+        IN.TICK_STRING,
+        IN.TICK_EFP,
+        IN.REAL_TIME_BARS,
+        IN.TICK_BY_TICK,
+    )
+)
+
+# msgs carrying the latest value of a tick, conflated by (msgId, reqId, tickType)
+CONFLATABLE_MSG_PROTOS = {
+    IN.TICK_PRICE: TickPriceProto,
+    IN.TICK_SIZE: TickSizeProto,
+    IN.TICK_OPTION_COMPUTATION: TickOptionComputationProto,
+    IN.TICK_GENERIC: TickGenericProto,
+    IN.TICK_STRING: TickStringProto,
+}
+
+
+class MsgQueue:
+    def __init__(self):
+        self.batches = collections.deque()
+        self.ready = threading.Event()
+        self.serverVersion = 0
+
+    def open(self, serverVersion):
+        """Called by the EClient once connected, before the reader starts."""
+        self.serverVersion = serverVersion
+
+    def close(self):
+        """Called by the EClient on disconnect."""
+        pass
+
+    def put(self, msg):
+        self.putBatch([msg])
+
+    def putBatch(self, msgs: list):
+        if msgs:
+            self.batches.append(msgs)
+            self.ready.set()
+
+    def getBatch(self, timeout=None) -> list:
+        """returns the oldest batch, or an empty list if none came in within
+        timeout seconds"""
+        while True:
+            try:
+                return self.batches.popleft()
+            except IndexError:
+                pass
+            if not self.ready.wait(timeout):
+                return []
+            self.ready.clear()
+
+    def empty(self) -> bool:
+        return not self.batches
+
+    def qsize(self) -> int:
+        return sum(len(batch) for batch in list(self.batches))
+
+
+class BoundedMsgQueue(MsgQueue):
+    """MsgQueue holding at most maxSize msgs, see the module doc for the
+    overflow policies. The metrics are plain attributes:
+
+        depth          msgs pending right now
+        highWaterMark  max depth so far, see resetHighWaterMark()
+        nDropped       market data msgs dropped
+        nConflated     market data msgs replaced by a newer one
+        blockedTime    seconds the reader spent waiting for room"""
+
+    def __init__(self, maxSize, overflowPolicy=OVERFLOW_BLOCK):
+        MsgQueue.__init__(self)
+        if maxSize <= 0:
+            raise ValueError("maxSize must be positive")
+        self.maxSize = maxSize
+        self.overflowPolicy = overflowPolicy
+        self.lock = threading.Lock()
+        self.notEmpty = threading.Condition(self.lock)
+        self.notFull = threading.Condition(self.lock)
+        self.closed = False
+
+        # the pending msgs, a dropped msg leaves a None behind
+        self.msgs = []
+        # indexes in msgs of the pending droppable msgs, oldest first
+        self.droppable = collections.deque()
+        # (msgId, reqId, tickType) -> index in msgs
+        self.conflated = {}
+
+        self.depth = 0
+        self.highWaterMark = 0
+        self.nDropped = 0
+        self.nConflated = 0
+        self.blockedTime = 0.0
+
+    def open(self, serverVersion):
+        with self.lock:
+            self.serverVersion = serverVersion
+            self.closed = False
+
+    def close(self):
+        # a reader blocked on a full queue must not outlive the connection
+        with self.lock:
+            self.closed = True
+            self.notFull.notify_all()
+
+    def resetHighWaterMark(self):
+        with self.lock:
+            self.highWaterMark = self.depth
+
+    def putBatch(self, msgs: list):
+        if not msgs:
+            return
+        with self.lock:
+            for msg in msgs:
+                self.putLocked(msg)
+            if self.depth > self.highWaterMark:
+                self.highWaterMark = self.depth
+            self.notEmpty.notify()
+
+    def putLocked(self, msg):
+        policy = self.overflowPolicy
+        msgId = self.msgId(msg) if policy != OVERFLOW_BLOCK else None
+
+        if policy == OVERFLOW_CONFLATE and msgId in CONFLATABLE_MSG_PROTOS:
+            key = self.conflationKey(msgId, msg)
+            idx = self.conflated.get(key)
+            if idx is not None:
+                self.msgs[idx] = msg
+                self.nConflated += 1
+                return
+            if self.depth >= self.maxSize:
+                self.waitForRoom()
+            self.conflated[key] = len(self.msgs)
+        elif self.depth >= self.maxSize:
+            if policy == OVERFLOW_DROP_OLDEST and self.droppable:
+                self.msgs[self.droppable.popleft()] = None
+                self.depth -= 1
+                self.nDropped += 1
+            else:
+                self.waitForRoom()
+
+        if policy == OVERFLOW_DROP_OLDEST and msgId in DROPPABLE_MSG_IDS:
+            self.droppable.append(len(self.msgs))
+        self.msgs.append(msg)
+        self.depth += 1
+
+    def waitForRoom(self):
+        self.highWaterMark = max(self.highWaterMark, self.depth)
+        self.notEmpty.notify()
+        start = time.monotonic()
+        while self.depth >= self.maxSize and not self.closed:
+            self.notFull.wait(0.2)
+        self.blockedTime += time.monotonic() - start
+
+    def getBatch(self, timeout=None) -> list:
+        """returns all the pending msgs, or an empty list if none came in
+        within timeout seconds"""
+        with self.lock:
+            if not self.depth and not self.notEmpty.wait_for(lambda: self.depth, timeout):
+                return []
+            msgs = self.msgs
+            dropped = len(msgs) != self.depth
+            self.msgs = []
+            self.droppable.clear()
+            self.conflated.clear()
+            self.depth = 0
+            self.notFull.notify_all()
+        if dropped:
+            msgs = [msg for msg in msgs if msg is not None]
+        return msgs
+
+    def empty(self) -> bool:
+        return not self.depth
+
+    def qsize(self) -> int:
+        return self.depth
+
+    def msgId(self, msg: bytes) -> int:
+        """the msgId, with the protobuf offset removed"""
+        if self.serverVersion >= MIN_SERVER_VER_PROTOBUF:
+            msgId = int.from_bytes(msg[:4], "big")
+            return msgId - PROTOBUF_MSG_ID if msgId > PROTOBUF_MSG_ID else msgId
+        return int(msg[: msg.index(b"\0")])
+
+    def conflationKey(self, msgId, msg: bytes) -> tuple:
+        if self.serverVersion >= MIN_SERVER_VER_PROTOBUF:
+            if int.from_bytes(msg[:4], "big") > PROTOBUF_MSG_ID:
+                proto = CONFLATABLE_MSG_PROTOS[msgId]()
+                proto.ParseFromString(msg[4:])
+                return (msgId, proto.reqId, proto.tickType)
+            fields = msg[4:].split(b"\0", 3)
+        else:
+            fields = msg.split(b"\0", 4)[1:]
+        if msgId == IN.TICK_OPTION_COMPUTATION and self.serverVersion >= MIN_SERVER_VER_PRICE_BASED_VOLATILITY:
+            # no version field
+            return (msgId, fields[0], fields[1])
+        return (msgId, fields[1], fields[2])
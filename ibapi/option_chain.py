@@ -0,0 +1,278 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+The OptionChain loads the option surface of an underlying for a
+RequestFuturesWrapper based app: the expirations and strikes come from
+reqSecDefOptParams, the option contracts are built out of them, without a
+reqContractDetails each, and every option gets a reqMktData snapshot. At most
+lineBudget snapshots are in flight at any time, a new one is sent as soon as
+one is over, so the whole chain goes through the market data lines the app
+can spare. A snapshot without its tickSnapshotEnd after snapshotTimeout
+seconds is cancelled and counted in surface.nFailed, its line goes to the
+next one.
+
+    chain = OptionChain(app, lineBudget=80)
+    surface = chain.load(underlying, strikeFilter=lambda k: 4000 <= k <= 6000).result()
+    deltas = surface.column("delta", "C")   # expiries x strikes
+    chain.refresh(surface).result()
+
+The surface holds one array("d") per (right, field), NaN where nothing came,
+expiry major: the value of (expiry, strike) is at
+surface.index(expiry, strike). The fields are the greeks of the model
+tickOptionComputation, or of the computationTickTypes given, and the
+bid/ask/last prices of the option.
+"""
+
+import collections
+import concurrent.futures
+import logging
+import math
+import threading
+from array import array
+
+from ibapi.contract import Contract
+from ibapi.ticktype import TickTypeEnum
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+NAN = math.nan
+
+GREEKS = ("impliedVol", "delta", "optPrice", "pvDividend", "gamma", "vega", "theta", "undPrice")
+QUOTES = ("bid", "ask", "last")
+FIELDS = GREEKS + QUOTES
+
+QUOTE_TICK_TYPES = {
+    TickTypeEnum.BID: "bid",
+    TickTypeEnum.ASK: "ask",
+    TickTypeEnum.LAST: "last",
+    TickTypeEnum.DELAYED_BID: "bid",
+    TickTypeEnum.DELAYED_ASK: "ask",
+    TickTypeEnum.DELAYED_LAST: "last",
+}
+
+
+class OptionSurface:
+    def __init__(self, expirations, strikes, rights=("C", "P")):
+        self.expirations = sorted(expirations)
+        self.strikes = sorted(strikes)
+        self.rights = tuple(rights)
+        self.expiryIndex = {expiry: idx for idx, expiry in enumerate(self.expirations)}
+        self.strikeIndex = {strike: idx for idx, strike in enumerate(self.strikes)}
+        size = len(self.expirations) * len(self.strikes)
+        self.columns = {
+            (right, field): array("d", [NAN]) * size for right in self.rights for field in FIELDS
+        }
+        self.contracts = []  # [(right, expiry, strike, Contract)]
+        self.nFailed = 0
+
+    @property
+    def shape(self) -> tuple:
+        return (len(self.expirations), len(self.strikes))
+
+    def index(self, expiry, strike) -> int:
+        return self.expiryIndex[expiry] * len(self.strikes) + self.strikeIndex[strike]
+
+    def set(self, right, expiry, strike, field, value):
+        self.columns[(right, field)][self.index(expiry, strike)] = NAN if value is None else value
+
+    def get(self, right, expiry, strike, field) -> float:
+        return self.columns[(right, field)][self.index(expiry, strike)]
+
+    def column(self, field, right="C") -> array:
+        """the expiries x strikes values of field, expiry major"""
+        return self.columns[(right, field)]
+
+    def smile(self, expiry, field="impliedVol", right="C") -> array:
+        """the values of field for all the strikes of expiry"""
+        start = self.expiryIndex[expiry] * len(self.strikes)
+        return self.columns[(right, field)][start : start + len(self.strikes)]
+
+    def toNumpy(self, field, right="C"):
+        """(expiries x strikes) float64 view of field"""
+        if numpy is None:
+            raise ImportError("numpy is needed for OptionSurface.toNumpy()")
+        return numpy.frombuffer(self.columns[(right, field)], dtype=numpy.float64).reshape(self.shape)
+
+
+class ChainLoad:
+    def __init__(self, surface):
+        self.surface = surface
+        self.future = concurrent.futures.Future()
+        self.nLeft = len(surface.contracts)
+
+
+class OptionChain:
+    def __init__(
+        self,
+        app,
+        lineBudget=50,
+        computationTickTypes=(TickTypeEnum.MODEL_OPTION, TickTypeEnum.DELAYED_MODEL_OPTION),
+        snapshotTimeout=30.0,
+    ):
+        """app is a RequestFuturesWrapper and EClient, lineBudget the number
+        of market data lines the snapshots may take"""
+        self.app = app
+        self.lineBudget = lineBudget
+        self.snapshotTimeout = snapshotTimeout
+        self.computationTickTypes = computationTickTypes
+        self.lock = threading.Lock()
+        self.queue = collections.deque()  # (ChainLoad, (right, expiry, strike, Contract))
+        self.inFlight = 0
+        self.pumping = False
+
+    def load(
+        self,
+        underlying: Contract,
+        exchange="SMART",
+        tradingClass=None,
+        expirationFilter=None,
+        strikeFilter=None,
+        rights=("C", "P"),
+    ) -> concurrent.futures.Future:
+        """Future of the OptionSurface of underlying, which needs its conId.
+        The filters are predicates on the expirations (yyyymmdd) and strikes
+        of the chain. Without tradingClass the chain of the tradingClass
+        named as the underlying symbol is picked, if any."""
+        result = concurrent.futures.Future()
+        futFopExchange = underlying.exchange if underlying.secType == "FUT" else ""
+        params = self.app.request(
+            self.app.reqSecDefOptParams,
+            underlying.symbol,
+            futFopExchange,
+            underlying.secType,
+            underlying.conId,
+        )
+
+        def paramsReceived(future):
+            try:
+                chains = [item for item in future.result() if item[0] == exchange]
+                if tradingClass is not None:
+                    chains = [item for item in chains if item[2] == tradingClass]
+                if not chains:
+                    raise LookupError(
+                        "no %s option chain on %s for %s" % (tradingClass or "", exchange, underlying.symbol)
+                    )
+                chains.sort(key=lambda item: item[2] != underlying.symbol)
+                _, _, chainClass, multiplier, expirations, strikes = chains[0]
+                surface = self.buildSurface(
+                    underlying, exchange, chainClass, multiplier,
+                    [e for e in expirations if expirationFilter is None or expirationFilter(e)],
+                    [k for k in strikes if strikeFilter is None or strikeFilter(k)],
+                    rights,
+                )
+            except Exception as exc:
+                result.set_exception(exc)
+                return
+            chained = self.refresh(surface)
+            chained.add_done_callback(lambda f: result.set_result(f.result()))
+
+        params.add_done_callback(paramsReceived)
+        return result
+
+    def buildSurface(self, underlying, exchange, tradingClass, multiplier, expirations, strikes, rights):
+        surface = OptionSurface(expirations, strikes, rights)
+        secType = "FOP" if underlying.secType == "FUT" else "OPT"
+        for expiry in surface.expirations:
+            for strike in surface.strikes:
+                for right in surface.rights:
+                    contract = Contract()
+                    contract.symbol = underlying.symbol
+                    contract.secType = secType
+                    contract.exchange = exchange
+                    contract.currency = underlying.currency
+                    contract.lastTradeDateOrContractMonth = expiry
+                    contract.strike = strike
+                    contract.right = right
+                    contract.multiplier = multiplier
+                    contract.tradingClass = tradingClass
+                    surface.contracts.append((right, expiry, strike, contract))
+        return surface
+
+    def refresh(self, surface: OptionSurface) -> concurrent.futures.Future:
+        """Snapshots all the options of surface again, the future's result
+        is the surface once they are all in."""
+        load = ChainLoad(surface)
+        surface.nFailed = 0
+        if not load.nLeft:
+            load.future.set_result(surface)
+            return load.future
+        with self.lock:
+            self.queue.extend((load, option) for option in surface.contracts)
+        self.pump()
+        return load.future
+
+    def pump(self):
+        with self.lock:
+            if self.pumping:
+                return
+            self.pumping = True
+        while True:
+            with self.lock:
+                if not self.queue or self.inFlight >= self.lineBudget:
+                    self.pumping = False
+                    return
+                load, option = self.queue.popleft()
+                self.inFlight += 1
+            self.send(load, option)
+
+    def send(self, load, option):
+        reqIds = []
+
+        def reqMktData(reqId, *args):
+            reqIds.append(reqId)
+            self.app.reqMktData(reqId, *args)
+
+        timer = None
+        try:
+            future = self.app.request(reqMktData, option[3], "", True, False, [])
+        except Exception as exc:
+            future = concurrent.futures.Future()
+            future.set_exception(exc)
+        else:
+            timer = threading.Timer(self.snapshotTimeout, self.timedOut, (future, reqIds[0]))
+            timer.daemon = True
+            timer.start()
+        future.add_done_callback(lambda f: self.received(load, option, f, timer))
+
+    def timedOut(self, future, reqId):
+        # received() frees the line
+        if future.cancel():
+            self.app.cancelMktData(reqId)
+
+    def received(self, load, option, future, timer=None):
+        if timer is not None:
+            timer.cancel()
+        right, expiry, strike, _ = option
+        surface = load.surface
+        if future.cancelled():
+            exc = TimeoutError("no snapshot end in %ss" % self.snapshotTimeout)
+        else:
+            exc = future.exception()
+        if exc is not None:
+            # eg: no such strike for this expiry
+            logger.debug("%s %s %s: %s", expiry, strike, right, exc)
+        else:
+            for tickType, value in future.result():
+                if tickType in self.computationTickTypes:
+                    for field, fieldValue in zip(GREEKS, value[1:]):
+                        surface.set(right, expiry, strike, field, fieldValue)
+                else:
+                    field = QUOTE_TICK_TYPES.get(tickType)
+                    if field is not None and value > 0:
+                        surface.set(right, expiry, strike, field, value)
+
+        with self.lock:
+            self.inFlight -= 1
+            if exc is not None:
+                surface.nFailed += 1
+            load.nLeft -= 1
+            done = not load.nLeft
+        if done:
+            load.future.set_result(surface)
+        self.pump()
@@ -0,0 +1,157 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+The reqMktDepth answers are row operations on the book: insert, update or
+delete the row at some position of one side. OrderBooks applies them, as the
+Decoder gets them, to one OrderBook per reqId. The rows of a side are kept in
+array("d") columns (price, size) plus the list of the market makers for
+SMART depth, so an operation is a single in place insert/assign/delete.
+
+    books = OrderBooks(onUpdate=onBookUpdate, forwardDepth=False)
+    app.setOrderBooks(books)
+    app.reqMktDepth(1, contract, 10, True, [])
+    ...
+    book = books.get(1)
+    book.bids.top(5)
+
+onUpdate(reqId, book, side, position, operation) is called after each
+operation, from the thread decoding the messages. With forwardDepth off the
+updateMktDepth/updateMktDepthL2 callbacks of the wrapper are not called
+anymore.
+"""
+
+import logging
+from array import array
+
+from ibapi.const import UNSET_DECIMAL
+
+logger = logging.getLogger(__name__)
+
+# the side of a depth update
+(ASK, BID) = range(2)
+
+# the operation of a depth update
+(INSERT, UPDATE, DELETE) = range(3)
+
+# error code sent when the book of a reqId is reset
+MKT_DEPTH_RESET = 317
+
+
+class BookSide:
+    def __init__(self):
+        self.prices = array("d")
+        self.sizes = array("d")
+        self.marketMakers = []
+
+    def __len__(self):
+        return len(self.prices)
+
+    def apply(self, position, operation, price, size, marketMaker="") -> bool:
+        """Applies one row operation, returns False if it made no sense for
+        the current rows."""
+        n = len(self.prices)
+        if operation == UPDATE and position == n:
+            # an update of the row right after the last one is an insert
+            operation = INSERT
+
+        if operation == INSERT:
+            if position > n:
+                return False
+            self.prices.insert(position, price)
+            self.sizes.insert(position, size)
+            self.marketMakers.insert(position, marketMaker)
+        elif operation == UPDATE:
+            if position > n:
+                return False
+            self.prices[position] = price
+            self.sizes[position] = size
+            self.marketMakers[position] = marketMaker
+        elif operation == DELETE:
+            if position >= n:
+                return False
+            del self.prices[position]
+            del self.sizes[position]
+            del self.marketMakers[position]
+        else:
+            return False
+        return True
+
+    def clear(self):
+        del self.prices[:]
+        del self.sizes[:]
+        self.marketMakers.clear()
+
+    def top(self, n=1) -> list:
+        """[(price, size, marketMaker), ...] of the best n rows"""
+        return list(zip(self.prices[:n], self.sizes[:n], self.marketMakers[:n]))
+
+    def snapshot(self) -> tuple:
+        """(prices, sizes, marketMakers) copies of all the rows"""
+        return (array("d", self.prices), array("d", self.sizes), list(self.marketMakers))
+
+
+class OrderBook:
+    def __init__(self, reqId):
+        self.reqId = reqId
+        self.sides = (BookSide(), BookSide())
+        self.asks = self.sides[ASK]
+        self.bids = self.sides[BID]
+        self.isSmartDepth = False
+        self.nUpdates = 0
+
+    def apply(self, position, operation, side, price, size, marketMaker="") -> bool:
+        if side != ASK and side != BID:
+            return False
+        self.nUpdates += 1
+        return self.sides[side].apply(position, operation, price, size, marketMaker)
+
+    def clear(self):
+        self.asks.clear()
+        self.bids.clear()
+
+    def bestBid(self) -> tuple:
+        """(price, size) of the best bid, None if there is none"""
+        return (self.bids.prices[0], self.bids.sizes[0]) if self.bids else None
+
+    def bestAsk(self) -> tuple:
+        return (self.asks.prices[0], self.asks.sizes[0]) if self.asks else None
+
+    def snapshot(self) -> tuple:
+        """(bids, asks) as returned by BookSide.snapshot()"""
+        return (self.bids.snapshot(), self.asks.snapshot())
+
+
+class OrderBooks:
+    def __init__(self, onUpdate=None, forwardDepth=True):
+        self.books = {}  # reqId -> OrderBook
+        self.onUpdate = onUpdate
+        self.forwardDepth = forwardDepth
+
+    def get(self, reqId) -> OrderBook:
+        return self.books.get(reqId)
+
+    def remove(self, reqId):
+        """Forgets the book of reqId, eg: after cancelMktDepth."""
+        self.books.pop(reqId, None)
+
+    def clear(self, reqId):
+        book = self.books.get(reqId)
+        if book is not None:
+            book.clear()
+
+    def update(self, reqId, position, marketMaker, operation, side, price, size, isSmartDepth=False):
+        """Called by the Decoder for each updateMktDepth/updateMktDepthL2."""
+        book = self.books.get(reqId)
+        if book is None:
+            book = self.books[reqId] = OrderBook(reqId)
+        book.isSmartDepth = isSmartDepth
+        sizeValue = 0.0 if size == UNSET_DECIMAL else float(size)
+        if not book.apply(position, operation, side, price, sizeValue, marketMaker):
+            logger.debug(
+                "reqId %d: ignoring depth op %d side %d at %d, %d rows",
+                reqId, operation, side, position, len(book.sides[side & 1]),
+            )
+            return
+        if self.onUpdate is not None:
+            self.onUpdate(reqId, book, side, position, operation)
@@ -0,0 +1,204 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+An OrderTemplate encodes a (contract, order) pair once and then places orders
+which differ from it only by orderId, totalQuantity, lmtPrice and auxPrice,
+patching just those fields in the pre-encoded message:
+
+    template = OrderTemplate(app, contract, order)
+    template.place(app.nextId(), lmtPrice=101.25, totalQuantity=Decimal(200))
+
+For the text messages the fields of placeOrder are kept as the text between
+the variable ones; for protobuf a PlaceOrderRequest is built once and
+copied for each order. The checks of placeOrder are done once, when the
+template is built, a template which would not be sent raises a
+ClientException. The template follows the server version of the client, it
+is encoded again after a reconnection to another server version.
+"""
+
+import copy
+from decimal import Decimal
+
+from ibapi.client import EClient
+from ibapi.client_utils import createPlaceOrderRequestProto
+from ibapi.comm import make_field, make_field_handle_empty
+from ibapi.common import PROTOBUF_MSG_ID
+from ibapi.const import UNSET_DOUBLE
+from ibapi.errors import FAIL_SEND_ORDER, NOT_CONNECTED, UPDATE_TWS
+from ibapi.message import OUT
+from ibapi.protobuf.PlaceOrderRequest_pb2 import PlaceOrderRequest as PlaceOrderRequestProto
+from ibapi.server_versions import (
+    MIN_SERVER_VER_FRACTIONAL_POSITIONS,
+    MIN_SERVER_VER_ORDER_COMBO_LEGS_PRICE,
+    MIN_SERVER_VER_TRAILING_PERCENT,
+)
+from ibapi.utils import ClientException, currentTimeMillis, decimalMaxString
+from ibapi.wrapper import EWrapper
+
+# stand in values of the variable fields, to find them in the encoded order
+SENTINELS = {
+    "orderId": 987654321987,
+    "totalQuantity": Decimal("987654321.987654321"),
+    "lmtPrice": 987654321.125,
+    "auxPrice": 987654322.375,
+}
+
+
+class CapturingWrapper(EWrapper):
+    def __init__(self):
+        EWrapper.__init__(self)
+        self.errors = []
+
+    def error(self, reqId, errorTime, errorCode, errorString, advancedOrderRejectJson=""):
+        self.errors.append((errorCode, errorString))
+
+
+class OrderTemplate:
+    def __init__(self, client: EClient, contract, order):
+        self.client = client
+        self.contract = copy.deepcopy(contract)
+        self.order = copy.deepcopy(order)
+        self.serverVersion = None
+        self.compile()
+
+    def compile(self):
+        client = self.client
+        if not client.isConnected():
+            raise ClientException(NOT_CONNECTED.code(), NOT_CONNECTED.msg(), "")
+        self.serverVersion = client.serverVersion()
+        self.useProtoBuf = client.useProtoBuf(OUT.PLACE_ORDER)
+        try:
+            if self.useProtoBuf:
+                self.compileProto()
+            else:
+                self.compileText()
+        except Exception:
+            # compiled again by the next place()
+            self.serverVersion = None
+            raise
+
+    def compileProto(self):
+        client = self.client
+        proto = createPlaceOrderRequestProto(0, self.contract, self.order)
+        for field, validate, what in (
+            ("order", client.validateOrderParameters, "order"),
+            ("attachedOrders", client.validateAttachedOrdersParameters, "attached orders"),
+        ):
+            if not proto.HasField(field):
+                continue
+            wrongParam = validate(getattr(proto, field))
+            if wrongParam is not None:
+                raise ClientException(
+                    UPDATE_TWS.code(),
+                    UPDATE_TWS.msg(),
+                    " The following %s parameter is not supported by your TWS version - %s" % (what, wrongParam),
+                )
+        self.proto = proto
+
+    def compileText(self):
+        """Encodes the order with the sentinel values through placeOrder and
+        cuts the text around them."""
+        captured = []
+        capturing = copy.copy(self.client)
+        capturing.wrapper = CapturingWrapper()
+        capturing.sendMsg = lambda msgId, msg: captured.append(msg)
+        order = copy.copy(self.order)
+        for name in ("totalQuantity", "lmtPrice", "auxPrice"):
+            setattr(order, name, SENTINELS[name])
+        EClient.placeOrder(capturing, SENTINELS["orderId"], self.contract, order)
+        if capturing.wrapper.errors:
+            code, msg = capturing.wrapper.errors[0]
+            raise ClientException(code, msg, "")
+
+        fields = captured[0].split("\0")
+        texts = {
+            "orderId": str(SENTINELS["orderId"]),
+            "totalQuantity": self.formatQuantity(SENTINELS["totalQuantity"])[:-1],
+            "lmtPrice": self.formatLmtPrice(SENTINELS["lmtPrice"])[:-1],
+            "auxPrice": self.formatAuxPrice(SENTINELS["auxPrice"])[:-1],
+        }
+        slots = []
+        for name, text in texts.items():
+            positions = [idx for idx, field in enumerate(fields) if field == text]
+            if len(positions) != 1:
+                raise ValueError("cannot find the %s field in the encoded order" % name)
+            slots.append((positions[0], name))
+        slots.sort()
+
+        # segments[i] is the text before the ith variable field
+        self.segments = []
+        self.slotNames = []
+        start = 0
+        for position, name in slots:
+            self.segments.append("".join(field + "\0" for field in fields[start:position]))
+            self.slotNames.append(name)
+            start = position + 1
+        self.tail = "\0".join(fields[start:])
+
+        self.defaults = {
+            "totalQuantity": self.formatQuantity(self.order.totalQuantity),
+            "lmtPrice": self.formatLmtPrice(self.order.lmtPrice),
+            "auxPrice": self.formatAuxPrice(self.order.auxPrice),
+        }
+
+    def formatQuantity(self, totalQuantity) -> str:
+        if self.serverVersion >= MIN_SERVER_VER_FRACTIONAL_POSITIONS:
+            return make_field(totalQuantity)
+        return make_field(int(totalQuantity))
+
+    def formatLmtPrice(self, lmtPrice) -> str:
+        if self.serverVersion < MIN_SERVER_VER_ORDER_COMBO_LEGS_PRICE:
+            return make_field(lmtPrice if lmtPrice != UNSET_DOUBLE else 0)
+        return make_field_handle_empty(lmtPrice)
+
+    def formatAuxPrice(self, auxPrice) -> str:
+        if self.serverVersion < MIN_SERVER_VER_TRAILING_PERCENT:
+            return make_field(auxPrice if auxPrice != UNSET_DOUBLE else 0)
+        return make_field_handle_empty(auxPrice)
+
+    def place(self, orderId, lmtPrice=None, totalQuantity=None, auxPrice=None):
+        """Places the template's order with orderId, the other arguments
+        replace those of the template when given."""
+        client = self.client
+        if not client.isConnected():
+            client.wrapper.error(orderId, currentTimeMillis(), NOT_CONNECTED.code(), NOT_CONNECTED.msg())
+            return
+        try:
+            if client.serverVersion() != self.serverVersion:
+                self.compile()
+            if self.useProtoBuf:
+                proto = PlaceOrderRequestProto()
+                proto.CopyFrom(self.proto)
+                proto.orderId = orderId
+                if totalQuantity is not None:
+                    proto.order.totalQuantity = decimalMaxString(totalQuantity)
+                # an unset price is left out, as createOrderProto does
+                if lmtPrice == UNSET_DOUBLE:
+                    proto.order.ClearField("lmtPrice")
+                elif lmtPrice is not None:
+                    proto.order.lmtPrice = lmtPrice
+                if auxPrice == UNSET_DOUBLE:
+                    proto.order.ClearField("auxPrice")
+                elif auxPrice is not None:
+                    proto.order.auxPrice = auxPrice
+                client.sendMsgProtoBuf(OUT.PLACE_ORDER + PROTOBUF_MSG_ID, proto.SerializeToString())
+                return
+
+            values = {
+                "orderId": make_field(orderId),
+                "totalQuantity": self.defaults["totalQuantity"]
+                if totalQuantity is None else self.formatQuantity(totalQuantity),
+                "lmtPrice": self.defaults["lmtPrice"] if lmtPrice is None else self.formatLmtPrice(lmtPrice),
+                "auxPrice": self.defaults["auxPrice"] if auxPrice is None else self.formatAuxPrice(auxPrice),
+            }
+            parts = []
+            for segment, name in zip(self.segments, self.slotNames):
+                parts.append(segment)
+                parts.append(values[name])
+            parts.append(self.tail)
+            client.sendMsg(OUT.PLACE_ORDER, "".join(parts))
+        except ClientException as ex:
+            client.wrapper.error(orderId, currentTimeMillis(), ex.code, ex.msg + ex.text)
+        except ValueError as ex:
+            client.wrapper.error(orderId, currentTimeMillis(), FAIL_SEND_ORDER.code(), FAIL_SEND_ORDER.msg() + str(ex))
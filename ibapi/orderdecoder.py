@@ -36,7 +36,16 @@ from ibapi.server_versions import (
     MIN_SERVER_VER_SUBMITTER
 )
 from ibapi.tag_value import TagValue
-from ibapi.utils import decode, SHOW_UNSET, isPegBenchOrder
+from ibapi.utils import (
+    read_int,
+    read_int_show_unset,
+    read_float,
+    read_float_show_unset,
+    read_decimal,
+    read_bool,
+    read_str,
+    isPegBenchOrder,
+)
 from ibapi.wrapper import DeltaNeutralContract
 from ibapi.softdollartier import SoftDollarTier
 
@@ -52,488 +61,488 @@ class OrderDecoder(Object):
         self.serverVersion = serverVersion
 
     def decodeOrderId(self, fields):
-        self.order.orderId = decode(int, fields)
+        self.order.orderId = read_int(fields)
 
     def decodeContractFields(self, fields):
-        self.contract.conId = decode(int, fields)
-        self.contract.symbol = decode(str, fields)
-        self.contract.secType = decode(str, fields)
-        self.contract.lastTradeDateOrContractMonth = decode(str, fields)
-        self.contract.strike = decode(float, fields)
-        self.contract.right = decode(str, fields)
+        self.contract.conId = read_int(fields)
+        self.contract.symbol = read_str(fields)
+        self.contract.secType = read_str(fields)
+        self.contract.lastTradeDateOrContractMonth = read_str(fields)
+        self.contract.strike = read_float(fields)
+        self.contract.right = read_str(fields)
         if self.version >= 32:
-            self.contract.multiplier = decode(str, fields)
-        self.contract.exchange = decode(str, fields)
-        self.contract.currency = decode(str, fields)
-        self.contract.localSymbol = decode(str, fields)
+            self.contract.multiplier = read_str(fields)
+        self.contract.exchange = read_str(fields)
+        self.contract.currency = read_str(fields)
+        self.contract.localSymbol = read_str(fields)
         if self.version >= 32:
-            self.contract.tradingClass = decode(str, fields)
+            self.contract.tradingClass = read_str(fields)
 
     def decodeAction(self, fields):
-        self.order.action = decode(str, fields)
+        self.order.action = read_str(fields)
 
     def decodeTotalQuantity(self, fields):
-        self.order.totalQuantity = decode(Decimal, fields)
+        self.order.totalQuantity = read_decimal(fields)
 
     def decodeOrderType(self, fields):
-        self.order.orderType = decode(str, fields)
+        self.order.orderType = read_str(fields)
 
     def decodeLmtPrice(self, fields):
         if self.version < 29:
-            self.order.lmtPrice = decode(float, fields)
+            self.order.lmtPrice = read_float(fields)
         else:
-            self.order.lmtPrice = decode(float, fields, SHOW_UNSET)
+            self.order.lmtPrice = read_float_show_unset(fields)
 
     def decodeAuxPrice(self, fields):
         if self.version < 30:
-            self.order.auxPrice = decode(float, fields)
+            self.order.auxPrice = read_float(fields)
         else:
-            self.order.auxPrice = decode(float, fields, SHOW_UNSET)
+            self.order.auxPrice = read_float_show_unset(fields)
 
     def decodeTIF(self, fields):
-        self.order.tif = decode(str, fields)
+        self.order.tif = read_str(fields)
 
     def decodeOcaGroup(self, fields):
-        self.order.ocaGroup = decode(str, fields)
+        self.order.ocaGroup = read_str(fields)
 
     def decodeAccount(self, fields):
-        self.order.account = decode(str, fields)
+        self.order.account = read_str(fields)
 
     def decodeOpenClose(self, fields):
-        self.order.openClose = decode(str, fields)
+        self.order.openClose = read_str(fields)
 
     def decodeOrigin(self, fields):
-        self.order.origin = decode(int, fields)
+        self.order.origin = read_int(fields)
 
     def decodeOrderRef(self, fields):
-        self.order.orderRef = decode(str, fields)
+        self.order.orderRef = read_str(fields)
 
     def decodeClientId(self, fields):
-        self.order.clientId = decode(int, fields)
+        self.order.clientId = read_int(fields)
 
     def decodePermId(self, fields):
-        self.order.permId = decode(int, fields)
+        self.order.permId = read_int(fields)
 
     def decodeOutsideRth(self, fields):
-        self.order.outsideRth = decode(bool, fields)
+        self.order.outsideRth = read_bool(fields)
 
     def decodeHidden(self, fields):
-        self.order.hidden = decode(bool, fields)
+        self.order.hidden = read_bool(fields)
 
     def decodeDiscretionaryAmt(self, fields):
-        self.order.discretionaryAmt = decode(float, fields)
+        self.order.discretionaryAmt = read_float(fields)
 
     def decodeGoodAfterTime(self, fields):
-        self.order.goodAfterTime = decode(str, fields)
+        self.order.goodAfterTime = read_str(fields)
 
     def skipSharesAllocation(self, fields):
-        _sharesAllocation = decode(str, fields)  # deprecated
+        _sharesAllocation = read_str(fields)  # deprecated
 
     def decodeFAParams(self, fields):
-        self.order.faGroup = decode(str, fields)
-        self.order.faMethod = decode(str, fields)
-        self.order.faPercentage = decode(str, fields)
+        self.order.faGroup = read_str(fields)
+        self.order.faMethod = read_str(fields)
+        self.order.faPercentage = read_str(fields)
         if self.serverVersion < MIN_SERVER_VER_FA_PROFILE_DESUPPORT:
-            _faProfile = decode(str, fields)  # skip deprecated faProfile field
+            _faProfile = read_str(fields)  # skip deprecated faProfile field
 
     def decodeModelCode(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_MODELS_SUPPORT:
-            self.order.modelCode = decode(str, fields)
+            self.order.modelCode = read_str(fields)
 
     def decodeGoodTillDate(self, fields):
-        self.order.goodTillDate = decode(str, fields)
+        self.order.goodTillDate = read_str(fields)
 
     def decodeRule80A(self, fields):
-        self.order.rule80A = decode(str, fields)
+        self.order.rule80A = read_str(fields)
 
     def decodePercentOffset(self, fields):
-        self.order.percentOffset = decode(float, fields, SHOW_UNSET)
+        self.order.percentOffset = read_float_show_unset(fields)
 
     def decodeSettlingFirm(self, fields):
-        self.order.settlingFirm = decode(str, fields)
+        self.order.settlingFirm = read_str(fields)
 
     def decodeShortSaleParams(self, fields):
-        self.order.shortSaleSlot = decode(int, fields)
-        self.order.designatedLocation = decode(str, fields)
+        self.order.shortSaleSlot = read_int(fields)
+        self.order.designatedLocation = read_str(fields)
         if self.serverVersion == MIN_SERVER_VER_SSHORTX_OLD:
-            decode(int, fields)
+            read_int(fields)
         elif self.version >= 23:
-            self.order.exemptCode = decode(int, fields)
+            self.order.exemptCode = read_int(fields)
 
     def decodeAuctionStrategy(self, fields):
-        self.order.auctionStrategy = decode(int, fields)
+        self.order.auctionStrategy = read_int(fields)
 
     def decodeBoxOrderParams(self, fields):
-        self.order.startingPrice = decode(float, fields, SHOW_UNSET)
-        self.order.stockRefPrice = decode(float, fields, SHOW_UNSET)
-        self.order.delta = decode(float, fields, SHOW_UNSET)
+        self.order.startingPrice = read_float_show_unset(fields)
+        self.order.stockRefPrice = read_float_show_unset(fields)
+        self.order.delta = read_float_show_unset(fields)
 
     def decodePegToStkOrVolOrderParams(self, fields):
-        self.order.stockRangeLower = decode(float, fields, SHOW_UNSET)
-        self.order.stockRangeUpper = decode(float, fields, SHOW_UNSET)
+        self.order.stockRangeLower = read_float_show_unset(fields)
+        self.order.stockRangeUpper = read_float_show_unset(fields)
 
     def decodeDisplaySize(self, fields):
-        self.order.displaySize = decode(int, fields, SHOW_UNSET)
+        self.order.displaySize = read_int_show_unset(fields)
 
     def decodeBlockOrder(self, fields):
-        self.order.blockOrder = decode(bool, fields)
+        self.order.blockOrder = read_bool(fields)
 
     def decodeSweepToFill(self, fields):
-        self.order.sweepToFill = decode(bool, fields)
+        self.order.sweepToFill = read_bool(fields)
 
     def decodeAllOrNone(self, fields):
-        self.order.allOrNone = decode(bool, fields)
+        self.order.allOrNone = read_bool(fields)
 
     def decodeMinQty(self, fields):
-        self.order.minQty = decode(int, fields, SHOW_UNSET)
+        self.order.minQty = read_int_show_unset(fields)
 
     def decodeOcaType(self, fields):
-        self.order.ocaType = decode(int, fields)
+        self.order.ocaType = read_int(fields)
 
     def skipETradeOnly(self, fields):
-        _eTradeOnly = decode(bool, fields)  # deprecated
+        _eTradeOnly = read_bool(fields)  # deprecated
 
     def skipFirmQuoteOnly(self, fields):
-        _firmQuoteOnly = decode(bool, fields)  # ` deprecated
+        _firmQuoteOnly = read_bool(fields)  # ` deprecated
 
     def skipNbboPriceCap(self, fields):
-        _nbboPriceCap = decode(float, fields, SHOW_UNSET)  # deprecated
+        _nbboPriceCap = read_float_show_unset(fields)  # deprecated
 
     def decodeParentId(self, fields):
-        self.order.parentId = decode(int, fields)
+        self.order.parentId = read_int(fields)
 
     def decodeTriggerMethod(self, fields):
-        self.order.triggerMethod = decode(int, fields)
+        self.order.triggerMethod = read_int(fields)
 
     def decodeVolOrderParams(self, fields, readOpenOrderAttribs):
-        self.order.volatility = decode(float, fields, SHOW_UNSET)
-        self.order.volatilityType = decode(int, fields)
-        self.order.deltaNeutralOrderType = decode(str, fields)
-        self.order.deltaNeutralAuxPrice = decode(float, fields, SHOW_UNSET)
+        self.order.volatility = read_float_show_unset(fields)
+        self.order.volatilityType = read_int(fields)
+        self.order.deltaNeutralOrderType = read_str(fields)
+        self.order.deltaNeutralAuxPrice = read_float_show_unset(fields)
 
         if self.version >= 27 and self.order.deltaNeutralOrderType:
-            self.order.deltaNeutralConId = decode(int, fields)
+            self.order.deltaNeutralConId = read_int(fields)
             if readOpenOrderAttribs:
-                self.order.deltaNeutralSettlingFirm = decode(str, fields)
-                self.order.deltaNeutralClearingAccount = decode(str, fields)
-                self.order.deltaNeutralClearingIntent = decode(str, fields)
+                self.order.deltaNeutralSettlingFirm = read_str(fields)
+                self.order.deltaNeutralClearingAccount = read_str(fields)
+                self.order.deltaNeutralClearingIntent = read_str(fields)
 
         if self.version >= 31 and self.order.deltaNeutralOrderType:
             if readOpenOrderAttribs:
-                self.order.deltaNeutralOpenClose = decode(str, fields)
-            self.order.deltaNeutralShortSale = decode(bool, fields)
-            self.order.deltaNeutralShortSaleSlot = decode(int, fields)
-            self.order.deltaNeutralDesignatedLocation = decode(str, fields)
+                self.order.deltaNeutralOpenClose = read_str(fields)
+            self.order.deltaNeutralShortSale = read_bool(fields)
+            self.order.deltaNeutralShortSaleSlot = read_int(fields)
+            self.order.deltaNeutralDesignatedLocation = read_str(fields)
 
-        self.order.continuousUpdate = decode(bool, fields)
-        self.order.referencePriceType = decode(int, fields)
+        self.order.continuousUpdate = read_bool(fields)
+        self.order.referencePriceType = read_int(fields)
 
     def decodeTrailParams(self, fields):
-        self.order.trailStopPrice = decode(float, fields, SHOW_UNSET)
+        self.order.trailStopPrice = read_float_show_unset(fields)
         if self.version >= 30:
-            self.order.trailingPercent = decode(float, fields, SHOW_UNSET)
+            self.order.trailingPercent = read_float_show_unset(fields)
 
     def decodeBasisPoints(self, fields):
-        self.order.basisPoints = decode(float, fields, SHOW_UNSET)
-        self.order.basisPointsType = decode(int, fields, SHOW_UNSET)
+        self.order.basisPoints = read_float_show_unset(fields)
+        self.order.basisPointsType = read_int_show_unset(fields)
 
     def decodeComboLegs(self, fields):
-        self.contract.comboLegsDescrip = decode(str, fields)
+        self.contract.comboLegsDescrip = read_str(fields)
 
         if self.version >= 29:
-            comboLegsCount = decode(int, fields)
+            comboLegsCount = read_int(fields)
 
             if comboLegsCount > 0:
                 self.contract.comboLegs = []
                 for _ in range(comboLegsCount):
                     comboLeg = ComboLeg()
-                    comboLeg.conId = decode(int, fields)
-                    comboLeg.ratio = decode(int, fields)
-                    comboLeg.action = decode(str, fields)
-                    comboLeg.exchange = decode(str, fields)
-                    comboLeg.openClose = decode(int, fields)
-                    comboLeg.shortSaleSlot = decode(int, fields)
-                    comboLeg.designatedLocation = decode(str, fields)
-                    comboLeg.exemptCode = decode(int, fields)
+                    comboLeg.conId = read_int(fields)
+                    comboLeg.ratio = read_int(fields)
+                    comboLeg.action = read_str(fields)
+                    comboLeg.exchange = read_str(fields)
+                    comboLeg.openClose = read_int(fields)
+                    comboLeg.shortSaleSlot = read_int(fields)
+                    comboLeg.designatedLocation = read_str(fields)
+                    comboLeg.exemptCode = read_int(fields)
                     self.contract.comboLegs.append(comboLeg)
 
-            orderComboLegsCount = decode(int, fields)
+            orderComboLegsCount = read_int(fields)
             if orderComboLegsCount > 0:
                 self.order.orderComboLegs = []
                 for _ in range(orderComboLegsCount):
                     orderComboLeg = OrderComboLeg()
-                    orderComboLeg.price = decode(float, fields, SHOW_UNSET)
+                    orderComboLeg.price = read_float_show_unset(fields)
                     self.order.orderComboLegs.append(orderComboLeg)
 
     def decodeSmartComboRoutingParams(self, fields):
         if self.version >= 26:
-            smartComboRoutingParamsCount = decode(int, fields)
+            smartComboRoutingParamsCount = read_int(fields)
             if smartComboRoutingParamsCount > 0:
                 self.order.smartComboRoutingParams = []
                 for _ in range(smartComboRoutingParamsCount):
                     tagValue = TagValue()
-                    tagValue.tag = decode(str, fields)
-                    tagValue.value = decode(str, fields)
+                    tagValue.tag = read_str(fields)
+                    tagValue.value = read_str(fields)
                     self.order.smartComboRoutingParams.append(tagValue)
 
     def decodeScaleOrderParams(self, fields):
         if self.version >= 20:
-            self.order.scaleInitLevelSize = decode(int, fields, SHOW_UNSET)
-            self.order.scaleSubsLevelSize = decode(int, fields, SHOW_UNSET)
+            self.order.scaleInitLevelSize = read_int_show_unset(fields)
+            self.order.scaleSubsLevelSize = read_int_show_unset(fields)
         else:
-            self.order.notSuppScaleNumComponents = decode(int, fields, SHOW_UNSET)
-            self.order.scaleInitLevelSize = decode(int, fields, SHOW_UNSET)
+            self.order.notSuppScaleNumComponents = read_int_show_unset(fields)
+            self.order.scaleInitLevelSize = read_int_show_unset(fields)
 
-        self.order.scalePriceIncrement = decode(float, fields, SHOW_UNSET)
+        self.order.scalePriceIncrement = read_float_show_unset(fields)
 
         if (
             self.version >= 28
             and self.order.scalePriceIncrement != UNSET_DOUBLE
             and self.order.scalePriceIncrement > 0.0
         ):
-            self.order.scalePriceAdjustValue = decode(float, fields, SHOW_UNSET)
-            self.order.scalePriceAdjustInterval = decode(int, fields, SHOW_UNSET)
-            self.order.scaleProfitOffset = decode(float, fields, SHOW_UNSET)
-            self.order.scaleAutoReset = decode(bool, fields)
-            self.order.scaleInitPosition = decode(int, fields, SHOW_UNSET)
-            self.order.scaleInitFillQty = decode(int, fields, SHOW_UNSET)
-            self.order.scaleRandomPercent = decode(bool, fields)
+            self.order.scalePriceAdjustValue = read_float_show_unset(fields)
+            self.order.scalePriceAdjustInterval = read_int_show_unset(fields)
+            self.order.scaleProfitOffset = read_float_show_unset(fields)
+            self.order.scaleAutoReset = read_bool(fields)
+            self.order.scaleInitPosition = read_int_show_unset(fields)
+            self.order.scaleInitFillQty = read_int_show_unset(fields)
+            self.order.scaleRandomPercent = read_bool(fields)
 
     def decodeHedgeParams(self, fields):
         if self.version >= 24:
-            self.order.hedgeType = decode(str, fields)
+            self.order.hedgeType = read_str(fields)
             if self.order.hedgeType:
-                self.order.hedgeParam = decode(str, fields)
+                self.order.hedgeParam = read_str(fields)
 
     def decodeOptOutSmartRouting(self, fields):
         if self.version >= 25:
-            self.order.optOutSmartRouting = decode(bool, fields)
+            self.order.optOutSmartRouting = read_bool(fields)
 
     def decodeClearingParams(self, fields):
-        self.order.clearingAccount = decode(str, fields)
-        self.order.clearingIntent = decode(str, fields)
+        self.order.clearingAccount = read_str(fields)
+        self.order.clearingIntent = read_str(fields)
 
     def decodeNotHeld(self, fields):
         if self.version >= 22:
-            self.order.notHeld = decode(bool, fields)
+            self.order.notHeld = read_bool(fields)
 
     def decodeDeltaNeutral(self, fields):
         if self.version >= 20:
-            deltaNeutralContractPresent = decode(bool, fields)
+            deltaNeutralContractPresent = read_bool(fields)
             if deltaNeutralContractPresent:
                 self.contract.deltaNeutralContract = DeltaNeutralContract()
-                self.contract.deltaNeutralContract.conId = decode(int, fields)
-                self.contract.deltaNeutralContract.delta = decode(float, fields)
-                self.contract.deltaNeutralContract.price = decode(float, fields)
+                self.contract.deltaNeutralContract.conId = read_int(fields)
+                self.contract.deltaNeutralContract.delta = read_float(fields)
+                self.contract.deltaNeutralContract.price = read_float(fields)
 
     def decodeAlgoParams(self, fields):
         if self.version >= 21:
-            self.order.algoStrategy = decode(str, fields)
+            self.order.algoStrategy = read_str(fields)
             if self.order.algoStrategy:
-                algoParamsCount = decode(int, fields)
+                algoParamsCount = read_int(fields)
                 if algoParamsCount > 0:
                     self.order.algoParams = []
                     for _ in range(algoParamsCount):
                         tagValue = TagValue()
-                        tagValue.tag = decode(str, fields)
-                        tagValue.value = decode(str, fields)
+                        tagValue.tag = read_str(fields)
+                        tagValue.value = read_str(fields)
                         self.order.algoParams.append(tagValue)
 
     def decodeSolicited(self, fields):
         if self.version >= 33:
-            self.order.solicited = decode(bool, fields)
+            self.order.solicited = read_bool(fields)
 
     def decodeOrderStatus(self, fields):
-        self.orderState.status = decode(str, fields)
+        self.orderState.status = read_str(fields)
 
     def decodeWhatIfInfoAndCommissionAndFees(self, fields):
-        self.order.whatIf = decode(bool, fields)
+        self.order.whatIf = read_bool(fields)
         OrderDecoder.decodeOrderStatus(self, fields)
         if self.serverVersion >= MIN_SERVER_VER_WHAT_IF_EXT_FIELDS:
-            self.orderState.initMarginBefore = decode(str, fields)
-            self.orderState.maintMarginBefore = decode(str, fields)
-            self.orderState.equityWithLoanBefore = decode(str, fields)
-            self.orderState.initMarginChange = decode(str, fields)
-            self.orderState.maintMarginChange = decode(str, fields)
-            self.orderState.equityWithLoanChange = decode(str, fields)
-
-        self.orderState.initMarginAfter = decode(str, fields)
-        self.orderState.maintMarginAfter = decode(str, fields)
-        self.orderState.equityWithLoanAfter = decode(str, fields)
-
-        self.orderState.commissionAndFees = decode(float, fields, SHOW_UNSET)
-        self.orderState.minCommissionAndFees = decode(float, fields, SHOW_UNSET)
-        self.orderState.maxCommissionAndFees = decode(float, fields, SHOW_UNSET)
-        self.orderState.commissionAndFeesCurrency = decode(str, fields)
+            self.orderState.initMarginBefore = read_str(fields)
+            self.orderState.maintMarginBefore = read_str(fields)
+            self.orderState.equityWithLoanBefore = read_str(fields)
+            self.orderState.initMarginChange = read_str(fields)
+            self.orderState.maintMarginChange = read_str(fields)
+            self.orderState.equityWithLoanChange = read_str(fields)
+
+        self.orderState.initMarginAfter = read_str(fields)
+        self.orderState.maintMarginAfter = read_str(fields)
+        self.orderState.equityWithLoanAfter = read_str(fields)
+
+        self.orderState.commissionAndFees = read_float_show_unset(fields)
+        self.orderState.minCommissionAndFees = read_float_show_unset(fields)
+        self.orderState.maxCommissionAndFees = read_float_show_unset(fields)
+        self.orderState.commissionAndFeesCurrency = read_str(fields)
         
         if self.serverVersion >= MIN_SERVER_VER_FULL_ORDER_PREVIEW_FIELDS:
-            self.orderState.marginCurrency = decode(str, fields)
-            self.orderState.initMarginBeforeOutsideRTH = decode(float, fields, SHOW_UNSET)
-            self.orderState.maintMarginBeforeOutsideRTH = decode(float, fields, SHOW_UNSET)
-            self.orderState.equityWithLoanBeforeOutsideRTH = decode(float, fields, SHOW_UNSET)
-            self.orderState.initMarginChangeOutsideRTH = decode(float, fields, SHOW_UNSET)
-            self.orderState.maintMarginChangeOutsideRTH = decode(float, fields, SHOW_UNSET)
-            self.orderState.equityWithLoanChangeOutsideRTH = decode(float, fields, SHOW_UNSET)
-            self.orderState.initMarginAfterOutsideRTH = decode(float, fields, SHOW_UNSET)
-            self.orderState.maintMarginAfterOutsideRTH = decode(float, fields, SHOW_UNSET)
-            self.orderState.equityWithLoanAfterOutsideRTH = decode(float, fields, SHOW_UNSET)
-            self.orderState.suggestedSize = decode(Decimal, fields)
-            self.orderState.rejectReason = decode(str, fields)
+            self.orderState.marginCurrency = read_str(fields)
+            self.orderState.initMarginBeforeOutsideRTH = read_float_show_unset(fields)
+            self.orderState.maintMarginBeforeOutsideRTH = read_float_show_unset(fields)
+            self.orderState.equityWithLoanBeforeOutsideRTH = read_float_show_unset(fields)
+            self.orderState.initMarginChangeOutsideRTH = read_float_show_unset(fields)
+            self.orderState.maintMarginChangeOutsideRTH = read_float_show_unset(fields)
+            self.orderState.equityWithLoanChangeOutsideRTH = read_float_show_unset(fields)
+            self.orderState.initMarginAfterOutsideRTH = read_float_show_unset(fields)
+            self.orderState.maintMarginAfterOutsideRTH = read_float_show_unset(fields)
+            self.orderState.equityWithLoanAfterOutsideRTH = read_float_show_unset(fields)
+            self.orderState.suggestedSize = read_decimal(fields)
+            self.orderState.rejectReason = read_str(fields)
         
-            accountsCount = decode(int, fields)
+            accountsCount = read_int(fields)
             if accountsCount > 0:
                 self.orderState.orderAllocations = []
                 for _ in range(accountsCount):
                     orderAllocation = OrderAllocation()
-                    orderAllocation.account = decode(str, fields)
-                    orderAllocation.position = decode(Decimal, fields)
-                    orderAllocation.positionDesired = decode(Decimal, fields)
-                    orderAllocation.positionAfter = decode(Decimal, fields)
-                    orderAllocation.desiredAllocQty = decode(Decimal, fields)
-                    orderAllocation.allowedAllocQty = decode(Decimal, fields)
-                    orderAllocation.isMonetary = decode(bool, fields)
+                    orderAllocation.account = read_str(fields)
+                    orderAllocation.position = read_decimal(fields)
+                    orderAllocation.positionDesired = read_decimal(fields)
+                    orderAllocation.positionAfter = read_decimal(fields)
+                    orderAllocation.desiredAllocQty = read_decimal(fields)
+                    orderAllocation.allowedAllocQty = read_decimal(fields)
+                    orderAllocation.isMonetary = read_bool(fields)
                     self.orderState.orderAllocations.append(orderAllocation)
-        self.orderState.warningText = decode(str, fields)
+        self.orderState.warningText = read_str(fields)
 
     def decodeVolRandomizeFlags(self, fields):
         if self.version >= 34:
-            self.order.randomizeSize = decode(bool, fields)
-            self.order.randomizePrice = decode(bool, fields)
+            self.order.randomizeSize = read_bool(fields)
+            self.order.randomizePrice = read_bool(fields)
 
     def decodePegToBenchParams(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_PEGGED_TO_BENCHMARK:
             if isPegBenchOrder(self.order.orderType):
-                self.order.referenceContractId = decode(int, fields)
-                self.order.isPeggedChangeAmountDecrease = decode(bool, fields)
-                self.order.peggedChangeAmount = decode(float, fields)
-                self.order.referenceChangeAmount = decode(float, fields)
-                self.order.referenceExchangeId = decode(str, fields)
+                self.order.referenceContractId = read_int(fields)
+                self.order.isPeggedChangeAmountDecrease = read_bool(fields)
+                self.order.peggedChangeAmount = read_float(fields)
+                self.order.referenceChangeAmount = read_float(fields)
+                self.order.referenceExchangeId = read_str(fields)
 
     def decodeConditions(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_PEGGED_TO_BENCHMARK:
-            conditionsSize = decode(int, fields)
+            conditionsSize = read_int(fields)
             if conditionsSize > 0:
                 self.order.conditions = []
                 for _ in range(conditionsSize):
-                    conditionType = decode(int, fields)
+                    conditionType = read_int(fields)
                     condition = order_condition.Create(conditionType)
                     condition.decode(fields)
                     self.order.conditions.append(condition)
 
-                self.order.conditionsIgnoreRth = decode(bool, fields)
-                self.order.conditionsCancelOrder = decode(bool, fields)
+                self.order.conditionsIgnoreRth = read_bool(fields)
+                self.order.conditionsCancelOrder = read_bool(fields)
 
     def decodeAdjustedOrderParams(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_PEGGED_TO_BENCHMARK:
-            self.order.adjustedOrderType = decode(str, fields)
-            self.order.triggerPrice = decode(float, fields)
+            self.order.adjustedOrderType = read_str(fields)
+            self.order.triggerPrice = read_float(fields)
             OrderDecoder.decodeStopPriceAndLmtPriceOffset(self, fields)
-            self.order.adjustedStopPrice = decode(float, fields)
-            self.order.adjustedStopLimitPrice = decode(float, fields)
-            self.order.adjustedTrailingAmount = decode(float, fields)
-            self.order.adjustableTrailingUnit = decode(int, fields)
+            self.order.adjustedStopPrice = read_float(fields)
+            self.order.adjustedStopLimitPrice = read_float(fields)
+            self.order.adjustedTrailingAmount = read_float(fields)
+            self.order.adjustableTrailingUnit = read_int(fields)
 
     def decodeStopPriceAndLmtPriceOffset(self, fields):
-        self.order.trailStopPrice = decode(float, fields)
-        self.order.lmtPriceOffset = decode(float, fields)
+        self.order.trailStopPrice = read_float(fields)
+        self.order.lmtPriceOffset = read_float(fields)
 
     def decodeSoftDollarTier(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_SOFT_DOLLAR_TIER:
-            name = decode(str, fields)
-            value = decode(str, fields)
-            displayName = decode(str, fields)
+            name = read_str(fields)
+            value = read_str(fields)
+            displayName = read_str(fields)
             self.order.softDollarTier = SoftDollarTier(name, value, displayName)
 
     def decodeCashQty(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_CASH_QTY:
-            self.order.cashQty = decode(float, fields)
+            self.order.cashQty = read_float(fields)
 
     def decodeDontUseAutoPriceForHedge(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_AUTO_PRICE_FOR_HEDGE:
-            self.order.dontUseAutoPriceForHedge = decode(bool, fields)
+            self.order.dontUseAutoPriceForHedge = read_bool(fields)
 
     def decodeIsOmsContainers(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_ORDER_CONTAINER:
-            self.order.isOmsContainer = decode(bool, fields)
+            self.order.isOmsContainer = read_bool(fields)
 
     def decodeDiscretionaryUpToLimitPrice(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_D_PEG_ORDERS:
-            self.order.discretionaryUpToLimitPrice = decode(bool, fields)
+            self.order.discretionaryUpToLimitPrice = read_bool(fields)
 
     def decodeAutoCancelDate(self, fields):
-        self.order.autoCancelDate = decode(str, fields)
+        self.order.autoCancelDate = read_str(fields)
 
     def decodeFilledQuantity(self, fields):
-        self.order.filledQuantity = decode(Decimal, fields)
+        self.order.filledQuantity = read_decimal(fields)
 
     def decodeRefFuturesConId(self, fields):
-        self.order.refFuturesConId = decode(int, fields)
+        self.order.refFuturesConId = read_int(fields)
 
     def decodeAutoCancelParent(self, fields, minVersionAutoCancelParent=MIN_CLIENT_VER):
         if self.serverVersion >= minVersionAutoCancelParent:
-            self.order.autoCancelParent = decode(bool, fields)
+            self.order.autoCancelParent = read_bool(fields)
 
     def decodeShareholder(self, fields):
-        self.order.shareholder = decode(str, fields)
+        self.order.shareholder = read_str(fields)
 
     def decodeImbalanceOnly(self, fields, minVersionImbalanceOnly=MIN_CLIENT_VER):
         if self.serverVersion >= minVersionImbalanceOnly:
-            self.order.imbalanceOnly = decode(bool, fields)
+            self.order.imbalanceOnly = read_bool(fields)
 
     def decodeRouteMarketableToBbo(self, fields):
-        self.order.routeMarketableToBbo = decode(bool, fields)
+        self.order.routeMarketableToBbo = read_bool(fields)
 
     def decodeParentPermId(self, fields):
-        self.order.parentPermId = decode(int, fields)
+        self.order.parentPermId = read_int(fields)
 
     def decodeCompletedTime(self, fields):
-        self.orderState.completedTime = decode(str, fields)
+        self.orderState.completedTime = read_str(fields)
 
     def decodeCompletedStatus(self, fields):
-        self.orderState.completedStatus = decode(str, fields)
+        self.orderState.completedStatus = read_str(fields)
 
     def decodeUsePriceMgmtAlgo(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_PRICE_MGMT_ALGO:
-            self.order.usePriceMgmtAlgo = decode(bool, fields)
+            self.order.usePriceMgmtAlgo = read_bool(fields)
 
     def decodeDuration(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_DURATION:
-            self.order.duration = decode(int, fields, SHOW_UNSET)
+            self.order.duration = read_int_show_unset(fields)
 
     def decodePostToAts(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_POST_TO_ATS:
-            self.order.postToAts = decode(int, fields, SHOW_UNSET)
+            self.order.postToAts = read_int_show_unset(fields)
 
     def decodePegBestPegMidOrderAttributes(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_PEGBEST_PEGMID_OFFSETS:
-            self.order.minTradeQty = decode(int, fields, SHOW_UNSET)
-            self.order.minCompeteSize = decode(int, fields, SHOW_UNSET)
-            self.order.competeAgainstBestOffset = decode(float, fields, SHOW_UNSET)
-            self.order.midOffsetAtWhole = decode(float, fields, SHOW_UNSET)
-            self.order.midOffsetAtHalf = decode(float, fields, SHOW_UNSET)
+            self.order.minTradeQty = read_int_show_unset(fields)
+            self.order.minCompeteSize = read_int_show_unset(fields)
+            self.order.competeAgainstBestOffset = read_float_show_unset(fields)
+            self.order.midOffsetAtWhole = read_float_show_unset(fields)
+            self.order.midOffsetAtHalf = read_float_show_unset(fields)
 
     def decodeCustomerAccount(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_CUSTOMER_ACCOUNT:
-            self.order.customerAccount = decode(str, fields)
+            self.order.customerAccount = read_str(fields)
 
     def decodeProfessionalCustomer(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_PROFESSIONAL_CUSTOMER:
-            self.order.professionalCustomer = decode(bool, fields)
+            self.order.professionalCustomer = read_bool(fields)
 
     def decodeBondAccruedInterest(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_BOND_ACCRUED_INTEREST:
-            self.order.bondAccruedInterest = decode(str, fields)
+            self.order.bondAccruedInterest = read_str(fields)
 
     def decodeIncludeOvernight(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_INCLUDE_OVERNIGHT:
-            self.order.includeOvernight = decode(bool, fields)
+            self.order.includeOvernight = read_bool(fields)
 
     def decodeCMETaggingFields(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_CME_TAGGING_FIELDS_IN_OPEN_ORDER:
-            self.order.extOperator = decode(str, fields)
-            self.order.manualOrderIndicator = decode(int, fields, SHOW_UNSET)
+            self.order.extOperator = read_str(fields)
+            self.order.manualOrderIndicator = read_int_show_unset(fields)
 
     def decodeSubmitter(self, fields):
         if self.serverVersion >= MIN_SERVER_VER_SUBMITTER:
-            self.order.submitter = decode(str, fields)
+            self.order.submitter = read_str(fields)
 
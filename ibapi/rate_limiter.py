@@ -0,0 +1,136 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+TWS disconnects a client which sends more than 50 msgs per second. A
+RateLimiter set on the Connection paces the outbound msgs with token buckets
+instead: a msg which finds no token waits for one, nothing is dropped.
+
+    app.setSocketOptions(rateLimiter=RateLimiter(budgets={"orders": (20, 5)}))
+
+Every msg takes a token of the overall bucket and one of its category's
+bucket, if that category has a budget. The categories are the lanes of the
+Connection: "orders" for placeOrder, cancelOrder and reqGlobalCancel, "data"
+for the other requests. A bucket lets through burst msgs at once and rate
+msgs per second after that, so a one second window sees at most
+rate + burst msgs: the defaults keep it at 50.
+
+Without the writer thread the request methods wait for their token. With it
+they return right away and the writer thread waits, the msgs stay queued in
+the meantime. stats[category] measures the delays either way.
+"""
+
+import collections
+import threading
+import time
+
+DEFAULT_RATE = 40.0
+DEFAULT_BURST = 10
+
+ORDERS = "orders"
+DATA = "data"
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+
+    def wait(self, now) -> float:
+        """How long until there is a token, 0 if there is one"""
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateStats:
+    def __init__(self):
+        self.nMsgs = 0
+        self.nWaits = 0
+        self.totalDelay = 0.0
+        self.maxDelay = 0.0
+
+    @property
+    def meanDelay(self) -> float:
+        return self.totalDelay / self.nMsgs if self.nMsgs else 0.0
+
+    def __str__(self):
+        return "nMsgs: %d, nWaits: %d, meanDelay: %.6f, maxDelay: %.6f" % (
+            self.nMsgs,
+            self.nWaits,
+            self.meanDelay,
+            self.maxDelay,
+        )
+
+
+class RateLimiter:
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, budgets=None):
+        """budgets - {category: (rate, burst)} on top of the overall rate"""
+        self.lock = threading.Lock()
+        self.bucket = TokenBucket(rate, burst)
+        self.buckets = {category: TokenBucket(*budget) for category, budget in (budgets or {}).items()}
+        self.stats = {ORDERS: RateStats(), DATA: RateStats()}
+        # when the msgs waiting in the writer thread's lanes were queued
+        self.queuedAt = {ORDERS: collections.deque(), DATA: collections.deque()}
+        # the oldest queued msg of the category was refused a token already
+        self.refused = {ORDERS: False, DATA: False}
+
+    def queued(self, category):
+        """Called as a msg is queued for the writer thread"""
+        self.queuedAt[category].append(time.monotonic())
+
+    def nQueued(self, category=None) -> int:
+        if category is None:
+            return sum(len(queuedAt) for queuedAt in self.queuedAt.values())
+        return len(self.queuedAt[category])
+
+    def clearQueued(self):
+        for queuedAt in self.queuedAt.values():
+            queuedAt.clear()
+        self.refused = {ORDERS: False, DATA: False}
+
+    def take(self, category, since=None, refused=False) -> float:
+        """Takes the tokens of a msg of category and returns 0, or returns
+        how long until they are there. since is when the msg was sent, the
+        time it was queued by default. A msg counts once in stats.nWaits
+        however many times it is refused: refused tells that it was already,
+        the limiter keeps track of it for the queued msgs."""
+        with self.lock:
+            now = time.monotonic()
+            buckets = [self.bucket]
+            if category in self.buckets:
+                buckets.append(self.buckets[category])
+            wait = max(bucket.wait(now) for bucket in buckets)
+            stats = self.stats[category]
+            if since is None:
+                refused = self.refused[category]
+            if wait > 0:
+                if not refused:
+                    stats.nWaits += 1
+                if since is None:
+                    self.refused[category] = True
+                return wait
+            for bucket in buckets:
+                bucket.tokens -= 1
+            if since is None:
+                self.refused[category] = False
+                queuedAt = self.queuedAt[category]
+                since = queuedAt.popleft() if queuedAt else now
+            delay = now - since
+            stats.nMsgs += 1
+            stats.totalDelay += delay
+            stats.maxDelay = max(stats.maxDelay, delay)
+        return 0.0
+
+    def acquire(self, category):
+        """Waits until a msg of category may be sent"""
+        since = time.monotonic()
+        refused = False
+        while True:
+            wait = self.take(category, since, refused)
+            if not wait:
+                return
+            refused = True
+            time.sleep(wait)
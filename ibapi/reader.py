@@ -4,14 +4,14 @@ Copyright (C) 2019 Interactive Brokers LLC. All rights reserved. This code is su
 
 The EReader runs in a separate threads and is responsible for receiving the
 incoming messages.
-It will read the packets from the wire, use the low level IB messaging to
-remove the size prefix and put the rest in a Queue.
+It will read the packets from the wire into a comm.FrameBuffer, use the low
+level IB messaging to remove the size prefix and put the rest in a MsgQueue, one batch per receive.
 """
 
 import logging
 from threading import Thread
 
-from ibapi import comm
+from ibapi import comm, utils
 
 logger = logging.getLogger(__name__)
 
@@ -25,24 +25,19 @@ class EReader(Thread):
     def run(self):
         try:
             logger.debug("EReader thread started")
-            buf = b""
+            buf = comm.FrameBuffer(self.conn.recvBufSize)
             while self.conn.isConnected():
-                data = self.conn.recvMsg()
-                logger.debug("reader loop, recvd size %d", len(data))
-                buf += data
-
-                while len(buf) > 0:
-                    (size, msg, buf) = comm.read_msg(buf)
-                    # logger.debug("resp %s", buf.decode('ascii'))
-                    logger.debug(
-                        "size:%d msg.size:%d msg:|%s| buf:%s|", size, len(msg), buf, "|"
-                    )
-
-                    if msg:
-                        self.msg_queue.put(msg)
-                    else:
-                        logger.debug("more incoming packet(s) are needed ")
-                        break
+                nRecv = self.conn.recvInto(buf.writable())
+                if utils.TRACE:
+                    logger.debug("reader loop, recvd size %d", nRecv)
+                buf.written(nRecv)
+
+                # the frames are views into buf, copy them out before handing
+                # them over to the other thread
+                msgs = [bytes(msg) for msg in buf.frames()]
+                if utils.TRACE:
+                    logger.debug("msgs:%d pending:%d", len(msgs), len(buf))
+                self.msg_queue.putBatch(msgs)
 
             logger.debug("EReader thread finished")
         except:
@@ -0,0 +1,348 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+Futures for the requests whose answer is a run of callbacks closed by an *End
+callback (or a single callback). A RequestRegistry keeps the pending requests
+keyed by reqId, collects the items as they come in and completes the future on
+the matching end callback, or fails it on an error for that reqId.
+
+RequestFuturesWrapper is an EWrapper doing that bookkeeping. Mixed with an
+EClient (or an AsyncEClient) it can issue any number of such requests
+concurrently:
+
+    class App(RequestFuturesWrapper, EClient):
+        def __init__(self):
+            RequestFuturesWrapper.__init__(self)
+            EClient.__init__(self, self)
+
+    futures = [app.request(app.reqContractDetails, c) for c in contracts]
+    details = [f.result(timeout=30) for f in futures]
+
+    # from a coroutine
+    details = await asyncio.gather(
+        *(app.requestAsync(app.reqContractDetails, c) for c in contracts))
+
+The result is the list of items received for the request, see the callbacks
+below for what an item is. A subclass overriding one of these callbacks has
+to call super() for the request to complete. The reqIds allocated by
+request() start at FIRST_REQ_ID, above the orderIds, so that the error() of
+an order never ends a request.
+"""
+
+import asyncio
+import concurrent.futures
+import itertools
+import threading
+
+from ibapi.wrapper import EWrapper
+
+# errors sent with a reqId which do not end the request
+WARNING_CODES = frozenset(range(2100, 2200)) | {10167, 10090}
+
+# the orderIds count up from nextValidId, the reqIds of request() from there
+FIRST_REQ_ID = 1 << 30
+
+
+class RequestError(Exception):
+    def __init__(self, reqId, code, msg, advancedOrderRejectJson=""):
+        super().__init__(f"request {reqId} failed: {code} {msg}")
+        self.reqId = reqId
+        self.code = code
+        self.msg = msg
+        self.advancedOrderRejectJson = advancedOrderRejectJson
+
+
+class PendingRequest:
+    def __init__(self, future):
+        self.future = future
+        self.items = []
+
+
+class RequestRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def register(self, reqId) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        with self.lock:
+            if reqId in self.pending:
+                raise ValueError(f"reqId {reqId} is already pending")
+            self.pending[reqId] = PendingRequest(future)
+        # a cancelled (eg: timed out) request is forgotten
+        future.add_done_callback(lambda _: self.discard(reqId, future))
+        return future
+
+    def discard(self, reqId, future):
+        with self.lock:
+            req = self.pending.get(reqId)
+            if req is not None and req.future is future:
+                del self.pending[reqId]
+
+    def addItem(self, reqId, item):
+        req = self.pending.get(reqId)
+        if req is not None:
+            req.items.append(item)
+
+    def addItems(self, reqId, items):
+        req = self.pending.get(reqId)
+        if req is not None:
+            req.items.extend(items)
+
+    def complete(self, reqId):
+        with self.lock:
+            req = self.pending.pop(reqId, None)
+        if req is not None and not req.future.done():
+            req.future.set_result(req.items)
+
+    def fail(self, reqId, exc):
+        with self.lock:
+            req = self.pending.pop(reqId, None)
+        if req is not None and not req.future.done():
+            req.future.set_exception(exc)
+
+    def failAll(self, exc):
+        with self.lock:
+            reqIds = list(self.pending)
+        for reqId in reqIds:
+            self.fail(reqId, exc)
+
+
+class RequestFuturesWrapper(EWrapper):
+    def __init__(self, firstReqId=FIRST_REQ_ID):
+        EWrapper.__init__(self)
+        self.requests = RequestRegistry()
+        # not reqIds, that would hide EClient.reqIds()
+        self.nextReqIds = itertools.count(firstReqId)
+
+    def request(self, send, *args, reqId=None) -> concurrent.futures.Future:
+        """Calls send(reqId, *args), eg: self.reqContractDetails, and returns
+        the future of its answer. A reqId is allocated if none is given."""
+        if reqId is None:
+            reqId = next(self.nextReqIds)
+        future = self.requests.register(reqId)
+        try:
+            send(reqId, *args)
+        except BaseException:
+            self.requests.discard(reqId, future)
+            raise
+        return future
+
+    def requestAsync(self, send, *args, reqId=None) -> asyncio.Future:
+        """Same as request(), for awaiting in the running event loop."""
+        return asyncio.wrap_future(self.request(send, *args, reqId=reqId))
+
+    def error(self, reqId, errorTime, errorCode, errorString, advancedOrderRejectJson=""):
+        super().error(reqId, errorTime, errorCode, errorString, advancedOrderRejectJson)
+        if errorCode not in WARNING_CODES:
+            self.requests.fail(
+                reqId, RequestError(reqId, errorCode, errorString, advancedOrderRejectJson)
+            )
+
+    def connectionClosed(self):
+        super().connectionClosed()
+        self.requests.failAll(ConnectionError("connection closed"))
+
+    # reqContractDetails: ContractDetails items
+
+    def contractDetails(self, reqId, contractDetails):
+        super().contractDetails(reqId, contractDetails)
+        self.requests.addItem(reqId, contractDetails)
+
+    def bondContractDetails(self, reqId, contractDetails):
+        super().bondContractDetails(reqId, contractDetails)
+        self.requests.addItem(reqId, contractDetails)
+
+    def contractDetailsEnd(self, reqId):
+        super().contractDetailsEnd(reqId)
+        self.requests.complete(reqId)
+
+    # reqHistoricalData: BarData items, or a single HistoricalDataArrays item
+    # after setHistoricalDataArrays(True)
+
+    def historicalData(self, reqId, bar):
+        super().historicalData(reqId, bar)
+        self.requests.addItem(reqId, bar)
+
+    def historicalDataArray(self, reqId, arrays):
+        super().historicalDataArray(reqId, arrays)
+        self.requests.addItem(reqId, arrays)
+
+    def historicalDataEnd(self, reqId, start, end):
+        super().historicalDataEnd(reqId, start, end)
+        self.requests.complete(reqId)
+
+    # reqExecutions: (contract, execution) items
+
+    def execDetails(self, reqId, contract, execution):
+        super().execDetails(reqId, contract, execution)
+        self.requests.addItem(reqId, (contract, execution))
+
+    def execDetailsEnd(self, reqId):
+        super().execDetailsEnd(reqId)
+        self.requests.complete(reqId)
+
+    # reqAccountSummary: (account, tag, value, currency) items
+
+    def accountSummary(self, reqId, account, tag, value, currency):
+        super().accountSummary(reqId, account, tag, value, currency)
+        self.requests.addItem(reqId, (account, tag, value, currency))
+
+    def accountSummaryEnd(self, reqId):
+        super().accountSummaryEnd(reqId)
+        self.requests.complete(reqId)
+
+    # reqPositionsMulti: (account, modelCode, contract, pos, avgCost) items
+
+    def positionMulti(self, reqId, account, modelCode, contract, pos, avgCost):
+        super().positionMulti(reqId, account, modelCode, contract, pos, avgCost)
+        self.requests.addItem(reqId, (account, modelCode, contract, pos, avgCost))
+
+    def positionMultiEnd(self, reqId):
+        super().positionMultiEnd(reqId)
+        self.requests.complete(reqId)
+
+    # reqAccountUpdatesMulti: (account, modelCode, key, value, currency) items
+
+    def accountUpdateMulti(self, reqId, account, modelCode, key, value, currency):
+        super().accountUpdateMulti(reqId, account, modelCode, key, value, currency)
+        self.requests.addItem(reqId, (account, modelCode, key, value, currency))
+
+    def accountUpdateMultiEnd(self, reqId):
+        super().accountUpdateMultiEnd(reqId)
+        self.requests.complete(reqId)
+
+    # reqSecDefOptParams: (exchange, underlyingConId, tradingClass,
+    # multiplier, expirations, strikes) items
+
+    def securityDefinitionOptionParameter(
+        self, reqId, exchange, underlyingConId, tradingClass, multiplier, expirations, strikes
+    ):
+        super().securityDefinitionOptionParameter(
+            reqId, exchange, underlyingConId, tradingClass, multiplier, expirations, strikes
+        )
+        self.requests.addItem(
+            reqId, (exchange, underlyingConId, tradingClass, multiplier, expirations, strikes)
+        )
+
+    def securityDefinitionOptionParameterEnd(self, reqId):
+        super().securityDefinitionOptionParameterEnd(reqId)
+        self.requests.complete(reqId)
+
+    # reqHistoricalNews: (time, providerCode, articleId, headline) items
+
+    def historicalNews(self, requestId, time, providerCode, articleId, headline):
+        super().historicalNews(requestId, time, providerCode, articleId, headline)
+        self.requests.addItem(requestId, (time, providerCode, articleId, headline))
+
+    def historicalNewsEnd(self, requestId, hasMore):
+        super().historicalNewsEnd(requestId, hasMore)
+        self.requests.complete(requestId)
+
+    # reqHistoricalTicks: HistoricalTick/HistoricalTickBidAsk/HistoricalTickLast
+    # items, or one *TicksArrays item per page after setHistoricalTicksArrays(True)
+
+    def historicalTicks(self, reqId, ticks, done):
+        super().historicalTicks(reqId, ticks, done)
+        self.requests.addItems(reqId, ticks)
+        if done:
+            self.requests.complete(reqId)
+
+    def historicalTicksBidAsk(self, reqId, ticks, done):
+        super().historicalTicksBidAsk(reqId, ticks, done)
+        self.requests.addItems(reqId, ticks)
+        if done:
+            self.requests.complete(reqId)
+
+    def historicalTicksLast(self, reqId, ticks, done):
+        super().historicalTicksLast(reqId, ticks, done)
+        self.requests.addItems(reqId, ticks)
+        if done:
+            self.requests.complete(reqId)
+
+    def historicalTicksArray(self, reqId, arrays, done):
+        super().historicalTicksArray(reqId, arrays, done)
+        self.requests.addItem(reqId, arrays)
+        if done:
+            self.requests.complete(reqId)
+
+    def historicalTicksBidAskArray(self, reqId, arrays, done):
+        super().historicalTicksBidAskArray(reqId, arrays, done)
+        self.requests.addItem(reqId, arrays)
+        if done:
+            self.requests.complete(reqId)
+
+    def historicalTicksLastArray(self, reqId, arrays, done):
+        super().historicalTicksLastArray(reqId, arrays, done)
+        self.requests.addItem(reqId, arrays)
+        if done:
+            self.requests.complete(reqId)
+
+    # reqMktData with snapshot=True: (tickType, value) items, the value of a
+    # tickOptionComputation is the tuple of its arguments after tickType
+
+    def tickPrice(self, reqId, tickType, price, attrib):
+        super().tickPrice(reqId, tickType, price, attrib)
+        self.requests.addItem(reqId, (tickType, price))
+
+    def tickSize(self, reqId, tickType, size):
+        super().tickSize(reqId, tickType, size)
+        self.requests.addItem(reqId, (tickType, size))
+
+    def tickString(self, reqId, tickType, value):
+        super().tickString(reqId, tickType, value)
+        self.requests.addItem(reqId, (tickType, value))
+
+    def tickGeneric(self, reqId, tickType, value):
+        super().tickGeneric(reqId, tickType, value)
+        self.requests.addItem(reqId, (tickType, value))
+
+    def tickOptionComputation(
+        self, reqId, tickType, tickAttrib, impliedVol, delta, optPrice, pvDividend,
+        gamma, vega, theta, undPrice
+    ):
+        super().tickOptionComputation(
+            reqId, tickType, tickAttrib, impliedVol, delta, optPrice, pvDividend,
+            gamma, vega, theta, undPrice
+        )
+        self.requests.addItem(
+            reqId,
+            (tickType, (tickAttrib, impliedVol, delta, optPrice, pvDividend, gamma, vega, theta, undPrice)),
+        )
+
+    def tickSnapshotEnd(self, reqId):
+        super().tickSnapshotEnd(reqId)
+        self.requests.complete(reqId)
+
+    # single answer requests, the result has one item
+
+    def headTimestamp(self, reqId, headTimestamp):
+        super().headTimestamp(reqId, headTimestamp)
+        self.requests.addItem(reqId, headTimestamp)
+        self.requests.complete(reqId)
+
+    def histogramData(self, reqId, items):
+        super().histogramData(reqId, items)
+        self.requests.addItem(reqId, items)
+        self.requests.complete(reqId)
+
+    def fundamentalData(self, reqId, data):
+        super().fundamentalData(reqId, data)
+        self.requests.addItem(reqId, data)
+        self.requests.complete(reqId)
+
+    def newsArticle(self, requestId, articleType, articleText):
+        super().newsArticle(requestId, articleType, articleText)
+        self.requests.addItem(requestId, (articleType, articleText))
+        self.requests.complete(requestId)
+
+    def symbolSamples(self, reqId, contractDescriptions):
+        super().symbolSamples(reqId, contractDescriptions)
+        self.requests.addItem(reqId, contractDescriptions)
+        self.requests.complete(reqId)
+
+    def historicalSchedule(self, reqId, startDateTime, endDateTime, timeZone, sessions):
+        super().historicalSchedule(reqId, startDateTime, endDateTime, timeZone, sessions)
+        self.requests.addItem(reqId, (startDateTime, endDateTime, timeZone, sessions))
+        self.requests.complete(reqId)
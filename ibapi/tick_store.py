@@ -0,0 +1,167 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+The TickStore keeps the latest top of book of every reqMktData line in
+preallocated columns: one float64 cell per reqId x TickTypeEnum, unset cells
+are NaN. The Decoder writes the tickPrice/tickSize/tickGeneric values straight
+into it, without creating TickAttrib or calling the wrapper if forwardTicks is
+off, and the strategy reads whole cross sections out of it:
+
+    store = TickStore(forwardTicks=False)
+    app.setTickStore(store)
+    ...
+    bids, asks = store.snapshot(reqIds, (TickTypeEnum.BID, TickTypeEnum.ASK))
+
+With numpy installed toNumpy() gives a zero copy (reqIds x tick types) view,
+which stops following the store once the columns grow, see toNumpy().
+
+The store is written by the thread decoding the messages and can be read from
+any other thread, a snapshot is not atomic across cells though.
+"""
+
+import math
+from array import array
+
+from ibapi.const import UNSET_DECIMAL
+from ibapi.ticktype import TickTypeEnum
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+N_TICK_TYPES = TickTypeEnum.NOT_SET
+
+NAN = math.nan
+
+# the size tick which comes with a price tick in the same msg
+SIZE_TICK_TYPES = {
+    TickTypeEnum.BID: TickTypeEnum.BID_SIZE,
+    TickTypeEnum.ASK: TickTypeEnum.ASK_SIZE,
+    TickTypeEnum.LAST: TickTypeEnum.LAST_SIZE,
+    TickTypeEnum.DELAYED_BID: TickTypeEnum.DELAYED_BID_SIZE,
+    TickTypeEnum.DELAYED_ASK: TickTypeEnum.DELAYED_ASK_SIZE,
+    TickTypeEnum.DELAYED_LAST: TickTypeEnum.DELAYED_LAST_SIZE,
+}
+
+
+class TickStore:
+    def __init__(self, capacity=1024, forwardTicks=True):
+        """capacity is the number of reqIds the columns are first allocated
+        for, they grow as needed (make it large enough for all the reqIds to
+        keep the toNumpy() views live). With forwardTicks off the tick callbacks
+        of the wrapper are not called anymore for the stored ticks."""
+        self.forwardTicks = forwardTicks
+        self.capacity = capacity
+        self.rows = {}  # reqId -> row
+        self.reqIds = []  # row -> reqId
+        self.values = array("d", [NAN]) * (capacity * N_TICK_TYPES)
+        self.updates = array("Q", [0]) * capacity
+        self.strings = []  # row -> {tickType: str}
+
+    def addRow(self, reqId) -> int:
+        row = len(self.reqIds)
+        if row == self.capacity:
+            # new arrays rather than extended ones, an array with a numpy
+            # view on it cannot be resized. The views handed out before keep
+            # the old arrays alive but are not written to anymore
+            values = array("d", self.values)
+            values.extend(array("d", [NAN]) * (self.capacity * N_TICK_TYPES))
+            updates = array("Q", self.updates)
+            updates.extend(array("Q", [0]) * self.capacity)
+            # before the row is published, see snapshot()
+            self.values = values
+            self.updates = updates
+            self.capacity *= 2
+        self.reqIds.append(reqId)
+        self.strings.append({})
+        self.rows[reqId] = row
+        return row
+
+    def row(self, reqId) -> int:
+        row = self.rows.get(reqId)
+        if row is None:
+            row = self.addRow(reqId)
+        return row
+
+    def update(self, reqId, tickType, value: float):
+        row = self.rows.get(reqId)
+        if row is None:
+            row = self.addRow(reqId)
+        if 0 <= tickType < N_TICK_TYPES:
+            self.values[row * N_TICK_TYPES + tickType] = value
+            self.updates[row] += 1
+
+    def updateSize(self, reqId, tickType, size):
+        self.update(reqId, tickType, NAN if size == UNSET_DECIMAL else float(size))
+
+    def updatePrice(self, reqId, tickType, price: float, size):
+        """the price tick and, for bid/ask/last, its size tick"""
+        self.update(reqId, tickType, price)
+        sizeTickType = SIZE_TICK_TYPES.get(tickType)
+        if sizeTickType is not None:
+            self.updateSize(reqId, sizeTickType, size)
+
+    def updateString(self, reqId, tickType, value: str):
+        row = self.rows.get(reqId)
+        if row is None:
+            row = self.addRow(reqId)
+        self.strings[row][tickType] = value
+        self.updates[row] += 1
+
+    def clear(self, reqId):
+        """Unsets all the ticks of reqId, eg: after cancelMktData."""
+        row = self.rows.get(reqId)
+        if row is not None:
+            start = row * N_TICK_TYPES
+            self.values[start : start + N_TICK_TYPES] = array("d", [NAN]) * N_TICK_TYPES
+            self.strings[row] = {}
+
+    def get(self, reqId, tickType) -> float:
+        row = self.rows.get(reqId)
+        if row is None:
+            return NAN
+        return self.values[row * N_TICK_TYPES + tickType]
+
+    def getString(self, reqId, tickType) -> str:
+        row = self.rows.get(reqId)
+        if row is None:
+            return ""
+        return self.strings[row].get(tickType, "")
+
+    def updateCount(self, reqId) -> int:
+        """number of ticks stored for reqId so far, to tell if it changed"""
+        row = self.rows.get(reqId)
+        return 0 if row is None else self.updates[row]
+
+    def snapshot(self, reqIds, tickTypes) -> list:
+        """One array("d") per tick type, with the values of the reqIds in
+        that order, NaN for the unknown ones."""
+        # the rows first: addRow() grows the columns before it adds a row,
+        # so the columns read afterwards hold all of them
+        rows = self.rows
+        offsets = [
+            rows[reqId] * N_TICK_TYPES if reqId in rows else None for reqId in reqIds
+        ]
+        values = self.values
+        columns = []
+        for tickType in tickTypes:
+            columns.append(
+                array(
+                    "d",
+                    [NAN if offset is None else values[offset + tickType] for offset in offsets],
+                )
+            )
+        return columns
+
+    def toNumpy(self):
+        """(number of reqIds x N_TICK_TYPES) float64 view of the store, the
+        row of a reqId is store.rows[reqId]. A view does not see the reqIds
+        added after it was taken, and once store.capacity has changed it is
+        a stale snapshot of the values at that time: take a new one then."""
+        if numpy is None:
+            raise ImportError("numpy is needed for TickStore.toNumpy()")
+        nRows = len(self.reqIds)
+        view = numpy.frombuffer(self.values, dtype=numpy.float64)
+        return view[: nRows * N_TICK_TYPES].reshape(-1, N_TICK_TYPES)
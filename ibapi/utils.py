@@ -28,6 +28,21 @@ Collection of misc tools
 
 logger = logging.getLogger(__name__)
 
+# Debug logging on the per message hot paths (socket reads/writes, framing,
+# field decoding, the message loop) is guarded by this flag so that it costs
+# a single test when off, whatever the logging configuration is. To get those
+# traces back at runtime, eg: while looking into an incident:
+#
+#     from ibapi import utils
+#     utils.setTraceEnabled(True)
+#     logging.getLogger("ibapi").setLevel(logging.DEBUG)
+TRACE = False
+
+
+def setTraceEnabled(enabled: bool = True):
+    global TRACE
+    TRACE = enabled
+
 
 # I use this just to visually emphasize it's a wrapper overridden method
 def iswrapper(fn):
@@ -92,7 +107,8 @@ def decode(the_type, fields, show_unset=False, use_unicode=False):
     except StopIteration:
         raise BadMessage("no more fields")
 
-    logger.debug("decode %s %s", the_type, s)
+    if TRACE:
+        logger.debug("decode %s %s", the_type, s)
 
     if the_type is Decimal:
         if (
@@ -145,6 +161,74 @@ def decode(the_type, fields, show_unset=False, use_unicode=False):
     return n
 
 
+# Type specialized versions of decode(), for the process*Msg hot paths. The
+# unset sentinels are compared on the raw bytes, nothing is decoded to str
+# unless a str is asked for.
+
+UNSET_DECIMAL_FIELDS = frozenset(
+    (
+        b"",
+        b"2147483647",
+        b"9223372036854775807",
+        b"1.7976931348623157E308",
+        b"-9223372036854775808",
+    )
+)
+INFINITY_FIELD = INFINITY_STR.encode()
+
+
+def read_field(fields):
+    try:
+        return next(fields)
+    except StopIteration:
+        raise BadMessage("no more fields")
+
+
+def read_int(fields) -> int:
+    s = read_field(fields)
+    return int(s) if s else 0
+
+
+def read_int_show_unset(fields) -> int:
+    s = read_field(fields)
+    return int(s) if s else UNSET_INTEGER
+
+
+def read_float(fields) -> float:
+    s = read_field(fields)
+    if s == INFINITY_FIELD:
+        return DOUBLE_INFINITY
+    return float(s) if s else 0.0
+
+
+def read_float_show_unset(fields) -> float:
+    s = read_field(fields)
+    if s == INFINITY_FIELD:
+        return DOUBLE_INFINITY
+    return float(s) if s else UNSET_DOUBLE
+
+
+def read_decimal(fields) -> Decimal:
+    s = read_field(fields)
+    if s is None or s in UNSET_DECIMAL_FIELDS:
+        return UNSET_DECIMAL
+    return Decimal(s.decode())
+
+
+def read_bool(fields) -> bool:
+    s = read_field(fields)
+    return int(s) != 0 if s else False
+
+
+def read_str(fields, use_unicode=False) -> str:
+    s = read_field(fields)
+    if type(s) is str:
+        return s
+    return s.decode(
+        "unicode-escape" if use_unicode else "UTF-8", errors="backslashreplace"
+    )
+
+
 def ExerciseStaticMethods(klass):
     import types
 
@@ -185,6 +269,9 @@ def intMaxString(val):
 
 
 def isAsciiPrintable(val):
+    if val.isascii() and val.isprintable():
+        # the common case, without going through the chars one by one
+        return True
     return all(ord(c) >= 32 and ord(c) < 127 or ord(c) == 9 or ord(c) == 10 or ord(c) == 13 for c in val)
 
 
@@ -0,0 +1,49 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+Measures the per callback overhead of the default EWrapper methods when INFO
+logging is off, against the unguarded logAnswer(current_fn_name(), vars())
+body the callbacks used to run.
+
+    python tests/bench_wrapper.py
+"""
+
+import logging
+import timeit
+from decimal import Decimal
+
+from ibapi.common import TickAttrib
+from ibapi.utils import current_fn_name
+from ibapi.wrapper import EWrapper, logAnswer
+
+
+class UnguardedWrapper(EWrapper):
+    def tickPrice(self, reqId, tickType, price, attrib):
+        logAnswer(current_fn_name(), vars())
+
+    def tickSize(self, reqId, tickType, size):
+        logAnswer(current_fn_name(), vars())
+
+    def tickString(self, reqId, tickType, value):
+        logAnswer(current_fn_name(), vars())
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    attrib = TickAttrib()
+    size = Decimal(100)
+    n = 500000
+
+    for title, wrapper in (("before", UnguardedWrapper()), ("after", EWrapper())):
+        for name, fn in (
+            ("tickPrice", lambda: wrapper.tickPrice(1, 1, 1.5, attrib)),
+            ("tickSize", lambda: wrapper.tickSize(1, 0, size)),
+            ("tickString", lambda: wrapper.tickString(1, 45, "x")),
+        ):
+            t = timeit.timeit(fn, number=n)
+            print(f"{title:<7} {name:<11} {t / n * 1e9:6.0f} ns/call")
+
+
+if "__main__" == __name__:
+    main()
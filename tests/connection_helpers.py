@@ -0,0 +1,25 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+Connections over a socketpair, shared by the connection tests.
+"""
+
+import socket
+
+from ibapi.connection import Connection
+
+
+def connected(**opts):
+    """a Connection with opts and the peer end of its socket"""
+    conn = Connection("127.0.0.1", 0, **opts)
+    conn.socket, peer = socket.socketpair()
+    peer.settimeout(1)
+    return conn, peer
+
+
+def recvAll(peer, size):
+    received = b""
+    while len(received) < size:
+        received += peer.recv(1000)
+    return received
@@ -0,0 +1,115 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+
+Clients and orders shared by the order encoding tests.
+"""
+
+from decimal import Decimal
+
+from ibapi.client import EClient
+from ibapi.contract import ComboLeg, Contract
+from ibapi.order import Order
+from ibapi.order_condition import PriceCondition
+from ibapi.tag_value import TagValue
+from ibapi.utils import ClientException
+from ibapi.wrapper import EWrapper
+
+
+class FakeConnection:
+    def __init__(self):
+        self.sent = []
+
+    def isConnected(self):
+        return True
+
+    def sendMsg(self, msg, urgent=False):
+        self.sent.append(msg)
+
+
+class RecordingWrapper(EWrapper):
+    def __init__(self):
+        EWrapper.__init__(self)
+        self.errors = []
+
+    def error(self, reqId, errorTime, errorCode, errorString, advancedOrderRejectJson=""):
+        self.errors.append((reqId, errorCode, errorString))
+
+
+def connectedClient(serverVersion):
+    wrapper = RecordingWrapper()
+    client = EClient(wrapper)
+    client.conn = FakeConnection()
+    client.serverVersion_ = serverVersion
+    client.connState = EClient.CONNECTED
+    return client
+
+
+def orders():
+    contract = Contract()
+    contract.symbol = "AAPL"
+    contract.secType = "STK"
+    contract.exchange = "SMART"
+    contract.currency = "USD"
+
+    order = Order()
+    order.action = "BUY"
+    order.orderType = "LMT"
+    order.totalQuantity = Decimal(100)
+    order.lmtPrice = 1.5
+    yield contract, order
+
+    algo = Order()
+    algo.action = "SELL"
+    algo.orderType = "MKT"
+    algo.totalQuantity = Decimal("0.5")
+    algo.algoStrategy = "Adaptive"
+    algo.algoParams = [TagValue("adaptivePriority", "Normal")]
+    algo.conditions = [PriceCondition(PriceCondition.TriggerMethodEnum.Default, 265598, "SMART", True, 200.0)]
+    algo.account = "DU1"
+    algo.orderRef = "ref"
+    algo.notHeld = True
+    yield contract, algo
+
+    bag = Contract()
+    bag.symbol = "SPY"
+    bag.secType = "BAG"
+    bag.exchange = "SMART"
+    bag.currency = "USD"
+    for conId, action in ((1, "BUY"), (2, "SELL")):
+        leg = ComboLeg()
+        leg.conId = conId
+        leg.ratio = 1
+        leg.action = action
+        leg.exchange = "SMART"
+        bag.comboLegs.append(leg)
+    combo = Order()
+    combo.action = "BUY"
+    combo.orderType = "LMT"
+    combo.totalQuantity = Decimal(1)
+    combo.lmtPrice = 0.25
+    combo.smartComboRoutingParams = [TagValue("NonGuaranteed", "1")]
+    yield bag, combo
+
+    # the unset cashQty is refused by the servers before cash quantities
+    old = Order()
+    old.action = "SELL"
+    old.orderType = "STP LMT"
+    old.totalQuantity = Decimal(10)
+    old.lmtPrice = 99.5
+    old.auxPrice = 100.0
+    old.cashQty = 0.0
+    yield contract, old
+
+
+def placeOrderError(client, orderId, contract, order):
+    """the code of the error placeOrder reports or raises, None if the order
+    was sent"""
+    nErrors = len(client.wrapper.errors)
+    try:
+        client.placeOrder(orderId, contract, order)
+    except ClientException as exc:
+        return exc.code
+    if len(client.wrapper.errors) > nErrors:
+        return client.wrapper.errors[-1][1]
+    return None
@@ -0,0 +1,76 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import asyncio
+import unittest
+
+from ibapi import comm
+from ibapi.async_client import AsyncEClient
+from ibapi.message import IN
+from ibapi.wrapper import EWrapper
+
+
+def make_answer(msgId, *fields):
+    return comm.make_initial_msg(comm.make_field(msgId) + "".join(comm.make_field(f) for f in fields))
+
+
+class RecordingWrapper(EWrapper):
+    def __init__(self):
+        EWrapper.__init__(self)
+        self.calls = []
+
+    def connectAck(self):
+        self.calls.append(("connectAck",))
+
+    def nextValidId(self, orderId):
+        self.calls.append(("nextValidId", orderId))
+
+    def tickGeneric(self, reqId, tickType, value):
+        self.calls.append(("tickGeneric", reqId, tickType, value))
+
+    def connectionClosed(self):
+        self.calls.append(("connectionClosed",))
+
+
+class AsyncEClientTestCase(unittest.TestCase):
+    def test_connect_and_dispatch(self):
+        async def serve(reader, writer):
+            await reader.read(1024)  # API prefix and version range
+            writer.write(comm.make_initial_msg("176\0" + "20250101 00:00:00 EST\0"))
+            await reader.read(1024)  # startApi
+            writer.write(
+                make_answer(IN.NEXT_VALID_ID, 1, 42)
+                + make_answer(IN.TICK_GENERIC, 6, 7, 23, 0.25)
+            )
+            await writer.drain()
+            writer.close()
+
+        async def main():
+            server = await asyncio.start_server(serve, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            wrapper = RecordingWrapper()
+            client = AsyncEClient(wrapper)
+            await client.connect("127.0.0.1", port, 1)
+            self.assertTrue(client.isConnected())
+            self.assertEqual(client.serverVersion(), 176)
+            await asyncio.wait_for(client.run(), 5)
+            server.close()
+            await server.wait_closed()
+            return wrapper.calls
+
+        calls = asyncio.run(main())
+        self.assertEqual(
+            calls,
+            [
+                ("connectAck",),
+                ("nextValidId", 42),
+                ("tickGeneric", 7, 23, 0.25),
+                ("connectionClosed",),
+            ],
+        )
+
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import unittest
+from decimal import Decimal
+
+from ibapi.bar_aggregator import BarAggregator, BarRing, BarSpec
+from ibapi.common import HistoricalSession
+from ibapi.decoder import Decoder
+from ibapi.message import IN
+from ibapi.server_versions import MIN_SERVER_VER_ENCODE_MSG_ASCII7
+from ibapi.wrapper import EWrapper
+
+
+class BarAggregatorTestCase(unittest.TestCase):
+    def test_time_bars(self):
+        bars = []
+        aggregator = BarAggregator(onBar=lambda reqId, spec, bar: bars.append((reqId, spec, bar)))
+        ring = aggregator.subscribe(1, BarSpec.time(60), ring=BarRing(2))
+
+        aggregator.addTrade(1, 120, 10.0, Decimal(100))
+        aggregator.addTrade(1, 150, 11.0, Decimal(300))
+        aggregator.addTrade(1, 179, 9.0, Decimal(100))
+        aggregator.addTrade(2, 179, 99.0, Decimal(100))
+        self.assertEqual(bars, [])
+
+        aggregator.addTrade(1, 240, 12.0, Decimal(10))
+        (reqId, spec, bar) = bars[0]
+        self.assertEqual((reqId, spec), (1, BarSpec.time(60)))
+        self.assertEqual(
+            (bar.time, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.count),
+            (120, 10.0, 11.0, 9.0, 9.0, 500.0, 3),
+        )
+        self.assertAlmostEqual(bar.vwap, 10.4)
+
+        aggregator.addTrade(1, 300, 13.0, Decimal(10))
+        aggregator.flush()
+        self.assertEqual(len(bars), 3)
+        self.assertEqual(list(ring.last()["time"]), [240, 300])
+        self.assertEqual(list(ring.last(1)["close"]), [13.0])
+
+    def test_volume_bars(self):
+        bars = []
+        aggregator = BarAggregator(onBar=lambda reqId, spec, bar: bars.append(bar))
+        aggregator.subscribe(1, BarSpec.volume(100))
+        aggregator.addRealTimeBar(1, 0, 10.0, 10.5, 9.5, 10.0, Decimal(60), Decimal("10.1"), 3)
+        aggregator.addRealTimeBar(1, 5, 10.0, 11.0, 10.0, 11.0, Decimal(60), Decimal("10.5"), 4)
+        aggregator.addRealTimeBar(1, 10, 11.0, 11.0, 11.0, 11.0, Decimal(10), Decimal("11"), 1)
+
+        self.assertEqual(len(bars), 1)
+        self.assertEqual((bars[0].volume, bars[0].count, bars[0].high), (120.0, 7, 11.0))
+        self.assertAlmostEqual(bars[0].vwap, 10.3)
+
+    def test_sessions(self):
+        bars = []
+        aggregator = BarAggregator(onBar=lambda reqId, spec, bar: bars.append(bar))
+        aggregator.subscribe(1, BarSpec.time(3600))
+        session = HistoricalSession()
+        session.startDateTime = "20250102-09:30:00"
+        session.endDateTime = "20250102-16:00:00"
+        aggregator.setSessions(1, [session], "US/Eastern")
+        (start, end) = aggregator.sessions[1][0]
+        self.assertEqual(end - start, 6.5 * 3600)
+
+        aggregator.addTrade(1, start - 60, 1.0, Decimal(1))
+        aggregator.addTrade(1, start + 10, 2.0, Decimal(1))
+        aggregator.addTrade(1, end - 10, 3.0, Decimal(1))
+        aggregator.flush()
+
+        self.assertEqual([(bar.time, bar.endTime) for bar in bars], [(start, start + 3600), (end - 1800, end)])
+
+    def test_decoder(self):
+        decoder = Decoder(EWrapper(), MIN_SERVER_VER_ENCODE_MSG_ASCII7)
+        decoder.barAggregator = BarAggregator()
+        ring = decoder.barAggregator.subscribe(5, BarSpec.time(1), ring=BarRing(10))
+        decoder.interpret((b"5", b"1", b"100", b"10.5", b"3", b"0", b"ARCA", b""), IN.TICK_BY_TICK)
+        decoder.interpret((b"5", b"1", b"101", b"10.6", b"3", b"0", b"ARCA", b""), IN.TICK_BY_TICK)
+        self.assertEqual(list(ring.last()["close"]), [10.5])
+
+
+if "__main__" == __name__:
+    unittest.main()
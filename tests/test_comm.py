@@ -55,6 +55,30 @@ class CommTestCase(unittest.TestCase):
         self.assertEqual(fields[0].decode(), text1)
         self.assertEqual(fields[1].decode(), text2)
 
+    def test_frame_buffer(self):
+        msgs = [comm.make_initial_msg("A" * n) for n in (0, 1, 10, 300, 5000)]
+        stream = b"".join(msgs)
+
+        buf = comm.FrameBuffer(64)
+        frames = []
+        # feed in odd sized chunks so frames straddle the receive boundaries
+        for i in range(0, len(stream), 7):
+            buf.write(stream[i : i + 7])
+            frames.extend(bytes(frame) for frame in buf.frames())
+
+        self.assertEqual(frames, [msg[4:] for msg in msgs])
+        self.assertEqual(len(buf), 0, "there should be no remainder msg")
+
+    def test_frame_buffer_partial(self):
+        msg = comm.make_initial_msg("ABCD")
+
+        buf = comm.FrameBuffer(16)
+        buf.write(msg[:5])
+        self.assertIsNone(buf.nextFrame())
+        buf.write(msg[5:])
+        self.assertEqual(bytes(buf.nextFrame()), b"ABCD")
+        self.assertIsNone(buf.nextFrame())
+
 
 if "__main__" == __name__:
     unittest.main()
@@ -0,0 +1,98 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import threading
+import unittest
+
+from ibapi.conflation import ConflatingDispatcher
+from ibapi.decoder import Decoder
+from ibapi.message import IN
+from ibapi.server_versions import MIN_SERVER_VER_ENCODE_MSG_ASCII7
+from ibapi.wrapper import EWrapper
+
+
+class RecordingWrapper(EWrapper):
+    def __init__(self):
+        EWrapper.__init__(self)
+        self.calls = []
+
+    def tickGeneric(self, reqId, tickType, value):
+        self.calls.append(("tickGeneric", reqId, tickType, value))
+
+    def tickString(self, reqId, tickType, value):
+        self.calls.append(("tickString", reqId, tickType, value))
+
+    def orderStatus(self, orderId, status, *args):
+        self.calls.append(("orderStatus", orderId, status))
+
+    def tickSnapshotEnd(self, reqId):
+        self.calls.append(("tickSnapshotEnd", reqId))
+
+
+class ConflatingDispatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.wrapper = RecordingWrapper()
+        self.dispatcher = ConflatingDispatcher(self.wrapper, interval=3600)
+        self.decoder = Decoder(self.dispatcher, MIN_SERVER_VER_ENCODE_MSG_ASCII7)
+
+    def test_conflate(self):
+        self.decoder.interpret((b"6", b"1", b"23", b"0.25"), IN.TICK_GENERIC)
+        self.decoder.interpret((b"6", b"1", b"24", b"0.5"), IN.TICK_GENERIC)
+        self.decoder.interpret((b"6", b"2", b"23", b"1.0"), IN.TICK_GENERIC)
+        self.decoder.interpret((b"6", b"1", b"23", b"0.75"), IN.TICK_GENERIC)
+        self.decoder.interpret((b"6", b"1", b"23", b"a"), IN.TICK_STRING)
+        self.dispatcher.orderStatus(7, "Filled")
+        self.dispatcher.poll()
+
+        self.assertEqual(self.wrapper.calls, [("orderStatus", 7, "Filled")])
+        self.assertEqual(self.dispatcher.nConflated, 1)
+
+        self.dispatcher.flush()
+        self.assertEqual(
+            self.wrapper.calls[1:],
+            [
+                ("tickGeneric", 1, 23, 0.75),
+                ("tickGeneric", 1, 24, 0.5),
+                ("tickGeneric", 2, 23, 1.0),
+                ("tickString", 1, 23, "a"),
+            ],
+        )
+
+        self.dispatcher.flush()
+        self.assertEqual(len(self.wrapper.calls), 5)
+
+    def test_snapshot_end_flushes(self):
+        self.decoder.interpret((b"6", b"1", b"23", b"0.25"), IN.TICK_GENERIC)
+        self.dispatcher.tickSnapshotEnd(1)
+        self.assertEqual(
+            self.wrapper.calls, [("tickGeneric", 1, 23, 0.25), ("tickSnapshotEnd", 1)]
+        )
+
+    def test_poll(self):
+        dispatcher = ConflatingDispatcher(self.wrapper, interval=0)
+        dispatcher.tickGeneric(1, 23, 0.25)
+        dispatcher.poll()
+        self.assertEqual(self.wrapper.calls, [("tickGeneric", 1, 23, 0.25)])
+
+    def test_flush_from_another_thread(self):
+        # no tick stored while a flush swaps the pending ticks is lost
+        nTicks = 20000
+        done = threading.Event()
+
+        def flushing():
+            while not done.is_set():
+                self.dispatcher.flush()
+
+        flusher = threading.Thread(target=flushing)
+        flusher.start()
+        for reqId in range(nTicks):
+            self.dispatcher.tickGeneric(reqId, 23, 1.0)
+        done.set()
+        flusher.join()
+        self.dispatcher.flush()
+        self.assertEqual(len(self.wrapper.calls), nTicks)
+
+if "__main__" == __name__:
+    unittest.main()
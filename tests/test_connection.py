@@ -0,0 +1,269 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import socket
+import struct
+import threading
+import time
+import unittest
+
+from ibapi.client import EClient
+from ibapi.connection import Connection
+from ibapi.message import OUT
+from ibapi.rate_limiter import RateLimiter
+from ibapi.reader import EReader
+from ibapi.wrapper import EWrapper
+
+from tests.connection_helpers import connected
+
+
+class TrickleSocket:
+    """writes at most 3 bytes per call, and counts the calls"""
+
+    def __init__(self):
+        self.written = b""
+        self.nCalls = 0
+
+    def sendmsg(self, buffers):
+        self.nCalls += 1
+        data = b"".join(bytes(buf) for buf in buffers)[:3]
+        self.written += data
+        return len(data)
+
+    def close(self):
+        pass
+
+
+class ConnectionTestCase(unittest.TestCase):
+    def test_unbuffered(self):
+        conn, peer = connected()
+        self.assertEqual(conn.sendMsg(b"abc"), 3)
+        self.assertEqual(peer.recv(100), b"abc")
+        self.assertEqual(conn.flush(), 0)
+        conn.disconnect()
+        peer.close()
+
+    def test_explicit_flush(self):
+        conn, peer = connected(flushWindow=0)
+        for msg in (b"one", b"two", b"three"):
+            conn.sendMsg(msg)
+        peer.setblocking(False)
+        with self.assertRaises(BlockingIOError):
+            peer.recv(100)
+        self.assertEqual(conn.flush(), 11)
+        peer.settimeout(1)
+        self.assertEqual(peer.recv(100), b"onetwothree")
+        conn.disconnect()
+        peer.close()
+
+    def test_max_buffered_bytes(self):
+        conn, peer = connected(flushWindow=0, maxBufferedBytes=6)
+        conn.sendMsg(b"one")
+        conn.sendMsg(b"two")
+        self.assertEqual(peer.recv(100), b"onetwo")
+        self.assertEqual(conn.writeBuffer, [])
+        conn.disconnect()
+        peer.close()
+
+    def test_flush_window(self):
+        conn, peer = connected(flushWindow=0.01)
+        conn.sendMsg(b"one")
+        conn.sendMsg(b"two")
+        time.sleep(0.05)
+        self.assertEqual(peer.recv(100), b"onetwo")
+        self.assertIsNone(conn.flushTimer)
+        conn.disconnect()
+        peer.close()
+
+    def test_partial_writes(self):
+        conn = Connection("127.0.0.1", 0, flushWindow=0)
+        conn.socket = TrickleSocket()
+        msgs = [b"alpha", b"be", b"gamma", b"d"]
+        for msg in msgs:
+            conn.sendMsg(msg)
+        trickle = conn.socket
+        self.assertEqual(conn.flush(), 13)
+        self.assertEqual(trickle.written, b"".join(msgs))
+        self.assertEqual(trickle.nCalls, 5)
+
+    def test_disconnect_flushes(self):
+        conn, peer = connected(flushWindow=0)
+        conn.sendMsg(b"last")
+        conn.disconnect()
+        self.assertEqual(peer.recv(100), b"last")
+        peer.close()
+
+
+class StalledPeerTestCase(unittest.TestCase):
+    """the peer does not read, the socket buffers fill up"""
+
+    def stalled(self, **opts):
+        conn, peer = connected(writeTimeout=0.3, **opts)
+        conn.socket.settimeout(0.05)
+        return conn, peer
+
+    def test_flush_times_out(self):
+        conn, peer = self.stalled(flushWindow=0)
+        start = time.monotonic()
+        with self.assertRaises(socket.error):
+            for _ in range(1000):
+                conn.sendMsg(b"x" * 64 * 1024)
+        self.assertLess(time.monotonic() - start, 2)
+        conn.disconnect()
+        self.assertFalse(conn.isConnected())
+        peer.close()
+
+    def test_writer_disconnect(self):
+        conn, peer = self.stalled(writerThread=True)
+        conn.writeTimeout = 60
+        conn.startWriter()
+        for _ in range(200):
+            conn.sendMsg(b"x" * 64 * 1024)
+        time.sleep(0.1)
+        start = time.monotonic()
+        conn.disconnect()
+        self.assertLess(time.monotonic() - start, 2)
+        conn.writer.join(2)
+        self.assertFalse(conn.writer.is_alive())
+        peer.close()
+
+
+class BatchQueue:
+    def __init__(self):
+        self.msgs = []
+
+    def putBatch(self, msgs):
+        self.msgs.extend(msgs)
+
+
+class SelectorTestCase(unittest.TestCase):
+    def selecting(self, **opts):
+        conn, peer = connected(**opts)
+        conn.socket.settimeout(1)
+        conn.openSelector()
+        return conn, peer
+
+    def assertReleased(self, conn):
+        self.assertIsNone(conn.selector)
+        self.assertEqual(conn.wakeupRecv.fileno(), -1)
+        self.assertEqual(conn.wakeupSend.fileno(), -1)
+
+    def test_wakeup_on_disconnect(self):
+        conn, peer = self.selecting()
+        received = []
+        reader = threading.Thread(target=lambda: received.append(conn.recvInto(memoryview(bytearray(100)))))
+        reader.start()
+        time.sleep(0.05)
+        self.assertTrue(conn.selecting)
+        start = time.monotonic()
+        conn.disconnect()
+        reader.join(1)
+        self.assertFalse(reader.is_alive())
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(received, [0])
+        self.assertReleased(conn)
+        peer.close()
+
+    def test_disconnect_without_reader(self):
+        conn, peer = self.selecting()
+        conn.disconnect()
+        self.assertReleased(conn)
+        peer.close()
+
+    def test_peer_close(self):
+        conn, peer = self.selecting()
+        peer.close()
+        self.assertEqual(conn.recvInto(memoryview(bytearray(100))), 0)
+        self.assertFalse(conn.isConnected())
+        self.assertReleased(conn)
+
+    def test_frame_across_recv_boundary(self):
+        conn, peer = self.selecting(recvBufSize=4096)
+        msgs = [b"a" * 6000, b"b" * 10, b"c" * 4090]
+        queue = BatchQueue()
+        reader = EReader(conn, queue)
+        reader.start()
+        for msg in msgs:
+            peer.sendall(struct.pack("!I", len(msg)) + msg)
+        time.sleep(0.05)
+        peer.close()
+        reader.join(1)
+        self.assertFalse(reader.is_alive())
+        self.assertEqual(queue.msgs, msgs)
+        self.assertReleased(conn)
+
+
+class LaneConnection:
+    def __init__(self):
+        self.sent = []
+
+    def isConnected(self):
+        return True
+
+    def sendMsg(self, msg, urgent=False):
+        self.sent.append(urgent)
+
+
+class WriterThreadTestCase(unittest.TestCase):
+    def test_writes_in_order(self):
+        conn, peer = connected(writerThread=True)
+        conn.startWriter()
+        msgs = [b"%03d" % i for i in range(200)]
+        for msg in msgs:
+            conn.sendMsg(msg)
+        received = b""
+        while len(received) < 600:
+            received += peer.recv(1000)
+        self.assertEqual(received, b"".join(msgs))
+        conn.disconnect()
+        conn.writer.join(1)
+        self.assertFalse(conn.writer.is_alive())
+        peer.close()
+
+    def test_urgent_first(self):
+        conn = Connection("127.0.0.1", 0, writerThread=True, maxBufferedBytes=4)
+        conn.socket = TrickleSocket()
+        conn.writer = True  # queue without a thread
+        conn.sendMsg(b"b1")
+        conn.sendMsg(b"b2")
+        conn.sendMsg(b"u1", urgent=True)
+        conn.sendMsg(b"b3")
+        conn.sendMsg(b"u2", urgent=True)
+        self.assertEqual(conn._takeQueued(4), ([b"u1", b"u2", b"b1", b"b2"], 2))
+        self.assertEqual(conn._takeQueued(4), ([b"b3"], 0))
+        self.assertEqual(conn._takeQueued(4), ([], 0))
+
+    def test_disconnect_writes_queued(self):
+        conn, peer = connected(writerThread=True)
+        conn.writer = True
+        conn.sendMsg(b"bulk")
+        conn.sendMsg(b"cancel", urgent=True)
+        conn.disconnect()
+        self.assertEqual(peer.recv(100), b"cancelbulk")
+        self.assertEqual(conn.sendMsg(b"late"), 0)
+        peer.close()
+
+    def test_disconnect_within_rate_limit(self):
+        conn, peer = connected(writerThread=True, rateLimiter=RateLimiter(rate=1, burst=2))
+        conn.writer = True
+        for msg in (b"one", b"two", b"three"):
+            conn.sendMsg(msg)
+        conn.disconnect()
+        self.assertEqual(peer.recv(100), b"onetwo")
+        self.assertEqual(conn.rateLimiter.nQueued(), 0)
+        peer.close()
+
+    def test_client_lanes(self):
+        client = EClient(EWrapper())
+        client.conn = LaneConnection()
+        client.serverVersion_ = 176
+        client.sendMsg(OUT.REQ_MKT_DATA, "")
+        client.sendMsg(OUT.CANCEL_ORDER, "")
+        client.sendMsg(OUT.PLACE_ORDER, "")
+        self.assertEqual(client.conn.sent, [False, True, True])
+
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import os
+import tempfile
+import unittest
+
+from ibapi.client import EClient
+from ibapi.contract import Contract, ContractDetails
+from ibapi.contract_details_cache import ContractDetailsCache
+from ibapi.decoder import Decoder
+from ibapi.message import IN
+from ibapi.server_versions import MIN_SERVER_VER_HISTORICAL_DATA_END
+from ibapi.wrapper import EWrapper
+
+
+class RecordingWrapper(EWrapper):
+    def __init__(self):
+        EWrapper.__init__(self)
+        self.calls = []
+
+    def contractDetails(self, reqId, contractDetails):
+        self.calls.append(("contractDetails", reqId, contractDetails.contract.conId))
+
+    def bondContractDetails(self, reqId, contractDetails):
+        self.calls.append(("bondContractDetails", reqId, contractDetails.contract.conId))
+
+    def contractDetailsEnd(self, reqId):
+        self.calls.append(("contractDetailsEnd", reqId))
+
+    def error(self, reqId, errorTime, errorCode, errorString, advancedOrderRejectJson=""):
+        self.calls.append(("error", reqId, errorCode))
+
+
+def details(conId):
+    contractDetails = ContractDetails()
+    contractDetails.contract.conId = conId
+    contractDetails.contract.symbol = "ES"
+    return contractDetails
+
+
+def query():
+    contract = Contract()
+    contract.symbol = "ES"
+    contract.secType = "FUT"
+    contract.exchange = "CME"
+    contract.currency = "USD"
+    return contract
+
+
+class ContractDetailsCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.wrapper = RecordingWrapper()
+        self.cache = ContractDetailsCache()
+        self.decoder = Decoder(self.wrapper, MIN_SERVER_VER_HISTORICAL_DATA_END)
+        self.decoder.contractDetailsCache = self.cache
+        self.client = EClient(self.wrapper)
+        self.client.setContractDetailsCache(self.cache)
+
+    def answer(self, reqId, conIds):
+        for conId in conIds:
+            self.cache.add(reqId, details(conId))
+        self.decoder.interpret((b"1", str(reqId).encode()), IN.CONTRACT_DATA_END)
+
+    def test_replay(self):
+        self.client.reqContractDetails(1, query())
+        self.assertEqual(self.wrapper.calls, [("error", -1, 504)])
+        self.answer(1, [11, 12])
+
+        self.wrapper.calls.clear()
+        self.client.reqContractDetails(2, query())
+        self.assertEqual(
+            self.wrapper.calls,
+            [("contractDetails", 2, 11), ("contractDetails", 2, 12), ("contractDetailsEnd", 2)],
+        )
+
+        self.wrapper.calls.clear()
+        contract = Contract()
+        contract.conId = 12
+        self.client.reqContractDetails(3, contract)
+        self.assertEqual(self.wrapper.calls, [("contractDetails", 3, 12), ("contractDetailsEnd", 3)])
+
+        # the cached details are copies
+        self.cache.get(12).contract.symbol = "NQ"
+        self.assertEqual(self.cache.get(12).contract.symbol, "ES")
+
+    def test_error(self):
+        self.cache.start(1, query())
+        self.cache.add(1, details(11))
+        self.decoder.interpret((b"1", b"200", b"No security definition", b"", b"0"), IN.ERR_MSG)
+        self.answer(1, [])
+        self.assertIsNone(self.cache.lookup(query()))
+
+    def test_ttl(self):
+        self.cache.ttl = 0
+        self.cache.start(1, query())
+        self.answer(1, [11])
+        self.assertIsNone(self.cache.lookup(query()))
+        self.assertIsNone(self.cache.get(11))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "contract_details")
+            cache = ContractDetailsCache(path=path, saveDelay=60)
+            cache.start(1, query())
+            cache.add(1, details(11), isBond=True)
+            cache.end(1)
+            self.assertFalse(os.path.exists(path))
+            cache.flush()
+            self.assertIsNone(cache.saveTimer)
+
+            loaded = ContractDetailsCache(path=path)
+            cached = loaded.lookup(query())
+            self.assertEqual([(cd.contract.conId, isBond) for cd, isBond in cached], [(11, True)])
+
+    def test_save_timer(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "contract_details")
+            cache = ContractDetailsCache(path=path, saveDelay=0.05)
+            for reqId in (1, 2):
+                cache.start(reqId, query())
+                cache.add(reqId, details(10 + reqId))
+                cache.end(reqId)
+            timer = cache.saveTimer
+            timer.join(1)
+
+            self.assertFalse(cache.dirty)
+            self.assertIsNotNone(ContractDetailsCache(path=path).get(12))
+
+
+if "__main__" == __name__:
+    unittest.main()
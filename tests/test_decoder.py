@@ -0,0 +1,51 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import unittest
+
+from ibapi.decoder import Decoder
+from ibapi.message import IN
+from ibapi.server_versions import MIN_SERVER_VER_ENCODE_MSG_ASCII7
+from ibapi.wrapper import EWrapper
+
+
+class RecordingWrapper(EWrapper):
+    def __init__(self):
+        EWrapper.__init__(self)
+        self.calls = []
+
+    def tickGeneric(self, reqId, tickType, value):
+        self.calls.append(("tickGeneric", reqId, tickType, value))
+
+    def accountSummary(self, reqId, account, tag, value, currency):
+        self.calls.append(("accountSummary", reqId, account, tag, value, currency))
+
+
+class DecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.wrapper = RecordingWrapper()
+        self.decoder = Decoder(self.wrapper, MIN_SERVER_VER_ENCODE_MSG_ASCII7)
+
+    def test_wrapper_signature(self):
+        self.decoder.interpret((b"6", b"1", b"23", b"0.25"), IN.TICK_GENERIC)
+        self.decoder.interpret(
+            (b"1", b"5", b"DU1", b"NetLiq", b"caf\\xe9", b"USD"), IN.ACCOUNT_SUMMARY
+        )
+
+        self.assertEqual(
+            self.wrapper.calls,
+            [
+                ("tickGeneric", 1, 23, 0.25),
+                ("accountSummary", 5, "DU1", "NetLiq", "caf\xe9", "USD"),
+            ],
+        )
+
+    def test_wrapper_signature_bad_length(self):
+        self.decoder.interpret((b"1", b"5", b"DU1", b"NetLiq", b"1000"), IN.ACCOUNT_SUMMARY)
+        self.assertEqual(self.wrapper.calls, [])
+
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import concurrent.futures
+import datetime
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from ibapi.common import BarData, HistoricalTickLast
+from ibapi.contract import Contract
+from ibapi.historical_cache import TICK_COLUMNS, TICKS, HistoricalCache, completeEnd
+
+
+class FakeDownload:
+    def __init__(self, items):
+        self.future = concurrent.futures.Future()
+        self.future.set_result(items)
+
+
+class FakeDownloader:
+    def __init__(self):
+        self.requested = []
+        self.move = 0.0
+
+    def downloadBars(self, contract, start, end, barSize, whatToShow, useRTH):
+        self.requested.append((start, end))
+        bars = []
+        for t in range(start, end, 60):
+            bar = BarData()
+            bar.date = str(t)
+            bar.open = bar.high = bar.low = bar.close = t / 100 + self.move
+            bar.volume = Decimal(10)
+            bar.wap = Decimal("1.5")
+            bar.barCount = 3
+            bars.append(bar)
+        return FakeDownload(bars)
+
+    def downloadTicks(self, contract, start, end, whatToShow, useRth):
+        self.requested.append((start, end))
+        ticks = []
+        for t in range(start, end, 10):
+            tick = HistoricalTickLast()
+            tick.time = t
+            tick.price = 1.25
+            tick.size = Decimal(100)
+            ticks.append(tick)
+        return FakeDownload(ticks)
+
+
+def utc(hour, minute=0):
+    return int(datetime.datetime(2025, 1, 2, hour, minute, tzinfo=datetime.timezone.utc).timestamp())
+
+
+class HistoricalCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HistoricalCache(self.tmp.name)
+        self.downloader = FakeDownloader()
+        self.contract = Contract()
+        self.contract.conId = 1
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def bars(self, start, end):
+        return self.cache.downloadBars(
+            self.downloader, self.contract, start, end, "1 min", "TRADES"
+        ).result(5)
+
+    def test_bars(self):
+        bars = self.bars(utc(9), utc(10))
+        self.assertEqual(len(bars), 60)
+        self.assertEqual(self.downloader.requested, [(utc(9), utc(10))])
+
+        self.downloader.requested.clear()
+        cached = self.bars(utc(9), utc(10))
+        self.assertEqual(self.downloader.requested, [])
+        self.assertEqual(cached[0].date, str(utc(9)))
+        self.assertEqual(cached[-1].close, bars[-1].close)
+        self.assertEqual(cached[0].volume, Decimal(10))
+        self.assertEqual(cached[0].wap, Decimal("1.5"))
+        self.assertEqual(cached[0].barCount, 3)
+
+    def test_gaps(self):
+        self.bars(utc(9), utc(10))
+        self.bars(utc(11), utc(12))
+        self.downloader.requested.clear()
+
+        bars = self.bars(utc(8, 30), utc(12, 30))
+        self.assertEqual(
+            self.downloader.requested,
+            [(utc(8, 30), utc(9)), (utc(10), utc(11)), (utc(12), utc(12, 30))],
+        )
+        self.assertEqual([int(bar.date) for bar in bars], list(range(utc(8, 30), utc(12, 30), 60)))
+
+    def test_forming_bar(self):
+        now = utc(10, 30) + 10
+        self.cache.clock = lambda: now
+        self.bars(utc(10), utc(10, 31))
+        files = self.cache.files(self.cache.seriesDir(1, "1 min", "TRADES", 1))
+        self.assertEqual([(start, end) for start, end, _ in files], [(utc(10), utc(10, 30))])
+
+        # later within the same minute, the 10:30 bar has moved
+        self.downloader.move = 1.0
+        now += 20
+        bars = self.bars(utc(10), utc(10, 31))
+        self.assertEqual(len(bars), 31)
+        self.assertEqual(bars[0].close, utc(10) / 100)
+        self.assertEqual(bars[-1].close, utc(10, 30) / 100 + 1.0)
+        self.assertEqual(self.downloader.requested[-1], (utc(10, 30), utc(10, 31)))
+
+    def test_complete_end(self):
+        now = utc(10, 30) + 10
+        self.assertEqual(completeEnd("1 min", now), utc(10, 30))
+        self.assertEqual(completeEnd("1 hour", now), utc(9, 30) + 11)
+        self.assertEqual(completeEnd("1 day", now), utc(0) - 86400)
+        self.assertEqual(completeEnd(TICKS, now), now)
+
+    def test_ticks(self):
+        ticks = self.cache.downloadTicks(
+            self.downloader, self.contract, utc(9), utc(9, 1), "TRADES"
+        ).result(5)
+        self.assertEqual(len(ticks), 6)
+        cached = self.cache.downloadTicks(
+            self.downloader, self.contract, utc(9), utc(9, 1), "TRADES"
+        ).result(5)
+        self.assertEqual(len(self.downloader.requested), 1)
+        self.assertEqual([tick.time for tick in cached], [tick.time for tick in ticks])
+        self.assertEqual(cached[0].price, 1.25)
+        self.assertEqual(cached[0].size, Decimal(100))
+
+    def test_eviction(self):
+        self.bars(utc(9), utc(10))
+        path = self.cache.files(self.cache.seriesDir(1, "1 min", "TRADES", 1))[0][2]
+        os.utime(path, (0, 0))
+        self.cache.maxBytes = os.path.getsize(path) + 1
+        self.bars(utc(11), utc(12))
+
+        files = self.cache.files(self.cache.seriesDir(1, "1 min", "TRADES", 1))
+        self.assertEqual([(start, end) for start, end, _ in files], [(utc(11), utc(12))])
+
+    def test_no_eviction_within_request(self):
+        self.bars(utc(9), utc(10))
+        seriesDir = self.cache.seriesDir(1, "1 min", "TRADES", 1)
+        path = self.cache.files(seriesDir)[0][2]
+        os.utime(path, (0, 0))
+        self.cache.maxBytes = 1
+
+        # the cached hour is older than the downloaded one, but is part of
+        # the answer
+        bars = self.bars(utc(8), utc(10))
+        self.assertEqual([int(bar.date) for bar in bars], list(range(utc(8), utc(10), 60)))
+        self.assertEqual(self.cache.files(seriesDir), [])
+        self.assertEqual(len(self.cache.inUse), 0)
+
+    def test_overlapping_ticks(self):
+        seriesDir = self.cache.seriesDir(1, TICKS, "TRADES", 1)
+        # 2 ticks a second, the files overlap on second 11
+        first = [(10, 1.0, 1.0), (10, 2.0, 1.0), (11, 3.0, 1.0), (11, 4.0, 1.0)]
+        second = [(11, 3.0, 1.0), (11, 4.0, 1.0), (12, 5.0, 1.0), (12, 6.0, 1.0)]
+        self.cache.store(seriesDir, TICK_COLUMNS, 10, 12, first)
+        self.cache.store(seriesDir, TICK_COLUMNS, 11, 13, second)
+        data = self.cache.read(seriesDir, TICK_COLUMNS, 10, 13)
+        self.assertEqual(list(data["time"]), [10, 10, 11, 11, 12, 12])
+        self.assertEqual(list(data["price"]), [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
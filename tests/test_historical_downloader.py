@@ -0,0 +1,203 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import datetime
+import time
+import unittest
+
+from ibapi.common import BarData, HistoricalTickLast
+from ibapi.contract import Contract
+from ibapi.historical_downloader import HistoricalDownloader, PacingLimiter, splitRange
+from ibapi.history_arrays import HistoricalDataArrays
+from ibapi.request_futures import FIRST_REQ_ID, RequestError, RequestFuturesWrapper
+
+
+class FakeApp(RequestFuturesWrapper):
+    def __init__(self):
+        RequestFuturesWrapper.__init__(self)
+        self.sent = []
+        self.nPacingViolations = 0
+        self.nUnanswered = 0
+        self.errorMsg = None
+        self.arrays = False
+        self.cancelled = []
+        self.ticks = []
+
+    def reqHistoricalData(self, reqId, contract, endDateTime, durationStr, barSize, whatToShow, useRTH, formatDate, keepUpToDate, chartOptions):
+        self.sent.append((time.monotonic(), endDateTime, durationStr))
+        if self.nPacingViolations:
+            self.nPacingViolations -= 1
+            self.error(reqId, 0, 162, "Historical Market Data Service error message:API historical data query cancelled: pacing violation")
+            return
+        if self.errorMsg is not None:
+            self.error(reqId, 0, 162, self.errorMsg)
+            return
+        if self.arrays:
+            self.historicalDataArray(reqId, HistoricalDataArrays())
+            self.historicalDataEnd(reqId, "", "")
+            return
+        if self.nUnanswered:
+            self.nUnanswered -= 1
+            return
+        end = datetime.datetime.strptime(endDateTime, "%Y%m%d-%H:%M:%S").replace(tzinfo=datetime.timezone.utc)
+        count, unit = durationStr.split()
+        if unit == "D":
+            # the bars of the days touched by the duration, the one of the
+            # end day included
+            for day in range(int(count), -1, -1):
+                bar = BarData()
+                bar.date = (end - datetime.timedelta(days=day)).strftime("%Y%m%d")
+                self.historicalData(reqId, bar)
+        else:
+            for t in range(int(end.timestamp()) - int(count), int(end.timestamp()), 60):
+                bar = BarData()
+                bar.date = str(t)
+                self.historicalData(reqId, bar)
+        self.historicalDataEnd(reqId, "", "")
+
+    def cancelHistoricalData(self, reqId):
+        self.cancelled.append(reqId)
+
+    def reqHistoricalTicks(self, reqId, contract, startDateTime, endDateTime, numberOfTicks, whatToShow, useRth, ignoreSize, miscOptions):
+        start = datetime.datetime.strptime(startDateTime, "%Y%m%d-%H:%M:%S").replace(tzinfo=datetime.timezone.utc)
+        page = [tick for tick in self.ticks if tick.time >= start.timestamp()][:numberOfTicks]
+        self.historicalTicksLast(reqId, page, True)
+
+
+def utc(hour, minute=0):
+    return datetime.datetime(2025, 1, 2, hour, minute, tzinfo=datetime.timezone.utc)
+
+
+class HistoricalDownloaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = FakeApp()
+        self.contract = Contract()
+        self.contract.conId = 1
+
+    def test_split_range(self):
+        chunks = splitRange(utc(9), utc(10, 30), 3600)
+        self.assertEqual(chunks, [(utc(9, 30), utc(10, 30)), (utc(9), utc(9, 30))])
+
+    def test_pacing_limiter(self):
+        limiter = PacingLimiter(maxRequests=3, window=10, identicalInterval=15, maxBurst=2, burstWindow=2)
+        limiter.record("a", "x", 0)
+        self.assertEqual(limiter.delay("a", "x", 1), 14)
+        limiter.record("b", "x", 1)
+        self.assertEqual(limiter.delay("c", "x", 1.5), 0.5)
+        self.assertEqual(limiter.delay("c", "y", 1.5), 0)
+        limiter.record("c", "y", 1.5)
+        self.assertEqual(limiter.delay("d", "z", 2), 8)
+
+    def test_bars(self):
+        limiter = PacingLimiter(maxBurst=2, burstWindow=0.2)
+        downloader = HistoricalDownloader(self.app, limiter)
+        download = downloader.downloadBars(self.contract, utc(9), utc(12), "1 min", "TRADES", chunkSeconds=3600)
+
+        bars = download.future.result(5)
+        downloader.stop()
+        self.assertEqual(len(bars), 180)
+        self.assertEqual(bars[0].date, str(int(utc(9).timestamp())))
+        self.assertEqual([durationStr for _, _, durationStr in self.app.sent], ["3600 S"] * 3)
+        self.assertGreaterEqual(self.app.sent[2][0] - self.app.sent[0][0], 0.19)
+
+    def test_pacing_violation(self):
+        self.app.nPacingViolations = 1
+        downloader = HistoricalDownloader(self.app, PacingLimiter(identicalInterval=0), retryDelay=0.01)
+        chunks = []
+        download = downloader.downloadBars(
+            self.contract, utc(9), utc(10), "1 min", "TRADES",
+            onData=lambda download, start, end, bars: chunks.append(len(bars)),
+        )
+
+        self.assertEqual(download.future.result(5), 60)
+        downloader.stop()
+        self.assertEqual(chunks, [60])
+        self.assertEqual(len(self.app.sent), 2)
+
+    def test_no_data(self):
+        self.app.errorMsg = "Historical Market Data Service error message:HMDS query returned no data: ES@CME Trades"
+        downloader = HistoricalDownloader(self.app, PacingLimiter(identicalInterval=0))
+        download = downloader.downloadBars(self.contract, utc(9), utc(12), "1 min", "TRADES", chunkSeconds=3600)
+
+        self.assertEqual(download.future.result(5), [])
+        downloader.stop()
+        self.assertEqual(len(self.app.sent), 3)
+
+    def test_failed_download(self):
+        self.app.errorMsg = "Historical Market Data Service error message:No market data permissions for CME FUT"
+        downloader = HistoricalDownloader(self.app, PacingLimiter(identicalInterval=0))
+        download = downloader.downloadBars(self.contract, utc(9), utc(12), "1 min", "TRADES", chunkSeconds=3600)
+
+        with self.assertRaises(RequestError):
+            download.future.result(5)
+        time.sleep(0.05)
+        downloader.stop()
+        # the other chunks are not sent
+        self.assertEqual(len(self.app.sent), 1)
+
+    def test_arrays(self):
+        self.app.arrays = True
+        downloader = HistoricalDownloader(self.app, PacingLimiter(identicalInterval=0))
+        download = downloader.downloadBars(self.contract, utc(9), utc(10), "1 min", "TRADES")
+
+        with self.assertRaises(TypeError):
+            download.future.result(5)
+        downloader.stop()
+
+    def test_unanswered_request(self):
+        self.app.nUnanswered = 1
+        downloader = HistoricalDownloader(self.app, PacingLimiter(identicalInterval=0), requestTimeout=0.1)
+        download = downloader.downloadBars(self.contract, utc(9), utc(10), "1 min", "TRADES")
+
+        self.assertEqual(len(download.future.result(5)), 60)
+        downloader.stop()
+        self.assertEqual(len(self.app.sent), 2)
+        self.assertEqual(self.app.cancelled, [FIRST_REQ_ID])
+        self.assertEqual(len(self.app.requests.pending), 0)
+
+    def test_unanswered_too_often(self):
+        self.app.nUnanswered = 2
+        downloader = HistoricalDownloader(
+            self.app, PacingLimiter(identicalInterval=0), maxTries=2, requestTimeout=0.05
+        )
+        download = downloader.downloadBars(self.contract, utc(9), utc(10), "1 min", "TRADES")
+
+        with self.assertRaises(TimeoutError):
+            download.future.result(5)
+        downloader.stop()
+        self.assertEqual(len(self.app.cancelled), 2)
+
+    def test_daily_bars(self):
+        downloader = HistoricalDownloader(self.app, PacingLimiter(identicalInterval=0))
+        start = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+        download = downloader.downloadBars(
+            self.contract, start, start + datetime.timedelta(days=10), "1 day", "TRADES", chunkSeconds=4 * 86400
+        )
+
+        bars = download.future.result(5)
+        downloader.stop()
+        self.assertEqual(len(self.app.sent), 3)
+        self.assertEqual([bar.date for bar in bars], ["202501%02d" % day for day in range(1, 11)])
+
+    def test_ticks(self):
+        for t in (0, 0, 1, 1, 1, 2, 3, 3):
+            tick = HistoricalTickLast()
+            tick.time = int(utc(9).timestamp()) + t
+            self.app.ticks.append(tick)
+
+        downloader = HistoricalDownloader(self.app, PacingLimiter(identicalInterval=0))
+        import ibapi.historical_downloader as hd
+        ticksPerRequest, hd.TICKS_PER_REQUEST = hd.TICKS_PER_REQUEST, 3
+        try:
+            download = downloader.downloadTicks(self.contract, utc(9), utc(9) + datetime.timedelta(seconds=3), "TRADES")
+            ticks = download.future.result(5)
+        finally:
+            hd.TICKS_PER_REQUEST = ticksPerRequest
+            downloader.stop()
+        self.assertEqual(ticks, self.app.ticks[:6])
+
+
+if "__main__" == __name__:
+    unittest.main()
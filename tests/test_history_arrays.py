@@ -0,0 +1,147 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import math
+import unittest
+
+from ibapi.decoder import Decoder
+from ibapi.message import IN
+from ibapi.protobuf.HistoricalData_pb2 import HistoricalData as HistoricalDataProto
+from ibapi.protobuf.HistoricalTicksLast_pb2 import HistoricalTicksLast as HistoricalTicksLastProto
+from ibapi.server_versions import MIN_SERVER_VER_HISTORICAL_DATA_END
+from ibapi.wrapper import EWrapper
+
+
+class RecordingWrapper(EWrapper):
+    def __init__(self):
+        EWrapper.__init__(self)
+        self.calls = []
+
+    def historicalData(self, reqId, bar):
+        self.calls.append(("historicalData", reqId, bar))
+
+    def historicalDataArray(self, reqId, arrays):
+        self.calls.append(("historicalDataArray", reqId, arrays))
+
+    def historicalTicksBidAskArray(self, reqId, arrays, done):
+        self.calls.append(("historicalTicksBidAskArray", reqId, arrays, done))
+
+    def historicalTicksLastArray(self, reqId, arrays, done):
+        self.calls.append(("historicalTicksLastArray", reqId, arrays, done))
+
+
+class HistoricalDataArraysTestCase(unittest.TestCase):
+    def setUp(self):
+        self.wrapper = RecordingWrapper()
+        self.decoder = Decoder(self.wrapper, MIN_SERVER_VER_HISTORICAL_DATA_END)
+        self.decoder.historicalDataArrays = True
+
+    def test_text(self):
+        fields = (
+            b"7", b"2",
+            b"1735808400", b"1.5", b"2.5", b"1.0", b"2.0", b"100", b"1.75", b"4",
+            b"1735808460", b"2.0", b"3.0", b"Infinity", b"2.5", b"", b"9223372036854775807", b"0",
+        )
+        self.decoder.interpret(fields, IN.HISTORICAL_DATA)
+
+        self.assertEqual(len(self.wrapper.calls), 1)
+        name, reqId, arrays = self.wrapper.calls[0]
+        self.assertEqual((name, reqId, len(arrays)), ("historicalDataArray", 7, 2))
+        self.assertEqual(arrays.date, ["1735808400", "1735808460"])
+        self.assertEqual(list(arrays.close), [2.0, 2.5])
+        self.assertEqual(arrays.low[1], math.inf)
+        self.assertEqual(arrays.volume[0], 100.0)
+        self.assertTrue(math.isnan(arrays.volume[1]))
+        self.assertTrue(math.isnan(arrays.wap[1]))
+        self.assertEqual(list(arrays.barCount), [4, 0])
+
+    def test_text_off(self):
+        self.decoder.historicalDataArrays = False
+        fields = (b"7", b"1", b"1735808400", b"1.5", b"2.5", b"1.0", b"2.0", b"100", b"1.75", b"4")
+        self.decoder.interpret(fields, IN.HISTORICAL_DATA)
+        self.assertEqual([call[0] for call in self.wrapper.calls], ["historicalData"])
+
+    def test_protobuf(self):
+        proto = HistoricalDataProto()
+        proto.reqId = 3
+        for t in range(3):
+            bar = proto.historicalDataBars.add()
+            bar.date = str(t)
+            bar.open = bar.high = bar.low = bar.close = float(t)
+            bar.volume = "10"
+            bar.barCount = t
+        self.decoder.processHistoricalDataMsgProtoBuf(proto.SerializeToString())
+
+        name, reqId, arrays = self.wrapper.calls[0]
+        self.assertEqual((name, reqId), ("historicalDataArray", 3))
+        self.assertEqual(arrays.date, ["0", "1", "2"])
+        self.assertEqual(list(arrays.high), [0.0, 1.0, 2.0])
+        self.assertEqual(list(arrays.volume), [10.0] * 3)
+        self.assertTrue(math.isnan(arrays.wap[0]))
+        self.assertEqual(list(arrays.barCount), [0, 1, 2])
+
+
+
+class HistoricalTicksArraysTestCase(unittest.TestCase):
+    def setUp(self):
+        self.wrapper = RecordingWrapper()
+        self.decoder = Decoder(self.wrapper, MIN_SERVER_VER_HISTORICAL_DATA_END)
+        self.decoder.historicalTicksArrays = True
+
+    def test_bid_ask(self):
+        fields = (
+            b"4", b"2",
+            b"1735808400", b"1", b"1.5", b"1.75", b"100", b"200",
+            b"1735808401", b"2", b"1.25", b"1.5", b"", b"300",
+            b"1",
+        )
+        self.decoder.interpret(fields, IN.HISTORICAL_TICKS_BID_ASK)
+
+        name, reqId, arrays, done = self.wrapper.calls[0]
+        self.assertEqual((name, reqId, done, len(arrays)), ("historicalTicksBidAskArray", 4, True, 2))
+        self.assertEqual(list(arrays.time), [1735808400, 1735808401])
+        self.assertEqual(list(arrays.mask), [1, 2])
+        self.assertEqual(list(arrays.priceAsk), [1.75, 1.5])
+        self.assertTrue(math.isnan(arrays.sizeBid[1]))
+
+    def test_last(self):
+        fields = (
+            b"5", b"3",
+            b"1735808400", b"0", b"1.5", b"100", b"NYSE", b"",
+            b"1735808400", b"2", b"1.6", b"10", b"ARCA", b"I",
+            b"1735808401", b"0", b"1.7", b"20", b"NYSE", b"",
+            b"0",
+        )
+        self.decoder.interpret(fields, IN.HISTORICAL_TICKS_LAST)
+
+        name, reqId, arrays, done = self.wrapper.calls[0]
+        self.assertEqual((name, reqId, done), ("historicalTicksLastArray", 5, False))
+        self.assertEqual(list(arrays.exchange), [0, 2, 0])
+        self.assertEqual([arrays.exchangeOf(i) for i in range(3)], ["NYSE", "ARCA", "NYSE"])
+        self.assertEqual(arrays.specialConditionsOf(1), "I")
+        self.assertEqual(list(arrays.mask), [0, 2, 0])
+
+        # the codes stay the same across pages and protobuf msgs
+        proto = HistoricalTicksLastProto()
+        proto.reqId = 5
+        proto.isDone = True
+        tick = proto.historicalTicksLast.add()
+        tick.time = 1735808402
+        tick.price = 1.8
+        tick.size = "30"
+        tick.exchange = "ARCA"
+        tick.tickAttribLast.unreported = True
+        self.decoder.processHistoricalTicksLastMsgProtoBuf(proto.SerializeToString())
+
+        name, reqId, arrays, done = self.wrapper.calls[1]
+        self.assertEqual((name, reqId, done), ("historicalTicksLastArray", 5, True))
+        self.assertEqual(list(arrays.exchange), [2])
+        self.assertEqual(list(arrays.mask), [2])
+        self.assertEqual(arrays.specialConditionsOf(0), "")
+        self.assertEqual(list(arrays.size), [30.0])
+
+
+if "__main__" == __name__:
+    unittest.main()
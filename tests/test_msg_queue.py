@@ -0,0 +1,168 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import threading
+import unittest
+
+from ibapi.comm import make_field
+from ibapi.message import IN
+from ibapi.msg_queue import (
+    MsgQueue,
+    BoundedMsgQueue,
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_OLDEST,
+    OVERFLOW_CONFLATE,
+)
+from ibapi.protobuf.TickPrice_pb2 import TickPrice as TickPriceProto
+from ibapi.common import PROTOBUF_MSG_ID
+
+
+def textMsg(*fields):
+    return "".join(make_field(field) for field in fields).encode()
+
+
+def tickPrice(reqId, tickType, price):
+    return textMsg(IN.TICK_PRICE, 6, reqId, tickType, price, 100, 0)
+
+
+def orderStatus(orderId):
+    return textMsg(IN.ORDER_STATUS, orderId, "Filled")
+
+
+class MsgQueueTestCase(unittest.TestCase):
+    def test_batches_in_order(self):
+        q = MsgQueue()
+        q.putBatch([b"1", b"2"])
+        q.put(b"3")
+        q.putBatch([])
+
+        self.assertEqual(q.qsize(), 3)
+        self.assertEqual(q.getBatch(0), [b"1", b"2"])
+        self.assertEqual(q.getBatch(0), [b"3"])
+        self.assertTrue(q.empty())
+        self.assertEqual(q.getBatch(0.01), [])
+
+    def test_wakeup(self):
+        q = MsgQueue()
+        timer = threading.Timer(0.05, q.putBatch, ([b"1"],))
+        timer.start()
+        self.assertEqual(q.getBatch(5), [b"1"])
+        timer.join()
+
+
+class BoundedMsgQueueTestCase(unittest.TestCase):
+    def newQueue(self, maxSize, policy, serverVersion=176):
+        q = BoundedMsgQueue(maxSize, policy)
+        q.open(serverVersion)
+        return q
+
+    def test_block(self):
+        q = self.newQueue(2, OVERFLOW_BLOCK)
+        q.putBatch([orderStatus(1), orderStatus(2)])
+        timer = threading.Timer(0.05, q.getBatch)
+        timer.start()
+        q.put(orderStatus(3))
+        timer.join()
+
+        self.assertEqual(q.getBatch(0), [orderStatus(3)])
+        self.assertEqual(q.highWaterMark, 2)
+        self.assertGreater(q.blockedTime, 0)
+
+    def test_block_batch_larger_than_queue(self):
+        q = self.newQueue(2, OVERFLOW_BLOCK)
+        msgs = [orderStatus(orderId) for orderId in range(10)]
+        got = []
+
+        def consume():
+            while len(got) < len(msgs):
+                got.extend(q.getBatch(5))
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        q.putBatch(msgs)
+        consumer.join(5)
+        self.assertEqual(got, msgs)
+
+    def test_close_unblocks(self):
+        q = self.newQueue(1, OVERFLOW_BLOCK)
+        q.put(orderStatus(1))
+        threading.Timer(0.05, q.close).start()
+        q.put(orderStatus(2))
+        self.assertEqual(q.qsize(), 2)
+
+    def test_drop_oldest(self):
+        q = self.newQueue(3, OVERFLOW_DROP_OLDEST)
+        q.putBatch([tickPrice(1, 1, 10.0), orderStatus(1), tickPrice(1, 1, 10.5)])
+        q.put(tickPrice(1, 2, 11.0))
+
+        self.assertEqual(q.nDropped, 1)
+        self.assertEqual(
+            q.getBatch(0), [orderStatus(1), tickPrice(1, 1, 10.5), tickPrice(1, 2, 11.0)]
+        )
+        self.assertEqual(q.highWaterMark, 3)
+        self.assertTrue(q.empty())
+
+    def test_drop_oldest_keeps_orders(self):
+        q = self.newQueue(1, OVERFLOW_DROP_OLDEST)
+        q.put(orderStatus(1))
+        timer = threading.Timer(0.05, q.getBatch)
+        timer.start()
+        q.put(tickPrice(1, 1, 10.0))
+        timer.join()
+
+        self.assertEqual(q.nDropped, 0)
+        self.assertEqual(q.getBatch(0), [tickPrice(1, 1, 10.0)])
+
+    def test_conflate(self):
+        q = self.newQueue(10, OVERFLOW_CONFLATE)
+        q.putBatch(
+            [
+                tickPrice(1, 1, 10.0),
+                tickPrice(1, 2, 11.0),
+                orderStatus(1),
+                tickPrice(1, 1, 10.5),
+                tickPrice(2, 1, 20.0),
+            ]
+        )
+
+        self.assertEqual(q.nConflated, 1)
+        self.assertEqual(
+            q.getBatch(0),
+            [tickPrice(1, 1, 10.5), tickPrice(1, 2, 11.0), orderStatus(1), tickPrice(2, 1, 20.0)],
+        )
+        q.put(tickPrice(1, 1, 10.0))
+        self.assertEqual(q.getBatch(0), [tickPrice(1, 1, 10.0)])
+
+    def test_conflate_not_full(self):
+        q = self.newQueue(100, OVERFLOW_CONFLATE)
+        for price in (10.0, 10.25, 10.5):
+            q.put(tickPrice(1, 1, price))
+
+        self.assertEqual(q.nConflated, 2)
+        self.assertEqual(q.depth, 1)
+        self.assertEqual(q.getBatch(0), [tickPrice(1, 1, 10.5)])
+
+    def test_conflate_full(self):
+        q = self.newQueue(2, OVERFLOW_CONFLATE)
+        q.putBatch([tickPrice(1, 1, 10.0), orderStatus(1)])
+        # replaces the pending tick without waiting for room
+        q.put(tickPrice(1, 1, 10.5))
+
+        self.assertEqual(q.blockedTime, 0.0)
+        self.assertEqual(q.getBatch(0), [tickPrice(1, 1, 10.5), orderStatus(1)])
+
+    def test_conflate_protobuf(self):
+        def tickPriceProtoBuf(reqId, tickType, price):
+            proto = TickPriceProto(reqId=reqId, tickType=tickType, price=price)
+            msgId = IN.TICK_PRICE + PROTOBUF_MSG_ID
+            return msgId.to_bytes(4, "big") + proto.SerializeToString()
+
+        q = self.newQueue(10, OVERFLOW_CONFLATE, serverVersion=201)
+        q.putBatch([tickPriceProtoBuf(1, 1, 10.0), tickPriceProtoBuf(1, 1, 10.5)])
+        self.assertEqual(q.getBatch(0), [tickPriceProtoBuf(1, 1, 10.5)])
+
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import math
+import unittest
+
+from ibapi.common import TickAttrib
+from ibapi.contract import Contract
+from ibapi.option_chain import OptionChain
+from ibapi.request_futures import RequestFuturesWrapper
+from ibapi.ticktype import TickTypeEnum
+
+
+class FakeApp(RequestFuturesWrapper):
+    def __init__(self):
+        RequestFuturesWrapper.__init__(self)
+        self.snapshots = {}  # reqId -> contract
+        self.maxInFlight = 0
+        self.cancelled = []
+
+    def reqSecDefOptParams(self, reqId, underlyingSymbol, futFopExchange, underlyingSecType, underlyingConId):
+        self.securityDefinitionOptionParameter(
+            reqId, "SMART", underlyingConId, "SPXW", "100", {"20250103"}, {90.0, 100.0}
+        )
+        self.securityDefinitionOptionParameter(
+            reqId, "SMART", underlyingConId, "SPX", "100", {"20250117", "20250221"}, {90.0, 100.0, 110.0}
+        )
+        self.securityDefinitionOptionParameterEnd(reqId)
+
+    def reqMktData(self, reqId, contract, genericTickList, snapshot, regulatorySnapshot, mktDataOptions):
+        self.snapshots[reqId] = contract
+        self.maxInFlight = max(self.maxInFlight, len(self.snapshots))
+
+    def cancelMktData(self, reqId):
+        self.cancelled.append(reqId)
+        del self.snapshots[reqId]
+
+    def answerAll(self, unanswered=()):
+        """answers the snapshots but those of the (right, expiry, strike)
+        unanswered"""
+        while True:
+            pending = [
+                (reqId, contract) for reqId, contract in self.snapshots.items()
+                if (contract.right, contract.lastTradeDateOrContractMonth, contract.strike) not in unanswered
+            ]
+            if not pending:
+                return
+            reqId, contract = pending[0]
+            del self.snapshots[reqId]
+            if contract.strike == 110.0 and contract.lastTradeDateOrContractMonth == "20250221":
+                self.error(reqId, 0, 200, "No security definition has been found for the request")
+                continue
+            self.tickPrice(reqId, TickTypeEnum.BID, contract.strike / 100, TickAttrib())
+            self.tickOptionComputation(
+                reqId, TickTypeEnum.MODEL_OPTION, 0, 0.2,
+                0.5 if contract.right == "C" else -0.5, 1.0, 0.0, 0.01, 0.1, -0.05, 100.0,
+            )
+            self.tickSnapshotEnd(reqId)
+
+
+def spx():
+    underlying = Contract()
+    underlying.symbol = "SPX"
+    underlying.secType = "IND"
+    underlying.conId = 416904
+    underlying.currency = "USD"
+    return underlying
+
+
+class OptionChainTestCase(unittest.TestCase):
+    def test_load(self):
+        app = FakeApp()
+        underlying = spx()
+
+        chain = OptionChain(app, lineBudget=4)
+        future = chain.load(underlying, strikeFilter=lambda strike: strike >= 100)
+        app.answerAll()
+        surface = future.result(1)
+
+        self.assertEqual(app.maxInFlight, 4)
+        self.assertEqual(surface.expirations, ["20250117", "20250221"])
+        self.assertEqual(surface.strikes, [100.0, 110.0])
+        self.assertEqual(surface.shape, (2, 2))
+        self.assertEqual(len(surface.contracts), 8)
+        self.assertEqual(surface.nFailed, 2)
+        self.assertEqual(surface.get("C", "20250117", 110.0, "delta"), 0.5)
+        self.assertEqual(surface.get("P", "20250117", 110.0, "delta"), -0.5)
+        self.assertEqual(surface.get("C", "20250221", 100.0, "bid"), 1.0)
+        self.assertTrue(math.isnan(surface.get("C", "20250221", 110.0, "impliedVol")))
+        self.assertEqual(list(surface.smile("20250117")), [0.2, 0.2])
+        self.assertEqual(surface.contracts[0][3].tradingClass, "SPX")
+
+        app.maxInFlight = 0
+        future = chain.refresh(surface)
+        app.answerAll()
+        self.assertIs(future.result(1), surface)
+        self.assertEqual(app.maxInFlight, 4)
+
+    def test_snapshot_timeout(self):
+        app = FakeApp()
+        chain = OptionChain(app, lineBudget=4, snapshotTimeout=0.05)
+        future = chain.load(spx(), strikeFilter=lambda strike: strike >= 100)
+        app.answerAll(unanswered={("C", "20250117", 100.0)})
+        surface = future.result(1)
+
+        self.assertEqual(surface.nFailed, 3)
+        self.assertEqual(len(app.cancelled), 1)
+        self.assertEqual(app.snapshots, {})
+        self.assertEqual(chain.inFlight, 0)
+        self.assertTrue(math.isnan(surface.get("C", "20250117", 100.0, "delta")))
+        self.assertEqual(surface.get("P", "20250117", 100.0, "delta"), -0.5)
+
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import unittest
+from decimal import Decimal
+
+from ibapi.decoder import Decoder
+from ibapi.message import IN
+from ibapi.order_book import OrderBooks, ASK, BID, INSERT, UPDATE, DELETE
+from ibapi.server_versions import MIN_SERVER_VER_ENCODE_MSG_ASCII7
+from ibapi.wrapper import EWrapper
+
+
+class RecordingWrapper(EWrapper):
+    def __init__(self):
+        EWrapper.__init__(self)
+        self.calls = []
+
+    def updateMktDepthL2(self, reqId, position, marketMaker, operation, side, price, size, isSmartDepth):
+        self.calls.append(("updateMktDepthL2", reqId, position, operation))
+
+    def error(self, reqId, errorTime, errorCode, errorString, advancedOrderRejectJson=""):
+        self.calls.append(("error", reqId, errorCode))
+
+
+class OrderBookTestCase(unittest.TestCase):
+    def test_operations(self):
+        updates = []
+        books = OrderBooks(onUpdate=lambda reqId, book, side, pos, op: updates.append((side, pos, op)))
+        books.update(1, 0, "", INSERT, BID, 10.0, Decimal(5))
+        books.update(1, 0, "", INSERT, BID, 10.5, Decimal(1))
+        books.update(1, 2, "", UPDATE, BID, 9.5, Decimal(7))
+        books.update(1, 1, "", UPDATE, BID, 10.0, Decimal(6))
+        books.update(1, 0, "", INSERT, ASK, 11.0, Decimal(2))
+        books.update(1, 0, "", DELETE, BID, 0.0, Decimal(0))
+        books.update(1, 5, "", DELETE, BID, 0.0, Decimal(0))
+
+        book = books.get(1)
+        self.assertEqual(book.bids.top(5), [(10.0, 6.0, ""), (9.5, 7.0, "")])
+        self.assertEqual(book.bestBid(), (10.0, 6.0))
+        self.assertEqual(book.bestAsk(), (11.0, 2.0))
+        self.assertEqual(len(updates), 6)
+        self.assertEqual(updates[2], (BID, 2, UPDATE))
+
+        (bidPrices, _, _), _ = book.snapshot()
+        books.update(1, 0, "", DELETE, BID, 0.0, Decimal(0))
+        self.assertEqual(list(bidPrices), [10.0, 9.5])
+
+    def test_decoder(self):
+        wrapper = RecordingWrapper()
+        decoder = Decoder(wrapper, MIN_SERVER_VER_ENCODE_MSG_ASCII7)
+        decoder.orderBooks = OrderBooks(forwardDepth=False)
+
+        decoder.interpret(
+            (b"1", b"7", b"0", b"ARCA", b"0", b"1", b"10.5", b"100", b"1"), IN.MARKET_DEPTH_L2
+        )
+        decoder.interpret(
+            (b"1", b"7", b"0", b"NSDQ", b"0", b"1", b"10.6", b"200", b"1"), IN.MARKET_DEPTH_L2
+        )
+        book = decoder.orderBooks.get(7)
+        self.assertTrue(book.isSmartDepth)
+        self.assertEqual(book.bids.top(2), [(10.6, 200.0, "NSDQ"), (10.5, 100.0, "ARCA")])
+        self.assertEqual(wrapper.calls, [])
+
+        decoder.interpret((b"2", b"7", b"317", b"Market depth data has been RESET"), IN.ERR_MSG)
+        self.assertEqual(len(book.bids), 0)
+        self.assertEqual(wrapper.calls, [("error", 7, 317)])
+
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import copy
+import unittest
+from decimal import Decimal
+
+from ibapi.const import UNSET_DOUBLE
+from ibapi.order_template import OrderTemplate
+from ibapi.server_versions import MAX_CLIENT_VER
+from ibapi.utils import ClientException
+
+from tests.order_helpers import connectedClient, orders, placeOrderError
+
+
+class OrderTemplateTestCase(unittest.TestCase):
+    def test_same_bytes(self):
+        nTemplates = 0
+        for serverVersion in (38, 70, 100, 145, 163, 176, 187, 200, 202, MAX_CLIENT_VER):
+            for contract, order in orders():
+                plain = connectedClient(serverVersion)
+                templated = connectedClient(serverVersion)
+                expectedError = placeOrderError(plain, 7, contract, order)
+                plain.conn.sent.clear()
+                plain.wrapper.errors.clear()
+                if expectedError is not None:
+                    with self.assertRaises(ClientException) as raised:
+                        OrderTemplate(templated, contract, order)
+                    self.assertEqual(raised.exception.code, expectedError, serverVersion)
+                    continue
+                template = OrderTemplate(templated, contract, order)
+                nTemplates += 1
+                for orderId, price, quantity in ((7, None, None), (8, 101.25, Decimal(3)), (9, 0.5, Decimal("2.5"))):
+                    sent = copy.copy(order)
+                    if price is not None:
+                        sent.lmtPrice = price
+                        sent.auxPrice = price + 1
+                    if quantity is not None:
+                        sent.totalQuantity = quantity
+                    plain.placeOrder(orderId, contract, sent)
+                    template.place(
+                        orderId,
+                        lmtPrice=price,
+                        totalQuantity=quantity,
+                        auxPrice=None if price is None else price + 1,
+                    )
+                self.assertEqual(templated.conn.sent, plain.conn.sent, serverVersion)
+                self.assertEqual(templated.wrapper.errors, plain.wrapper.errors)
+        # 3 of the 4 orders are refused below MIN_SERVER_VER_CASH_QTY
+        self.assertEqual(nTemplates, 3 * 1 + 7 * 4)
+
+    def test_server_version_change(self):
+        client = connectedClient(176)
+        contract, order = next(orders())
+        template = OrderTemplate(client, contract, order)
+        client.serverVersion_ = MAX_CLIENT_VER
+        template.place(5, lmtPrice=2.0)
+        self.assertTrue(template.useProtoBuf)
+
+        plain = connectedClient(MAX_CLIENT_VER)
+        sent = copy.copy(order)
+        sent.lmtPrice = 2.0
+        plain.placeOrder(5, contract, sent)
+        self.assertEqual(client.conn.sent, plain.conn.sent)
+
+    def test_recompile_fails(self):
+        client = connectedClient(176)
+        contract, order = next(orders())
+        template = OrderTemplate(client, contract, order)
+        # the order has no cashQty, which server version 38 refuses
+        client.serverVersion_ = 38
+        template.place(5)
+        self.assertEqual(client.conn.sent, [])
+        self.assertEqual([error[:2] for error in client.wrapper.errors], [(5, 503)])
+
+        client.serverVersion_ = 176
+        template.place(6)
+        self.assertEqual(len(client.conn.sent), 1)
+
+    def test_unset_prices_protobuf(self):
+        client = connectedClient(MAX_CLIENT_VER)
+        contract, order = next(orders())
+        order.auxPrice = 1.0
+        template = OrderTemplate(client, contract, order)
+        template.place(5, lmtPrice=UNSET_DOUBLE, auxPrice=UNSET_DOUBLE)
+
+        plain = connectedClient(MAX_CLIENT_VER)
+        sent = copy.copy(order)
+        sent.lmtPrice = sent.auxPrice = UNSET_DOUBLE
+        plain.placeOrder(5, contract, sent)
+        self.assertTrue(template.useProtoBuf)
+        self.assertEqual(client.conn.sent, plain.conn.sent)
+
+    def test_invalid_order(self):
+        client = connectedClient(176)
+        contract, order = next(orders())
+        order.orderRef = "caf\xe9"
+        with self.assertRaises(ClientException):
+            OrderTemplate(client, contract, order)
+        self.assertEqual(client.conn.sent, [])
+        self.assertEqual(client.wrapper.errors, [])
+
+
+if "__main__" == __name__:
+    unittest.main()
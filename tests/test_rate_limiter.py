@@ -0,0 +1,105 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import time
+import unittest
+
+from ibapi.rate_limiter import DATA, ORDERS, RateLimiter
+
+from tests.connection_helpers import connected, recvAll
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def test_burst_then_rate(self):
+        limiter = RateLimiter(rate=40, burst=10)
+        for _ in range(10):
+            self.assertEqual(limiter.take(DATA), 0)
+        wait = limiter.take(DATA)
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 1 / 40)
+        self.assertEqual(limiter.stats[DATA].nMsgs, 10)
+        self.assertEqual(limiter.stats[DATA].nWaits, 1)
+
+    def test_budgets(self):
+        limiter = RateLimiter(rate=100, burst=10, budgets={ORDERS: (1, 1)})
+        self.assertEqual(limiter.take(ORDERS), 0)
+        self.assertGreater(limiter.take(ORDERS), 0.5)
+        self.assertEqual(limiter.take(DATA), 0)
+
+    def test_queued_delay(self):
+        limiter = RateLimiter()
+        limiter.queued(ORDERS)
+        time.sleep(0.01)
+        self.assertEqual(limiter.nQueued(), 1)
+        self.assertEqual(limiter.take(ORDERS), 0)
+        self.assertEqual(limiter.nQueued(), 0)
+        self.assertGreaterEqual(limiter.stats[ORDERS].maxDelay, 0.01)
+
+    def test_paced_send(self):
+        limiter = RateLimiter(rate=500, burst=1)
+        conn, peer = connected(rateLimiter=limiter)
+        start = time.monotonic()
+        for _ in range(11):
+            conn.sendMsg(b"m")
+        self.assertGreaterEqual(time.monotonic() - start, 0.018)
+        self.assertEqual(recvAll(peer, 11), b"m" * 11)
+        self.assertGreater(limiter.stats[DATA].nWaits, 0)
+        self.assertGreater(limiter.stats[DATA].maxDelay, 0)
+        conn.disconnect()
+        peer.close()
+
+    def test_writer_urgent_ahead(self):
+        limiter = RateLimiter(rate=20, burst=2)
+        conn, peer = connected(writerThread=True, rateLimiter=limiter)
+        conn.startWriter()
+        for idx in range(6):
+            conn.sendMsg(b"%d" % idx)
+        time.sleep(0.03)
+        conn.sendMsg(b"u", urgent=True)
+        received = recvAll(peer, 7)
+        self.assertEqual(received.replace(b"u", b""), b"012345")
+        self.assertLess(received.index(b"u"), 5)
+        self.assertEqual(limiter.nQueued(), 0)
+        self.assertEqual(limiter.stats[ORDERS].nMsgs, 1)
+        self.assertEqual(limiter.stats[DATA].nMsgs, 6)
+        conn.disconnect()
+        peer.close()
+
+    def test_writer_budgets_apart(self):
+        limiter = RateLimiter(rate=100, burst=50, budgets={ORDERS: (1, 1)})
+        conn, peer = connected(writerThread=True, rateLimiter=limiter)
+        peer.settimeout(3)
+        conn.startWriter()
+        start = time.monotonic()
+        conn.sendMsg(b"u", urgent=True)
+        conn.sendMsg(b"u", urgent=True)
+        for _ in range(5):
+            conn.sendMsg(b"d")
+        # the second urgent msg waits for its orders token, not the data ones
+        self.assertEqual(recvAll(peer, 6), b"uddddd")
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(recvAll(peer, 1), b"u")
+        self.assertEqual(limiter.stats[ORDERS].nWaits, 1)
+        self.assertEqual(limiter.stats[DATA].nWaits, 0)
+        conn.disconnect()
+        peer.close()
+
+    def test_waits_counted_once(self):
+        limiter = RateLimiter(rate=100, burst=1)
+        limiter.queued(DATA)
+        limiter.queued(DATA)
+        self.assertEqual(limiter.take(DATA), 0)
+        for _ in range(3):
+            self.assertGreater(limiter.take(DATA), 0)
+        self.assertEqual(limiter.stats[DATA].nWaits, 1)
+
+        # both wait for their token
+        limiter.acquire(DATA)
+        limiter.acquire(DATA)
+        self.assertEqual(limiter.stats[DATA].nWaits, 3)
+
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import asyncio
+import unittest
+
+from ibapi.common import BarData
+from ibapi.request_futures import FIRST_REQ_ID, RequestFuturesWrapper, RequestError
+
+
+class FakeApp(RequestFuturesWrapper):
+    def __init__(self):
+        RequestFuturesWrapper.__init__(self)
+        self.sent = []
+
+    def reqHistoricalData(self, reqId, *args):
+        self.sent.append(reqId)
+
+    def reqHeadTimeStamp(self, reqId, *args):
+        raise ConnectionError("not connected")
+
+
+class RequestFuturesTestCase(unittest.TestCase):
+    def test_items_until_end(self):
+        app = FakeApp()
+        f1 = app.request(app.reqHistoricalData, "x")
+        f2 = app.request(app.reqHistoricalData, "y")
+        id1, id2 = FIRST_REQ_ID, FIRST_REQ_ID + 1
+        self.assertEqual(app.sent, [id1, id2])
+
+        bars = [BarData(), BarData()]
+        app.historicalData(id2, bars[0])
+        app.historicalData(id1, bars[1])
+        app.historicalData(id2, bars[1])
+        self.assertFalse(f2.done())
+        app.historicalDataEnd(id2, "", "")
+
+        self.assertEqual(f2.result(0), bars)
+        self.assertFalse(f1.done())
+        self.assertEqual(list(app.requests.pending), [id1])
+
+    def test_error(self):
+        app = FakeApp()
+        f = app.request(app.reqHistoricalData, reqId=7)
+        app.error(7, 0, 2106, "HMDS data farm connection is OK")
+        self.assertFalse(f.done())
+        app.error(7, 0, 162, "Historical Market Data Service error message")
+
+        with self.assertRaises(RequestError) as cm:
+            f.result(0)
+        self.assertEqual(cm.exception.code, 162)
+        self.assertFalse(app.requests.pending)
+
+    def test_order_error(self):
+        app = FakeApp()
+        f = app.request(app.reqHistoricalData)
+        # eg: the rejection of order 1
+        app.error(1, 0, 201, "Order rejected")
+        self.assertFalse(f.done())
+
+    def test_send_fails(self):
+        app = FakeApp()
+        with self.assertRaises(ConnectionError):
+            app.request(app.reqHeadTimeStamp)
+        self.assertFalse(app.requests.pending)
+
+    def test_cancelled(self):
+        app = FakeApp()
+        f = app.request(app.reqHistoricalData)
+        f.cancel()
+        self.assertFalse(app.requests.pending)
+        app.historicalDataEnd(FIRST_REQ_ID, "", "")
+
+    def test_async(self):
+        app = FakeApp()
+
+        async def main():
+            f = app.requestAsync(app.reqHistoricalData)
+            asyncio.get_running_loop().call_soon(app.headTimestamp, FIRST_REQ_ID, "20250101")
+            return await asyncio.wait_for(f, 5)
+
+        self.assertEqual(asyncio.run(main()), ["20250101"])
+
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Copyright (C) 2025 Interactive Brokers LLC. All rights reserved. This code is subject to the terms
+ and conditions of the IB API Non-Commercial License or the IB API Commercial License, as applicable.
+"""
+
+import math
+import unittest
+from decimal import Decimal
+
+from ibapi.const import UNSET_DECIMAL
+from ibapi.decoder import Decoder
+from ibapi.message import IN
+from ibapi.server_versions import MIN_SERVER_VER_ENCODE_MSG_ASCII7
+from ibapi.tick_store import TickStore
+from ibapi.ticktype import TickTypeEnum
+from ibapi.wrapper import EWrapper
+
+
+class RecordingWrapper(EWrapper):
+    def __init__(self):
+        EWrapper.__init__(self)
+        self.calls = []
+
+    def tickPrice(self, reqId, tickType, price, attrib):
+        self.calls.append(("tickPrice", reqId, tickType, price))
+
+    def tickSize(self, reqId, tickType, size):
+        self.calls.append(("tickSize", reqId, tickType, size))
+
+
+class TickStoreTestCase(unittest.TestCase):
+    def test_update_and_snapshot(self):
+        store = TickStore(capacity=1)
+        store.updatePrice(10, TickTypeEnum.BID, 1.5, Decimal(100))
+        store.updatePrice(11, TickTypeEnum.ASK, 2.5, UNSET_DECIMAL)
+        store.update(10, TickTypeEnum.ASK, 1.75)
+        store.updateString(11, TickTypeEnum.LAST_TIMESTAMP, "1700000000")
+
+        self.assertEqual(store.get(10, TickTypeEnum.BID_SIZE), 100.0)
+        self.assertTrue(math.isnan(store.get(11, TickTypeEnum.ASK_SIZE)))
+        self.assertEqual(store.getString(11, TickTypeEnum.LAST_TIMESTAMP), "1700000000")
+        self.assertEqual(store.updateCount(10), 3)
+        self.assertEqual(store.capacity, 2)
+
+        bids, asks = store.snapshot([11, 10, 12], (TickTypeEnum.BID, TickTypeEnum.ASK))
+        self.assertTrue(math.isnan(bids[0]))
+        self.assertEqual(list(bids)[1], 1.5)
+        self.assertTrue(math.isnan(bids[2]))
+        self.assertEqual(list(asks)[:2], [2.5, 1.75])
+
+        store.clear(10)
+        self.assertTrue(math.isnan(store.get(10, TickTypeEnum.BID)))
+
+    def test_snapshot_while_growing(self):
+        store = TickStore(capacity=1)
+        store.update(10, TickTypeEnum.BID, 1.5)
+
+        class GrowingRows(dict):
+            # the decoder thread adds a reqId in the middle of the snapshot
+            def __contains__(self, reqId):
+                if reqId == 11 and not dict.__contains__(self, 11):
+                    store.update(11, TickTypeEnum.BID, 2.5)
+                return dict.__contains__(self, reqId)
+
+        store.rows = GrowingRows(store.rows)
+        (bids,) = store.snapshot([10, 11], (TickTypeEnum.BID,))
+        self.assertEqual(list(bids), [1.5, 2.5])
+
+    def test_decoder(self):
+        wrapper = RecordingWrapper()
+        decoder = Decoder(wrapper, MIN_SERVER_VER_ENCODE_MSG_ASCII7)
+        decoder.tickStore = TickStore()
+
+        decoder.interpret((b"6", b"1", b"1", b"1.5", b"100", b"0"), IN.TICK_PRICE)
+        decoder.interpret((b"6", b"1", b"23", b"0.25"), IN.TICK_GENERIC)
+        self.assertEqual(len(wrapper.calls), 2)
+
+        decoder.tickStore.forwardTicks = False
+        decoder.interpret((b"6", b"1", b"2", b"1.75", b"200", b"0"), IN.TICK_PRICE)
+        decoder.interpret((b"6", b"1", b"3", b"300"), IN.TICK_SIZE)
+        self.assertEqual(len(wrapper.calls), 2)
+
+        store = decoder.tickStore
+        self.assertEqual(
+            [store.get(1, tickType) for tickType in (0, 1, 2, 3, 23)],
+            [100.0, 1.5, 1.75, 300.0, 0.25],
+        )
+
+
+if "__main__" == __name__:
+    unittest.main()
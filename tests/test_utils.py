@@ -4,9 +4,23 @@ Copyright (C) 2019 Interactive Brokers LLC. All rights reserved. This code is su
 """
 
 import unittest
+from decimal import Decimal
 
+from ibapi.const import UNSET_INTEGER, UNSET_DOUBLE, UNSET_DECIMAL, DOUBLE_INFINITY
 from ibapi.enum_implem import Enum
 from ibapi.utils import setattr_log
+from ibapi.utils import (
+    BadMessage,
+    decode,
+    isAsciiPrintable,
+    read_int,
+    read_int_show_unset,
+    read_float,
+    read_float_show_unset,
+    read_decimal,
+    read_bool,
+    read_str,
+)
 
 
 class UtilsTestCase(unittest.TestCase):
@@ -48,6 +62,43 @@ class UtilsTestCase(unittest.TestCase):
         print(o)
         # import code; code.interact(local=locals())
 
+    def test_readers(self):
+        fields = iter(
+            [b"12", b"", b"2.5", b"Infinity", b"", b"9223372036854775807",
+             b"1.25", b"1", b"0", b"caf\xc3\xa9"]
+        )
+        self.assertEqual(read_int(fields), 12)
+        self.assertEqual(read_int_show_unset(fields), UNSET_INTEGER)
+        self.assertEqual(read_float(fields), 2.5)
+        self.assertEqual(read_float(fields), DOUBLE_INFINITY)
+        self.assertEqual(read_float_show_unset(fields), UNSET_DOUBLE)
+        self.assertEqual(read_decimal(fields), UNSET_DECIMAL)
+        self.assertEqual(read_decimal(fields), Decimal("1.25"))
+        self.assertEqual(read_bool(fields), True)
+        self.assertEqual(read_bool(fields), False)
+        self.assertEqual(read_str(fields), "caf\xe9")
+        self.assertRaises(BadMessage, read_int, fields)
+
+    def test_readers_match_decode(self):
+        for field in (b"", b"0", b"7", b"-3", b"2147483647", b"9223372036854775807"):
+            self.assertEqual(read_int(iter([field])), decode(int, iter([field])))
+            self.assertEqual(read_bool(iter([field])), decode(bool, iter([field])))
+            self.assertEqual(read_decimal(iter([field])), decode(Decimal, iter([field])))
+            self.assertEqual(
+                read_int_show_unset(iter([field])), decode(int, iter([field]), True)
+            )
+            self.assertEqual(
+                read_float_show_unset(iter([field])), decode(float, iter([field]), True)
+            )
+
+    def test_is_ascii_printable(self):
+        self.assertTrue(isAsciiPrintable("AAPL ref-1"))
+        self.assertTrue(isAsciiPrintable("a\tb\r\n"))
+        self.assertTrue(isAsciiPrintable(""))
+        self.assertFalse(isAsciiPrintable("caf\xe9"))
+        self.assertFalse(isAsciiPrintable("a\x01"))
+        self.assertFalse(isAsciiPrintable("a\x7f"))
+
 
 if "__main__" == __name__:
     unittest.main()